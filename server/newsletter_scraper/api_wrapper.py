@@ -7,9 +7,15 @@ This script can be called from Node.js API routes
 import sys
 import os
 import json
+import argparse
 import logging
+import threading
+import time
 from datetime import datetime
 
+# Deadlines are measured from process start, which is when the Node.js route's kill timer starts
+PROCESS_STARTED_AT = time.time()
+
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -24,15 +30,32 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def run_scraper():
-    """Run the newsletter scraper once and return results"""
+class ProgressStream:
+    """
+    --stream output: one JSON object per line on stdout, flushed per event, so the
+    Node.js route sees progress live and keeps everything up to a kill
+    """
+    
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._lock = threading.Lock()  # events arrive from every pipeline stage
+    
+    def __call__(self, event: dict):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+def run_scraper(preflight: bool = False, deadline_seconds: float = None, progress=None):
+    """Run the newsletter scraper once and return results (before deadline_seconds, if given)"""
     try:
         logger.info("=== Starting newsletter scraper via API call ===")
         start_time = datetime.now()
         
         # Initialize scraper
         logger.info("Initializing NewsletterScraper...")
-        scraper = NewsletterScraper()
+        scraper = NewsletterScraper(preflight=preflight)
+        scraper.progress = progress
         logger.info("NewsletterScraper initialized successfully")
         
         # Run single scraping cycle with increased email limit
@@ -40,7 +63,8 @@ def run_scraper():
         logger.info(f"Starting scraping cycle with max_emails={max_emails}...")
         
         # Run scraper and get summary
-        summary = scraper.run_scraping_cycle(max_emails=max_emails)
+        deadline = PROCESS_STARTED_AT + deadline_seconds if deadline_seconds else None
+        summary = scraper.run_scraping_cycle(max_emails=max_emails, deadline=deadline)
         logger.info("Scraping cycle completed successfully")
         
         # Get current database stats (for reference, not logged verbosely)
@@ -60,6 +84,9 @@ def run_scraper():
             'message': 'Newsletter scraper completed successfully',
             'duration_seconds': duration,
             'summary': summary,
+            'partial': summary.get('partial', False),  # Stopped admitting emails to finish before the deadline
+            'coalesced': summary.get('coalesced', False),  # Attached to a cycle already running elsewhere
+            'llm_stats': summary.get('llm_stats', {}),  # Gemini requests/tokens/latency per call type
             'database_stats': stats,  # Keep for API response but don't log verbosely
             'timestamp': end_time.isoformat()
         }
@@ -72,6 +99,20 @@ def run_scraper():
             logger.info(f"   New Sponsors Added: {summary.get('new_sponsors_added', 0)}")
             logger.info(f"   Need Review: {summary.get('need_review', 0)}")
             logger.info(f"   Complete: {summary.get('complete', 0)}")
+            if summary.get('coalesced'):
+                logger.info(f"   Coalesced: another scraping cycle was running; reporting its result"
+                            f"{' (still running)' if summary.get('still_running') else ''}")
+            if summary.get('partial'):
+                deadline_stats = summary.get('deadline_stats', {})
+                logger.info(f"   Partial Run: {deadline_stats.get('not_admitted', 0)} emails left for the next run "
+                            f"({deadline_stats.get('dropped_at_deadline', 0)} dropped in flight)")
+            logger.info(f"   Gemini Circuit: {summary.get('gemini_circuit', {}).get('state', 'unknown')}")
+            llm_total = summary.get('llm_stats', {}).get('total', {})
+            logger.info(f"   Gemini Requests: {llm_total.get('calls', 0)} "
+                        f"({llm_total.get('prompt_tokens', 0):,} prompt / {llm_total.get('output_tokens', 0):,} output tokens)")
+            http_stats = summary.get('http_stats', {})
+            logger.info(f"   Website Requests: {http_stats.get('requests', 0)} "
+                        f"({http_stats.get('connections_reused', 0)} on reused connections)")
         
         return result
         
@@ -84,17 +125,34 @@ def run_scraper():
             'timestamp': datetime.now().isoformat()
         }
 
+def parse_args(argv=None):
+    """Parse command line flags passed by the Node.js routes"""
+    parser = argparse.ArgumentParser(description='Run the newsletter scraper once and print a JSON summary')
+    parser.add_argument('--preflight', action='store_true',
+                        help='Run a real Gemini test generation before starting (strict startup check)')
+    parser.add_argument('--deadline-seconds', type=float, default=None,
+                        help='Return a (possibly partial) summary within this many seconds of process start')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write newline-delimited JSON progress events to stdout, ending with a summary event')
+    return parser.parse_args(argv)
+
 def main():
     """Main entry point for API calls"""
+    stream = None
     try:
         logger.info("=== API Wrapper Main Entry Point ===")
-        result = run_scraper()
+        args = parse_args()
+        stream = ProgressStream() if args.stream else None
+        result = run_scraper(preflight=args.preflight, deadline_seconds=args.deadline_seconds, progress=stream)
         
         logger.info(f"Scraper result: {result['success']}")
         
         # Output JSON result for Node.js to capture
         logger.info("Outputting JSON result to stdout...")
-        print(json.dumps(result, indent=2))
+        if stream:
+            stream(dict(result, event='summary'))
+        else:
+            print(json.dumps(result, indent=2))
         
         # Exit with appropriate code
         exit_code = 0 if result['success'] else 1
@@ -110,7 +168,10 @@ def main():
             'timestamp': datetime.now().isoformat()
         }
         logger.error("Outputting error JSON result to stdout...")
-        print(json.dumps(error_result, indent=2))
+        if stream:
+            stream(dict(error_result, event='summary'))
+        else:
+            print(json.dumps(error_result, indent=2))
         sys.exit(1)
 
 if __name__ == "__main__":
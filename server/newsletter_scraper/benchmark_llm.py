@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Gemini-facing stages of SponsorAnalyzer.
+
+Runs the contact, audience, tag and analysis calls against FakeLLMBackend
+(no network) at several concurrency levels and reports throughput, latency
+percentiles, fallbacks and circuit breaker state.
+
+Usage:
+    python benchmark_llm.py --sponsors 200 --workers 1 4 8 16 --latency-ms 800 --error-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm import FakeLLMBackend
+from sponsor_analyzer import SponsorAnalyzer
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _synthetic_sponsor(i: int) -> dict:
+    return {
+        'sponsorName': f'Acme Tool {i}',
+        'sponsorLink': f'https://acmetool{i}.com',
+        'rootDomain': f'acmetool{i}.com',
+        'newsletterSponsored': f'Test Newsletter {i % 7}',
+        'extractedDescription': 'Workflow automation platform for teams' if i % 5 else 'Join our affiliate program',
+    }
+
+
+def _process(analyzer: SponsorAnalyzer, sponsor: dict) -> float:
+    """Run every Gemini stage for one sponsor and return the elapsed seconds"""
+    start = time.time()
+    analyzer.gemini_find_contact_email(sponsor['rootDomain'], sponsor['sponsorName'], sponsor['newsletterSponsored'])
+    analyzer.gemini_estimate_newsletter_audience(sponsor['newsletterSponsored'], 'SPONSORED BY ' + sponsor['sponsorName'])
+    sponsor['tags'] = analyzer._assign_tags_ai(sponsor)
+    analyzer.gemini_analyze_sponsor(sponsor)
+    return time.time() - start
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(sponsors: int, workers: int, latency_ms: float, jitter_ms: float,
+                  error_rate: float, seed: int) -> dict:
+    backend = FakeLLMBackend(latency_ms=latency_ms, latency_jitter_ms=jitter_ms, error_rate=error_rate, seed=seed)
+    analyzer = SponsorAnalyzer(llm_backend=backend)
+    batch = [_synthetic_sponsor(i) for i in range(sponsors)]
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        durations = list(executor.map(lambda s: _process(analyzer, s), batch))
+    elapsed = time.time() - start
+
+    deferred = sum(1 for s in batch if s.get('pendingGeminiEnrichment'))
+    return {
+        'workers': workers,
+        'sponsors': sponsors,
+        'llm_calls': backend.calls,
+        'elapsed_seconds': round(elapsed, 2),
+        'sponsors_per_second': round(sponsors / elapsed, 2) if elapsed else 0.0,
+        'calls_per_second': round(backend.calls / elapsed, 2) if elapsed else 0.0,
+        'p50_sponsor_seconds': round(_percentile(durations, 50), 3),
+        'p95_sponsor_seconds': round(_percentile(durations, 95), 3),
+        'deferred_to_fallback': deferred,
+        'gemini_circuit': analyzer.gemini_circuit_snapshot(),
+        'llm_usage': analyzer.llm_stats_snapshot().get('total', {})
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SponsorAnalyzer LLM stages offline')
+    parser.add_argument('--sponsors', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--jitter-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    results = [
+        run_benchmark(args.sponsors, workers, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+        for workers in args.workers
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
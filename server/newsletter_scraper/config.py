@@ -27,6 +27,112 @@ if EMAIL_PASSWORD:
 # Google Gemini Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY') or os.getenv('sponsorDB_geminiKey')  # Supports both env var names
 
+# Gemini circuit breaker (open after N consecutive failures or slow calls, retry after reset window)
+GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('GEMINI_BREAKER_FAILURE_THRESHOLD', '3'))
+GEMINI_BREAKER_LATENCY_THRESHOLD = float(os.getenv('GEMINI_BREAKER_LATENCY_THRESHOLD', '20'))  # seconds
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET_SECONDS', '120'))
+
+# LLM backend: 'gemini' (production) or 'fake' (offline stand-in for benchmarks and tests)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini').lower()
+FAKE_LLM_LATENCY_MS = float(os.getenv('FAKE_LLM_LATENCY_MS', '800'))  # mean latency per call
+FAKE_LLM_LATENCY_JITTER_MS = float(os.getenv('FAKE_LLM_LATENCY_JITTER_MS', '300'))  # std deviation
+FAKE_LLM_ERROR_RATE = float(os.getenv('FAKE_LLM_ERROR_RATE', '0.0'))  # 0.0-1.0 chance a call raises
+FAKE_LLM_SEED = os.getenv('FAKE_LLM_SEED')  # set for reproducible runs
+
+# Local pre-classifier (skips Gemini for clear non-sponsors and obvious tag assignments)
+PRE_CLASSIFIER_MODEL_PATH = os.getenv('PRE_CLASSIFIER_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pre_classifier_model.json'))
+PRE_CLASSIFIER_REJECT_THRESHOLD = float(os.getenv('PRE_CLASSIFIER_REJECT_THRESHOLD', '0.05'))  # P(sponsor) below this is skipped
+PRE_CLASSIFIER_TAG_MIN_HITS = int(os.getenv('PRE_CLASSIFIER_TAG_MIN_HITS', '3'))  # keyword hits for a tag to skip Gemini tagging
+
+# Website scraping HTTP session (one pooled keep-alive session shared by every sponsor website request)
+HTTP_USER_AGENT = os.getenv('HTTP_USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '50'))  # distinct hosts kept in the pool
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))  # keep-alive connections per host
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '1'))  # retries on connection errors and 429/5xx
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.3'))  # seconds, doubled per retry
+HTTP_MAX_PAGE_BYTES = int(os.getenv('HTTP_MAX_PAGE_BYTES', str(2 * 1024 * 1024)))  # stop reading a page past this
+HTTP_STREAM_CHUNK_BYTES = int(os.getenv('HTTP_STREAM_CHUNK_BYTES', str(16 * 1024)))
+HTTP_DRAIN_MAX_BYTES = int(os.getenv('HTTP_DRAIN_MAX_BYTES', str(64 * 1024)))  # read an abandoned body's rest to keep the connection
+
+# Fetched-page cache (memory tier is per cycle; disk tier persists across runs when PAGE_CACHE_DIR is set)
+PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', '')  # e.g. /tmp/sponsor_page_cache; empty disables the disk tier
+PAGE_CACHE_DISK_TTL_SECONDS = float(os.getenv('PAGE_CACHE_DISK_TTL_SECONDS', str(24 * 3600)))  # reuse without validators
+
+# Concurrent website crawl (candidate pages found on a homepage are fetched in parallel)
+CRAWL_MAX_CONCURRENCY = int(os.getenv('CRAWL_MAX_CONCURRENCY', '16'))  # page fetches in flight across all sponsors
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv('CRAWL_PER_HOST_CONCURRENCY', '3'))  # parallel fetches per website
+CRAWL_SPONSOR_DEADLINE_SECONDS = float(os.getenv('CRAWL_SPONSOR_DEADLINE_SECONDS', '8'))  # website budget per sponsor
+
+# Affiliate redirect -> real domain mappings (persisted in the affiliateredirects collection)
+AFFILIATE_REDIRECT_CACHE_DAYS = int(os.getenv('AFFILIATE_REDIRECT_CACHE_DAYS', '30'))  # resolved mappings
+AFFILIATE_REDIRECT_NEGATIVE_CACHE_DAYS = int(os.getenv('AFFILIATE_REDIRECT_NEGATIVE_CACHE_DAYS', '3'))  # unresolvable ones
+AFFILIATE_REDIRECT_MEMORY_TTL_SECONDS = float(os.getenv('AFFILIATE_REDIRECT_MEMORY_TTL_SECONDS', '3600'))  # in-process copy
+AFFILIATE_REDIRECT_MEMORY_MAX_ENTRIES = int(os.getenv('AFFILIATE_REDIRECT_MEMORY_MAX_ENTRIES', '2000'))
+
+# DNS cache for sponsor hosts (other lookups in the process bypass it; hosts that don't exist are remembered)
+DNS_CACHE_TTL_SECONDS = float(os.getenv('DNS_CACHE_TTL_SECONDS', '600'))
+DNS_NEGATIVE_TTL_SECONDS = float(os.getenv('DNS_NEGATIVE_TTL_SECONDS', '300'))
+DNS_PRE_RESOLVE_WORKERS = int(os.getenv('DNS_PRE_RESOLVE_WORKERS', '16'))  # parallel lookups per email
+DNS_CACHE_MAX_HOSTS = int(os.getenv('DNS_CACHE_MAX_HOSTS', '5000'))  # sponsor hosts remembered at once
+
+# Politeness towards sponsor websites (per-host request spacing, robots.txt cached per host)
+CRAWL_HOST_MIN_DELAY_SECONDS = float(os.getenv('CRAWL_HOST_MIN_DELAY_SECONDS', '0.5'))  # between requests to one host
+CRAWL_MAX_ROBOTS_DELAY_SECONDS = float(os.getenv('CRAWL_MAX_ROBOTS_DELAY_SECONDS', '10'))  # cap on robots Crawl-delay
+ROBOTS_TXT_TTL_SECONDS = float(os.getenv('ROBOTS_TXT_TTL_SECONDS', str(24 * 3600)))
+RESPECT_ROBOTS_TXT = os.getenv('RESPECT_ROBOTS_TXT', 'true').lower() == 'true'
+
+# Contact discovery results per root domain (domaincontacts collection), refreshed by a scheduled job
+DOMAIN_CONTACT_REFRESH_DAYS = int(os.getenv('DOMAIN_CONTACT_REFRESH_DAYS', '30'))
+DOMAIN_CONTACT_NOT_FOUND_REFRESH_DAYS = int(os.getenv('DOMAIN_CONTACT_NOT_FOUND_REFRESH_DAYS', '7'))
+DOMAIN_CONTACT_REFRESH_BATCH = int(os.getenv('DOMAIN_CONTACT_REFRESH_BATCH', '50'))  # domains per scheduled refresh
+
+# Scraping cycle pipeline (bounded queues between stages; each stage has its own workers)
+PIPELINE_FETCH_WORKERS = int(os.getenv('PIPELINE_FETCH_WORKERS', '1'))  # IMAP downloads share one connection
+PIPELINE_PARSE_WORKERS = int(os.getenv('PIPELINE_PARSE_WORKERS', '2'))  # sponsor section extraction
+PIPELINE_LINK_WORKERS = int(os.getenv('PIPELINE_LINK_WORKERS', '2'))  # local link screening
+PIPELINE_ENRICH_WORKERS = int(os.getenv('PIPELINE_ENRICH_WORKERS', '6'))  # website + Gemini enrichment
+PIPELINE_PERSIST_WORKERS = int(os.getenv('PIPELINE_PERSIST_WORKERS', '1'))  # MongoDB writes
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '16'))  # items waiting per stage (back-pressure)
+PIPELINE_ENRICH_QUEUE_SIZE = int(os.getenv('PIPELINE_ENRICH_QUEUE_SIZE', '200'))  # screened candidates waiting, taken best-first
+EMAIL_PARSE_PROCESSES = int(os.getenv('EMAIL_PARSE_PROCESSES', '0'))  # parser worker processes; 0 parses in-process
+
+# Deadline-aware cycles (api_wrapper --deadline-seconds): admission control from recent per-email cost
+CYCLE_DEADLINE_RESERVE_SECONDS = float(os.getenv('CYCLE_DEADLINE_RESERVE_SECONDS', '20'))  # kept back for drain + summary
+CYCLE_DEFAULT_EMAIL_SECONDS = float(os.getenv('CYCLE_DEFAULT_EMAIL_SECONDS', '15'))  # cost estimate with no history
+CYCLE_COST_HISTORY = int(os.getenv('CYCLE_COST_HISTORY', '10'))  # recent cycles the estimate starts from
+PROGRESS_COUNTERS_INTERVAL_SECONDS = float(os.getenv('PROGRESS_COUNTERS_INTERVAL_SECONDS', '5'))  # api_wrapper --stream counters
+
+# Long-lived worker service (worker_service.py) that keeps the scraper warm between runs
+WORKER_HOST = os.getenv('SCRAPER_WORKER_HOST', '127.0.0.1')
+WORKER_PORT = int(os.getenv('SCRAPER_WORKER_PORT', '8765'))
+WORKER_MAX_QUEUED_RUNS = int(os.getenv('SCRAPER_WORKER_MAX_QUEUED_RUNS', '5'))  # further requests get 429
+WORKER_RUN_HISTORY = int(os.getenv('SCRAPER_WORKER_RUN_HISTORY', '20'))  # finished runs kept for /runs/<id>
+WORKER_RUN_EVENTS = int(os.getenv('SCRAPER_WORKER_RUN_EVENTS', '200'))  # recent progress events kept per run
+
+# Per-email jobs leased through MongoDB so several scraper processes can share one inbox
+EMAIL_JOB_LEASES = os.getenv('EMAIL_JOB_LEASES', 'false').lower() == 'true'
+EMAIL_JOB_LEASE_SECONDS = float(os.getenv('EMAIL_JOB_LEASE_SECONDS', '300'))  # a silent worker's jobs are reclaimable after this
+EMAIL_JOB_HEARTBEAT_SECONDS = float(os.getenv('EMAIL_JOB_HEARTBEAT_SECONDS', '60'))  # lease extension interval
+EMAIL_JOB_MAX_ATTEMPTS = int(os.getenv('EMAIL_JOB_MAX_ATTEMPTS', '3'))  # then the job is parked as failed
+EMAIL_JOB_RETENTION_DAYS = int(os.getenv('EMAIL_JOB_RETENTION_DAYS', '14'))  # finished jobs are then removed
+
+# Cross-process lock on the scraping cycle (scheduler, api_wrapper and worker runs never overlap)
+RUN_LOCK_TTL_SECONDS = float(os.getenv('RUN_LOCK_TTL_SECONDS', '120'))  # a crashed holder's lock frees after this
+RUN_LOCK_POLL_SECONDS = float(os.getenv('RUN_LOCK_POLL_SECONDS', '5'))  # how often a coalesced trigger checks the lock
+RUN_LOCK_WAIT_SECONDS = float(os.getenv('RUN_LOCK_WAIT_SECONDS', '1800'))  # longest wait for a trigger without a deadline
+
+# Nightly re-analysis of pending sponsors
+MANUAL_ANALYSIS_PAGE_SIZE = int(os.getenv('MANUAL_ANALYSIS_PAGE_SIZE', '50'))  # sponsors read and written per page
+MANUAL_ANALYSIS_WORKERS = int(os.getenv('MANUAL_ANALYSIS_WORKERS', '6'))  # sponsors analysed concurrently
+MANUAL_ANALYSIS_MAX_SECONDS = float(os.getenv('MANUAL_ANALYSIS_MAX_SECONDS', '3300'))  # scheduled run's time box (before the 3 AM refresh)
+
+# Sponsor website host health (shortened timeout after a failure, skipped with exponential re-check back-off)
+HOST_HEALTH_SKIP_AFTER_FAILURES = int(os.getenv('HOST_HEALTH_SKIP_AFTER_FAILURES', '2'))  # consecutive failures
+HOST_HEALTH_DEGRADED_TIMEOUT = float(os.getenv('HOST_HEALTH_DEGRADED_TIMEOUT', '2'))  # seconds, for recently failing hosts
+HOST_HEALTH_BACKOFF_BASE_SECONDS = float(os.getenv('HOST_HEALTH_BACKOFF_BASE_SECONDS', '900'))  # 15 min, doubled per failure
+HOST_HEALTH_BACKOFF_MAX_SECONDS = float(os.getenv('HOST_HEALTH_BACKOFF_MAX_SECONDS', str(7 * 24 * 3600)))
+
 # OpenAI Configuration (DEPRECATED - replaced with Gemini)
 # OPENAI_API_KEY = os.getenv('sponsorDB_openAIKey')
 
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from config import (
+    CRAWL_HOST_MIN_DELAY_SECONDS, CRAWL_MAX_ROBOTS_DELAY_SECONDS,
+    ROBOTS_TXT_TTL_SECONDS, RESPECT_ROBOTS_TXT, HTTP_USER_AGENT
+)
+from host_health import HostHealth, HostUnavailableError, UNHEALTHY_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsDisallowedError(requests.RequestException):
+    """robots.txt for the host disallows this URL"""
+
+
+class _HostState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+        self.waiting = 0
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_expires_at = 0.0
+        self.robots_lock = threading.Lock()
+
+
+class CrawlScheduler:
+    """
+    Politeness layer in front of every sponsor-site request.
+
+    Each host has its own queue of reserved time slots spaced at least
+    CRAWL_HOST_MIN_DELAY_SECONDS apart (or the robots.txt Crawl-delay, capped).
+    A request waits only for its own host's slot, so requests to different hosts
+    interleave freely and overall throughput stays bounded by the pool, not by
+    the slowest site. robots.txt is fetched once per host and cached for
+    ROBOTS_TXT_TTL_SECONDS. The robots.txt fetch shares the page request's timeout
+    and host health: hosts in back-off are skipped, and a robots.txt that can't be
+    reached counts as a host failure and fails the page request too.
+    """
+
+    def __init__(self, session: requests.Session, host_health: Optional[HostHealth] = None,
+                 min_delay: float = CRAWL_HOST_MIN_DELAY_SECONDS, respect_robots: bool = RESPECT_ROBOTS_TXT,
+                 user_agent: str = HTTP_USER_AGENT):
+        self.session = session
+        self.host_health = host_health or HostHealth()
+        self.min_delay = min_delay
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'robots_fetched': 0, 'robots_disallowed': 0, 'delayed_requests': 0,
+                'politeness_wait_seconds': 0.0, 'max_host_queue': 0}
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState()
+                self._hosts[host] = state
+            return state
+
+    def _robots(self, scheme: str, host: str, state: _HostState, timeout: float) -> RobotFileParser:
+        with state.robots_lock:
+            if state.robots is not None and time.time() < state.robots_expires_at:
+                return state.robots
+            if self.host_health.should_skip(host):
+                raise HostUnavailableError(f"Skipping {host}: in failure back-off window")
+
+            parser = RobotFileParser()
+            ttl = ROBOTS_TXT_TTL_SECONDS
+            start = time.time()
+            try:
+                # Straight through the session: robots.txt itself isn't subject to robots/politeness checks
+                response = self.session.get(f"{scheme}://{host}/robots.txt",
+                                            timeout=self.host_health.timeout_for(host, min(3, timeout)))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # The host itself is down: the page request would fail the same way
+                self.host_health.record_failure(host, f"robots.txt {type(e).__name__}: {e}")
+                raise
+            except requests.RequestException as e:
+                # Unreachable robots.txt: allow, but look again sooner
+                logger.debug(f"robots.txt unavailable for {host}: {e}")
+                response = None
+            with self._lock:
+                self.stats['robots_fetched'] += 1
+            if response is None or response.status_code >= 500 or response.status_code in UNHEALTHY_STATUS_CODES:
+                if response is not None:
+                    self.host_health.record_failure(host, f"robots.txt HTTP {response.status_code}")
+                parser.allow_all = True
+                ttl = min(ttl, 600)
+            elif response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                self.host_health.record_success(host, time.time() - start)
+                parser.parse(response.text.splitlines())
+            parser.modified()
+            state.robots = parser
+            state.robots_expires_at = time.time() + ttl
+            return parser
+
+    def acquire(self, scheme: str, host: str, url: str, check_robots: bool = True, timeout: float = 3):
+        """
+        Block until this host's next politeness slot. Raises RobotsDisallowedError
+        if robots.txt forbids the URL (checked only when check_robots is set); timeout
+        is the page request's own, and also bounds the robots.txt fetch.
+        """
+        state = self._state(host)
+        delay = self.min_delay
+
+        if self.respect_robots and check_robots:
+            robots = self._robots(scheme, host, state, timeout)
+            if not robots.can_fetch(self.user_agent, url):
+                with self._lock:
+                    self.stats['robots_disallowed'] += 1
+                raise RobotsDisallowedError(f"robots.txt disallows {url}")
+            crawl_delay = robots.crawl_delay(self.user_agent)
+            if crawl_delay:
+                delay = max(delay, min(float(crawl_delay), CRAWL_MAX_ROBOTS_DELAY_SECONDS))
+
+        # Reserve the next slot in this host's queue
+        with state.lock:
+            now = time.time()
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + delay
+            state.waiting += 1
+            queued = state.waiting
+
+        wait_seconds = slot - now
+        with self._lock:
+            self.stats['max_host_queue'] = max(self.stats['max_host_queue'], queued)
+            if wait_seconds > 0:
+                self.stats['delayed_requests'] += 1
+                self.stats['politeness_wait_seconds'] += wait_seconds
+        try:
+            if wait_seconds > 0:
+                time.sleep(wait_seconds)
+        finally:
+            with state.lock:
+                state.waiting -= 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = self._empty_stats()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['politeness_wait_seconds'] = round(stats['politeness_wait_seconds'], 2)
+        return stats
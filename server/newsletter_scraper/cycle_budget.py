@@ -0,0 +1,102 @@
+import statistics
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from config import CYCLE_DEADLINE_RESERVE_SECONDS, CYCLE_DEFAULT_EMAIL_SECONDS
+
+# Weight of the historical estimate, in emails, against this cycle's observations
+PRIOR_WEIGHT = 3
+
+
+class CycleBudget:
+    """
+    Admission control for one scraping cycle against a wall-clock deadline.
+
+    The cost of an email (admission to completion, queueing included) starts from
+    the median of recent cycles and is blended with what this cycle observes.
+    New emails are admitted only while the time left before the reserve covers
+    that estimate. Once the reserve is reached, stages stop starting new work.
+    The first half of the reserve lets in-flight calls drain and the second half
+    is for the summary and cleanup. Without a deadline everything is admitted.
+    """
+
+    def __init__(self, deadline: Optional[float] = None, history: Iterable[float] = (),
+                 reserve: float = CYCLE_DEADLINE_RESERVE_SECONDS, default_cost: float = CYCLE_DEFAULT_EMAIL_SECONDS):
+        history = [cost for cost in history if cost and cost > 0]
+        self.deadline = deadline
+        self.reserve = reserve
+        self.prior_cost = statistics.median(history) if history else default_cost
+        self.closed = False
+        self._admitted_at: Dict[str, float] = {}
+        self._observed = []
+        self._lock = threading.Lock()
+        self.stats = {'admitted': 0, 'not_admitted': 0, 'dropped_at_deadline': 0}
+
+    @property
+    def stop_at(self) -> Optional[float]:
+        """No new stage work starts after this time"""
+        return self.deadline - self.reserve if self.deadline else None
+
+    @property
+    def drain_until(self) -> Optional[float]:
+        """In-flight work is waited for until this time"""
+        return self.deadline - self.reserve / 2 if self.deadline else None
+
+    def remaining(self) -> float:
+        if not self.deadline:
+            return float('inf')
+        return self.stop_at - time.time()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def estimate(self) -> float:
+        with self._lock:
+            observed = list(self._observed)
+        return (self.prior_cost * PRIOR_WEIGHT + sum(observed)) / (PRIOR_WEIGHT + len(observed))
+
+    def admit(self, key: str) -> bool:
+        """True if the email can be started now and is expected to finish before the reserve"""
+        if not self.closed and self.remaining() < self.estimate():
+            # Once one email doesn't fit, the rest of the cycle is closed to new emails
+            self.closed = True
+        with self._lock:
+            if self.closed:
+                self.stats['not_admitted'] += 1
+                return False
+            self._admitted_at[key] = time.time()
+            self.stats['admitted'] += 1
+            return True
+
+    def finished(self, key: str):
+        """An admitted email left the pipeline; its duration feeds the estimate"""
+        with self._lock:
+            admitted_at = self._admitted_at.pop(key, None)
+            if admitted_at is not None:
+                self._observed.append(time.time() - admitted_at)
+
+    def dropped(self, key: str):
+        """An admitted email was left unfinished because the deadline came (it stays unread)"""
+        with self._lock:
+            if self._admitted_at.pop(key, None) is not None:
+                self.stats['dropped_at_deadline'] += 1
+
+    def observed_cost(self) -> Optional[float]:
+        """Median seconds per email in this cycle (None if no email finished)"""
+        with self._lock:
+            return statistics.median(self._observed) if self._observed else None
+
+    def snapshot(self) -> Dict:
+        observed = self.observed_cost()
+        estimate = self.estimate()
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({
+            'deadline_set': bool(self.deadline),
+            'seconds_left': round(self.deadline - time.time(), 1) if self.deadline else None,
+            'estimated_seconds_per_email': round(estimate, 2),
+            'observed_seconds_per_email': round(observed, 2) if observed is not None else None,
+            'partial': bool(stats['not_admitted'] or stats['dropped_at_deadline'])
+        })
+        return stats
@@ -1,10 +1,16 @@
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
-from pymongo import MongoClient
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from pymongo.collection import Collection
 from pymongo.database import Database
-from config import MONGODB_URI, DATABASE_NAME, COLLECTION_NAME
+from config import (
+    MONGODB_URI, DATABASE_NAME, COLLECTION_NAME,
+    AFFILIATE_REDIRECT_CACHE_DAYS, AFFILIATE_REDIRECT_NEGATIVE_CACHE_DAYS,
+    DOMAIN_CONTACT_REFRESH_DAYS, DOMAIN_CONTACT_NOT_FOUND_REFRESH_DAYS,
+    EMAIL_JOB_MAX_ATTEMPTS, EMAIL_JOB_RETENTION_DAYS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +20,11 @@ class SponsorDatabase:
         self.db: Database = None
         self.collection: Collection = None
         self.denied_domains_collection: Collection = None
+        self.affiliate_redirects_collection: Collection = None
+        self.host_health_collection: Collection = None
+        self.domain_contacts_collection: Collection = None
+        self.email_jobs_collection: Collection = None
+        self.scraper_locks_collection: Collection = None
         self.connect()
     
     def connect(self):
@@ -23,6 +34,12 @@ class SponsorDatabase:
             self.db = self.client[DATABASE_NAME]
             self.collection = self.db[COLLECTION_NAME]
             self.denied_domains_collection = self.db['denieddomains']
+            self.affiliate_redirects_collection = self.db['affiliateredirects']
+            self.host_health_collection = self.db['hosthealth']
+            self.domain_contacts_collection = self.db['domaincontacts']
+            self.scraper_cycles_collection = self.db['scrapercycles']
+            self.email_jobs_collection = self.db['emailjobs']
+            self.scraper_locks_collection = self.db['scraperlocks']
             
             # Test connection
             self.client.admin.command('ping')
@@ -31,6 +48,44 @@ class SponsorDatabase:
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
+        
+        self._ensure_indexes()
+    
+    def _ensure_indexes(self):
+        """Indexes for the scraper-owned collections; a failure here doesn't fail the connection"""
+        try:
+            # Expired redirect mappings are removed by MongoDB itself
+            self.affiliate_redirects_collection.create_index('expiresAt', expireAfterSeconds=0)
+            self.affiliate_redirects_collection.create_index([('redirectHost', 1), ('companySlug', 1)], unique=True)
+            self.host_health_collection.create_index('host', unique=True)
+            self.domain_contacts_collection.create_index('rootDomain', unique=True)
+            self.domain_contacts_collection.create_index('refreshAfter')
+            self.scraper_cycles_collection.create_index('finishedAt')
+            self.email_jobs_collection.create_index('uid', unique=True)
+            self.email_jobs_collection.create_index([('status', 1), ('leaseExpiresAt', 1)])
+            self.email_jobs_collection.create_index('expiresAt', expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning(f"Failed to ensure MongoDB indexes: {e}")
+        
+        # One record per domain, so concurrent upserts from several workers can't both insert
+        self._ensure_unique_root_domain(self.collection)
+        self._ensure_unique_root_domain(self.db['affiliates'])
+    
+    def _ensure_unique_root_domain(self, collection: Collection):
+        """Unique rootDomain index, unless existing duplicates have to be merged by hand first"""
+        try:
+            duplicates = list(collection.aggregate([
+                {'$group': {'_id': '$rootDomain', 'count': {'$sum': 1}}},
+                {'$match': {'count': {'$gt': 1}}},
+                {'$limit': 5}
+            ]))
+            if duplicates:
+                logger.warning(f"{collection.name} has several records for rootDomain "
+                               f"{', '.join(str(d['_id']) for d in duplicates)} - merge them to enable the unique index")
+                return
+            collection.create_index('rootDomain', unique=True)
+        except Exception as e:
+            logger.warning(f"Failed to ensure unique rootDomain index on {collection.name}: {e}")
     
     def close(self):
         """Close MongoDB connection"""
@@ -40,6 +95,10 @@ class SponsorDatabase:
     
     def create_sponsor(self, sponsor_data: Dict) -> str:
         """Create a new sponsor record or update existing one with newsletter info"""
+        return self.upsert_sponsor(sponsor_data)[0]
+    
+    def upsert_sponsor(self, sponsor_data: Dict) -> Tuple[str, bool]:
+        """create_sponsor, plus whether this call created the record or appended its newsletter"""
         try:
             root_domain = sponsor_data.get('rootDomain', '')
             newsletter_name = sponsor_data.get('newsletterSponsored') or sponsor_data.get('sourceNewsletter', '')
@@ -48,109 +107,130 @@ class SponsorDatabase:
                 logger.warning("No rootDomain provided, cannot create/update sponsor")
                 raise ValueError("rootDomain is required")
             
+            original_data = dict(sponsor_data)
+            
             # Check if sponsor with same rootDomain already exists
             existing_sponsor = self.collection.find_one({'rootDomain': root_domain})
             
             if existing_sponsor:
                 # Update existing sponsor: append newsletter to newslettersSponsored array
                 logger.info(f"Sponsor with domain {root_domain} exists, appending newsletter info")
-                
-                # Prepare newsletter entry
-                # Use tags from sponsor_data, which should be the contentTags for this newsletter
-                newsletter_entry = {
+                return self._append_sponsor_newsletter(existing_sponsor, sponsor_data, newsletter_name)
+            
+            # Create new sponsor with first newsletter entry
+            logger.info(f"Creating new sponsor with domain {root_domain}")
+            
+            # Add timestamps
+            sponsor_data['dateAdded'] = datetime.utcnow()
+            sponsor_data['lastAnalyzed'] = datetime.utcnow()
+            
+            # Set default values
+            sponsor_data.setdefault('analysisStatus', 'pending')
+            sponsor_data.setdefault('discoveryMethod', 'email_scraper')
+            sponsor_data.setdefault('confidence', 0.0)
+            sponsor_data.setdefault('status', 'pending')
+            sponsor_data.setdefault('contactMethod', 'email' if sponsor_data.get('sponsorEmail') else 'none')
+            
+            # Convert old structure to new structure
+            newsletters_sponsored = []
+            if newsletter_name:
+                newsletters_sponsored.append({
                     'newsletterName': newsletter_name,
                     'estimatedAudience': sponsor_data.get('subscriberCount') or sponsor_data.get('estimatedSubscribers', 0),
                     'contentTags': sponsor_data.get('tags', []) or sponsor_data.get('contentTags', []),
                     'dateSponsored': datetime.utcnow(),
                     'emailAddress': sponsor_data.get('emailAddress', '')
-                }
-                
-                # Check if this newsletter is already in the array
-                newsletters_sponsored = existing_sponsor.get('newslettersSponsored', [])
-                newsletter_exists = any(
-                    n.get('newsletterName') == newsletter_name 
-                    for n in newsletters_sponsored
-                )
-                
-                if not newsletter_exists:
-                    # Append new newsletter
-                    update_data = {
-                        '$push': {'newslettersSponsored': newsletter_entry},
-                        '$set': {
-                            'lastAnalyzed': datetime.utcnow()
-                        }
-                    }
-                    
-                    # Also update contact info if better
-                    if sponsor_data.get('sponsorEmail') and not existing_sponsor.get('sponsorEmail'):
-                        update_data['$set']['sponsorEmail'] = sponsor_data.get('sponsorEmail')
-                        update_data['$set']['contactMethod'] = 'email'
-                    
-                    if sponsor_data.get('businessContact') and not existing_sponsor.get('businessContact'):
-                        update_data['$set']['businessContact'] = sponsor_data.get('businessContact')
-                    
-                    # Merge tags
-                    existing_tags = set(existing_sponsor.get('tags', []))
-                    new_tags = set(sponsor_data.get('tags', []))
-                    merged_tags = list(existing_tags.union(new_tags))
-                    if merged_tags:
-                        update_data['$set']['tags'] = merged_tags[:10]  # Limit to 10 tags
-                    
-                    result = self.collection.update_one(
-                        {'_id': existing_sponsor['_id']},
-                        update_data
-                    )
-                    
-                    if result.modified_count > 0:
-                        logger.info(f"Updated sponsor {existing_sponsor['_id']} with new newsletter")
-                        return str(existing_sponsor['_id'])
-                    else:
-                        logger.warning(f"Failed to update sponsor {existing_sponsor['_id']}")
-                        return str(existing_sponsor['_id'])
-                else:
-                    logger.info(f"Newsletter {newsletter_name} already exists for sponsor {root_domain}")
-                    return str(existing_sponsor['_id'])
-            else:
-                # Create new sponsor with first newsletter entry
-                logger.info(f"Creating new sponsor with domain {root_domain}")
-                
-                # Add timestamps
-                sponsor_data['dateAdded'] = datetime.utcnow()
-                sponsor_data['lastAnalyzed'] = datetime.utcnow()
-                
-                # Set default values
-                sponsor_data.setdefault('analysisStatus', 'pending')
-                sponsor_data.setdefault('discoveryMethod', 'email_scraper')
-                sponsor_data.setdefault('confidence', 0.0)
-                sponsor_data.setdefault('status', 'pending')
-                sponsor_data.setdefault('contactMethod', 'email' if sponsor_data.get('sponsorEmail') else 'none')
-                
-                # Convert old structure to new structure
-                newsletters_sponsored = []
-                if newsletter_name:
-                    newsletters_sponsored.append({
-                        'newsletterName': newsletter_name,
-                        'estimatedAudience': sponsor_data.get('subscriberCount') or sponsor_data.get('estimatedSubscribers', 0),
-                        'contentTags': sponsor_data.get('tags', []) or sponsor_data.get('contentTags', []),
-                        'dateSponsored': datetime.utcnow(),
-                        'emailAddress': sponsor_data.get('emailAddress', '')
-                    })
-                
-                sponsor_data['newslettersSponsored'] = newsletters_sponsored
-                
-                # Remove old fields that are no longer used
-                sponsor_data.pop('newsletterSponsored', None)
-                sponsor_data.pop('subscriberCount', None)
-                sponsor_data.pop('sponsorApplication', None)  # Moving away from applications
-                
-                result = self.collection.insert_one(sponsor_data)
-                logger.info(f"Created sponsor record: {result.inserted_id}")
-                return str(result.inserted_id)
+                })
+            
+            sponsor_data['newslettersSponsored'] = newsletters_sponsored
+            
+            # Remove old fields that are no longer used
+            sponsor_data.pop('newsletterSponsored', None)
+            sponsor_data.pop('subscriberCount', None)
+            sponsor_data.pop('sponsorApplication', None)  # Moving away from applications
+            
+            # Upsert on rootDomain (unique-indexed): if another worker created the sponsor since
+            # the lookup, nothing is inserted and this newsletter is appended to theirs instead
+            try:
+                upserted_id = self.collection.update_one(
+                    {'rootDomain': root_domain}, {'$setOnInsert': sponsor_data}, upsert=True
+                ).upserted_id
+            except DuplicateKeyError:
+                upserted_id = None
+            if upserted_id is None:
+                logger.info(f"Sponsor {root_domain} was created concurrently, appending newsletter info")
+                existing_sponsor = self.collection.find_one({'rootDomain': root_domain})
+                if not existing_sponsor:
+                    raise RuntimeError(f"Sponsor {root_domain} disappeared after a concurrent insert")
+                return self._append_sponsor_newsletter(existing_sponsor, original_data, newsletter_name)
+            sponsor_data['_id'] = upserted_id
+            logger.info(f"Created sponsor record: {upserted_id}")
+            return str(upserted_id), True
             
         except Exception as e:
             logger.error(f"Failed to create/update sponsor: {e}")
             raise
     
+    def _append_sponsor_newsletter(self, existing_sponsor: Dict, sponsor_data: Dict,
+                                   newsletter_name: str) -> Tuple[str, bool]:
+        """Add the newsletter's entry to an existing sponsor; True if it wasn't listed yet"""
+        # Prepare newsletter entry
+        # Use tags from sponsor_data, which should be the contentTags for this newsletter
+        newsletter_entry = {
+            'newsletterName': newsletter_name,
+            'estimatedAudience': sponsor_data.get('subscriberCount') or sponsor_data.get('estimatedSubscribers', 0),
+            'contentTags': sponsor_data.get('tags', []) or sponsor_data.get('contentTags', []),
+            'dateSponsored': datetime.utcnow(),
+            'emailAddress': sponsor_data.get('emailAddress', '')
+        }
+        
+        # Check if this newsletter is already in the array
+        newsletters_sponsored = existing_sponsor.get('newslettersSponsored', [])
+        newsletter_exists = any(
+            n.get('newsletterName') == newsletter_name 
+            for n in newsletters_sponsored
+        )
+        
+        if newsletter_exists:
+            logger.info(f"Newsletter {newsletter_name} already exists for sponsor {existing_sponsor.get('rootDomain')}")
+            return str(existing_sponsor['_id']), False
+        
+        # Append new newsletter
+        update_data = {
+            '$push': {'newslettersSponsored': newsletter_entry},
+            '$set': {
+                'lastAnalyzed': datetime.utcnow()
+            }
+        }
+        
+        # Also update contact info if better
+        if sponsor_data.get('sponsorEmail') and not existing_sponsor.get('sponsorEmail'):
+            update_data['$set']['sponsorEmail'] = sponsor_data.get('sponsorEmail')
+            update_data['$set']['contactMethod'] = 'email'
+        
+        if sponsor_data.get('businessContact') and not existing_sponsor.get('businessContact'):
+            update_data['$set']['businessContact'] = sponsor_data.get('businessContact')
+        
+        # Merge tags
+        existing_tags = set(existing_sponsor.get('tags', []))
+        new_tags = set(sponsor_data.get('tags', []))
+        merged_tags = list(existing_tags.union(new_tags))
+        if merged_tags:
+            update_data['$set']['tags'] = merged_tags[:10]  # Limit to 10 tags
+        
+        # Only pushes if the newsletter still isn't listed, so a retried or concurrent
+        # write of the same result can't add it twice
+        result = self.collection.update_one(
+            {'_id': existing_sponsor['_id'], 'newslettersSponsored.newsletterName': {'$ne': newsletter_name}},
+            update_data
+        )
+        
+        if result.modified_count > 0:
+            logger.info(f"Updated sponsor {existing_sponsor['_id']} with new newsletter")
+            return str(existing_sponsor['_id']), True
+        logger.info(f"Newsletter {newsletter_name} was already added to sponsor {existing_sponsor['_id']}")
+        return str(existing_sponsor['_id']), False
+    
     def update_sponsor(self, sponsor_id: str, update_data: Dict) -> bool:
         """Update an existing sponsor record"""
         try:
@@ -219,6 +299,308 @@ class SponsorDatabase:
             logger.error(f"Failed to add denied domain {domain}: {e}")
             return False
     
+    def get_affiliate_redirect(self, redirect_host: str, company_slug: str) -> Optional[Dict]:
+        """Cached real-domain lookup for an affiliate redirect; resolvedDomain is None for known dead ends"""
+        try:
+            return self.affiliate_redirects_collection.find_one({
+                'redirectHost': redirect_host.lower(),
+                'companySlug': company_slug,
+                'expiresAt': {'$gt': datetime.utcnow()}
+            })
+        except Exception as e:
+            logger.error(f"Failed to get affiliate redirect {redirect_host}/{company_slug}: {e}")
+            return None
+    
+    def save_affiliate_redirect(self, redirect_host: str, company_slug: str, resolved_domain: Optional[str]) -> bool:
+        """Store a resolved (or unresolvable) affiliate redirect mapping"""
+        try:
+            days = AFFILIATE_REDIRECT_CACHE_DAYS if resolved_domain else AFFILIATE_REDIRECT_NEGATIVE_CACHE_DAYS
+            now = datetime.utcnow()
+            self.affiliate_redirects_collection.update_one(
+                {'redirectHost': redirect_host.lower(), 'companySlug': company_slug},
+                {'$set': {
+                    'resolvedDomain': resolved_domain,
+                    'checkedAt': now,
+                    'expiresAt': now + timedelta(days=days)
+                }},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save affiliate redirect {redirect_host}/{company_slug}: {e}")
+            return False
+    
+    def get_unhealthy_hosts(self) -> List[Dict]:
+        """Hosts with recent consecutive failures (loaded once at startup by HostHealth)"""
+        try:
+            return list(self.host_health_collection.find({'consecutiveFailures': {'$gt': 0}}))
+        except Exception as e:
+            logger.error(f"Failed to load host health: {e}")
+            return []
+    
+    def save_host_health(self, host: str, health: Dict) -> bool:
+        """Upsert failure/latency/last-success state for a sponsor website host"""
+        try:
+            health = dict(health)
+            health['updatedAt'] = datetime.utcnow()
+            self.host_health_collection.update_one({'host': host}, {'$set': health}, upsert=True)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save host health for {host}: {e}")
+            return False
+    
+    def get_domain_contacts(self, root_domain: str) -> Optional[Dict]:
+        """Stored contact discovery result for a root domain (best contact + every candidate found)"""
+        try:
+            return self.domain_contacts_collection.find_one({'rootDomain': root_domain.lower()})
+        except Exception as e:
+            logger.error(f"Failed to get domain contacts for {root_domain}: {e}")
+            return None
+    
+    def save_domain_contacts(self, root_domain: str, candidates: List[Dict], best: Optional[Dict],
+                             company_name: Optional[str] = None) -> bool:
+        """
+        Store a contact discovery run. Candidates are merged by email (newest sighting wins);
+        the entry is due for refresh after DOMAIN_CONTACT_REFRESH_DAYS (sooner if nothing was found).
+        """
+        try:
+            now = datetime.utcnow()
+            existing = self.get_domain_contacts(root_domain) or {}
+            merged = {c['email'].lower(): c for c in existing.get('candidates', []) if c.get('email')}
+            for candidate in candidates:
+                if candidate.get('email'):
+                    merged[candidate['email'].lower()] = candidate
+            
+            days = DOMAIN_CONTACT_REFRESH_DAYS if best else DOMAIN_CONTACT_NOT_FOUND_REFRESH_DAYS
+            update = {
+                'candidates': sorted(merged.values(), key=lambda c: c.get('confidence', 0), reverse=True),
+                'best': best,
+                'status': 'found' if best else 'not_found',
+                'lastDiscoveredAt': now,
+                'refreshAfter': now + timedelta(days=days)
+            }
+            if company_name:
+                update['companyName'] = company_name
+            self.domain_contacts_collection.update_one(
+                {'rootDomain': root_domain.lower()},
+                {'$set': update, '$setOnInsert': {'createdAt': now}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save domain contacts for {root_domain}: {e}")
+            return False
+    
+    def get_stale_domain_contacts(self, limit: int = 50) -> List[Dict]:
+        """Domain contact entries due for their scheduled refresh (oldest first)"""
+        try:
+            return list(self.domain_contacts_collection.find(
+                {'refreshAfter': {'$lte': datetime.utcnow()}}
+            ).sort('refreshAfter', 1).limit(limit))
+        except Exception as e:
+            logger.error(f"Failed to get stale domain contacts: {e}")
+            return []
+    
+    def save_cycle_timing(self, timing: Dict) -> bool:
+        """Record how long a scraping cycle's emails took (feeds the next cycle's cost estimate)"""
+        try:
+            timing = dict(timing)
+            timing['finishedAt'] = datetime.utcnow()
+            self.scraper_cycles_collection.insert_one(timing)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save cycle timing: {e}")
+            return False
+    
+    def get_recent_email_costs(self, limit: int = 10) -> List[float]:
+        """Observed seconds per email of the most recent cycles that processed any email"""
+        try:
+            cursor = self.scraper_cycles_collection.find(
+                {'secondsPerEmail': {'$gt': 0}}, {'secondsPerEmail': 1}
+            ).sort('finishedAt', -1).limit(limit)
+            return [doc['secondsPerEmail'] for doc in cursor]
+        except Exception as e:
+            logger.error(f"Failed to load cycle timings: {e}")
+            return []
+    
+    def enqueue_email_jobs(self, uids: List[str]) -> int:
+        """Add a queued job per email UID; UIDs that already have a job are left alone. Returns jobs added"""
+        if not uids:
+            return 0
+        try:
+            now = datetime.utcnow()
+            result = self.email_jobs_collection.bulk_write([
+                UpdateOne({'uid': uid},
+                          {'$setOnInsert': {'uid': uid, 'status': 'queued', 'attempts': 0, 'createdAt': now}},
+                          upsert=True)
+                for uid in uids
+            ], ordered=False)
+            return result.upserted_count
+        except Exception as e:
+            logger.error(f"Failed to enqueue email jobs: {e}")
+            return 0
+    
+    def claim_email_job(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        """
+        Atomically lease the oldest queued job, or one whose lease expired (its worker stopped
+        heartbeating). None when there is nothing to claim.
+        """
+        try:
+            now = datetime.utcnow()
+            return self.email_jobs_collection.find_one_and_update(
+                {
+                    '$or': [
+                        {'status': 'queued'},
+                        {'status': 'leased', 'leaseExpiresAt': {'$lt': now}}
+                    ],
+                    'attempts': {'$lt': EMAIL_JOB_MAX_ATTEMPTS}
+                },
+                {
+                    '$set': {
+                        'status': 'leased',
+                        'leaseOwner': worker_id,
+                        'leaseExpiresAt': now + timedelta(seconds=lease_seconds),
+                        'heartbeatAt': now,
+                        # Jobs abandoned on their last attempt are cleaned up too
+                        'expiresAt': now + timedelta(days=EMAIL_JOB_RETENTION_DAYS)
+                    },
+                    '$inc': {'attempts': 1}
+                },
+                sort=[('createdAt', 1)],
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"Failed to claim an email job: {e}")
+            return None
+    
+    def heartbeat_email_jobs(self, worker_id: str, uids: List[str], lease_seconds: float) -> int:
+        """Extend this worker's leases on the given jobs. Returns how many are still held"""
+        if not uids:
+            return 0
+        try:
+            now = datetime.utcnow()
+            result = self.email_jobs_collection.update_many(
+                {'uid': {'$in': uids}, 'status': 'leased', 'leaseOwner': worker_id},
+                {'$set': {'leaseExpiresAt': now + timedelta(seconds=lease_seconds), 'heartbeatAt': now}}
+            )
+            return result.matched_count
+        except Exception as e:
+            logger.error(f"Failed to extend email job leases: {e}")
+            return 0
+    
+    def finish_email_job(self, uid: str, worker_id: str) -> bool:
+        """Mark a leased job done. False if this worker no longer holds the lease"""
+        try:
+            now = datetime.utcnow()
+            result = self.email_jobs_collection.update_one(
+                {'uid': uid, 'status': 'leased', 'leaseOwner': worker_id},
+                {'$set': {'status': 'done', 'finishedAt': now,
+                          'expiresAt': now + timedelta(days=EMAIL_JOB_RETENTION_DAYS)},
+                 '$unset': {'leaseExpiresAt': ''}}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Failed to finish email job {uid}: {e}")
+            return False
+    
+    def release_email_job(self, uid: str, worker_id: str, error: Optional[str] = None) -> bool:
+        """
+        Give a leased job back (deferred at a deadline or failed) so any worker can retry it;
+        a job out of attempts is parked as failed instead
+        """
+        try:
+            job = self.email_jobs_collection.find_one({'uid': uid, 'status': 'leased', 'leaseOwner': worker_id},
+                                                      {'attempts': 1})
+            if not job:
+                return False
+            exhausted = job.get('attempts', 0) >= EMAIL_JOB_MAX_ATTEMPTS
+            update = {'$set': {'status': 'failed' if exhausted else 'queued'},
+                      '$unset': {'leaseOwner': '', 'leaseExpiresAt': ''}}
+            if error:
+                update['$set']['lastError'] = error
+            if exhausted:
+                update['$set']['expiresAt'] = datetime.utcnow() + timedelta(days=EMAIL_JOB_RETENTION_DAYS)
+            result = self.email_jobs_collection.update_one(
+                {'uid': uid, 'status': 'leased', 'leaseOwner': worker_id}, update
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Failed to release email job {uid}: {e}")
+            return False
+    
+    def acquire_run_lock(self, name: str, owner: str, ttl_seconds: float) -> Optional[Dict]:
+        """
+        Take the named lock if it is free or its holder's TTL ran out. Returns the lock document
+        (with this holder's generation number), or None if someone else holds it.
+        """
+        try:
+            now = datetime.utcnow()
+            return self.scraper_locks_collection.find_one_and_update(
+                {'_id': name, '$or': [{'owner': None}, {'expiresAt': {'$lt': now}}]},
+                {
+                    # This run covers everything that asked for a follow-up so far
+                    '$set': {'owner': owner, 'acquiredAt': now, 'expiresAt': now + timedelta(seconds=ttl_seconds),
+                             'followUpRequested': False},
+                    '$inc': {'generation': 1}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The lock document exists and is held: the upsert tried to insert a second one
+            return None
+        except Exception as e:
+            logger.error(f"Failed to acquire run lock {name}: {e}")
+            return None
+    
+    def refresh_run_lock(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Extend a held lock's TTL. False if the lock was lost"""
+        try:
+            result = self.scraper_locks_collection.update_one(
+                {'_id': name, 'owner': owner},
+                {'$set': {'expiresAt': datetime.utcnow() + timedelta(seconds=ttl_seconds)}}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Failed to refresh run lock {name}: {e}")
+            return False
+    
+    def release_run_lock(self, name: str, owner: str, generation: int, result: Dict) -> Optional[Dict]:
+        """
+        Free a held lock and publish the run's result for triggers that coalesced with it.
+        Returns the lock document as it was before the release (its followUpRequested tells
+        the holder whether a follow-up was asked for), or None if the lock wasn't held.
+        """
+        try:
+            return self.scraper_locks_collection.find_one_and_update(
+                {'_id': name, 'owner': owner},
+                {'$set': {'owner': None, 'expiresAt': None, 'lastGeneration': generation,
+                          'lastResult': result, 'lastFinishedAt': datetime.utcnow()}},
+                return_document=ReturnDocument.BEFORE
+            )
+        except Exception as e:
+            logger.error(f"Failed to release run lock {name}: {e}")
+            return None
+    
+    def request_follow_up_run(self, name: str) -> Optional[Dict]:
+        """Ask for one more run after the current holder's. Returns the lock document, or None if it isn't held"""
+        try:
+            return self.scraper_locks_collection.find_one_and_update(
+                {'_id': name, 'owner': {'$ne': None}},
+                {'$set': {'followUpRequested': True, 'followUpRequestedAt': datetime.utcnow()}},
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"Failed to request a follow-up run for {name}: {e}")
+            return None
+    
+    def get_run_lock(self, name: str) -> Optional[Dict]:
+        try:
+            return self.scraper_locks_collection.find_one({'_id': name})
+        except Exception as e:
+            logger.error(f"Failed to read run lock {name}: {e}")
+            return None
+    
     def get_sponsor_by_link(self, link: str) -> Optional[Dict]:
         """Get sponsor by sponsor link"""
         try:
@@ -227,14 +609,55 @@ class SponsorDatabase:
             logger.error(f"Failed to get sponsor by link {link}: {e}")
             return None
     
-    def get_pending_sponsors(self) -> List[Dict]:
-        """Get all sponsors with pending analysis status"""
+    def get_pending_sponsors_page(self, analyzed_before: datetime, limit: int = 50) -> List[Dict]:
+        """
+        Next page of sponsors with pending analysis status or deferred Gemini enrichment, oldest
+        lastAnalyzed first. Only sponsors last analyzed before analyzed_before are returned, so a run
+        that bumps lastAnalyzed on what it processed moves through the backlog page by page.
+        """
         try:
-            return list(self.collection.find({'analysisStatus': 'pending'}))
+            cursor = self.collection.find({
+                '$and': [
+                    {'$or': [{'analysisStatus': 'pending'}, {'pendingGeminiEnrichment': True}]},
+                    {'$or': [{'lastAnalyzed': {'$lt': analyzed_before}}, {'lastAnalyzed': None}]}
+                ]
+            }).sort([('lastAnalyzed', 1), ('_id', 1)]).limit(limit)
+            return list(cursor)
         except Exception as e:
             logger.error(f"Failed to get pending sponsors: {e}")
             return []
     
+    def bulk_update_sponsors(self, updates: List[Tuple[object, Dict]]) -> int:
+        """Apply ($set) field updates to several sponsors in one round trip. Returns sponsors modified"""
+        if not updates:
+            return 0
+        try:
+            result = self.collection.bulk_write(
+                [UpdateOne({'_id': sponsor_id}, {'$set': fields}) for sponsor_id, fields in updates],
+                ordered=False
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Failed to bulk update {len(updates)} sponsors: {e}")
+            raise
+    
+    def get_pre_classifier_training_data(self) -> Dict[str, List[Dict]]:
+        """
+        Labelled records for the pre-classifier: approved vs rejected sponsors that carry the
+        features screening computed for them (denied domains alone have no email context)
+        """
+        try:
+            projection = {'sponsorName': 1, 'rootDomain': 1, 'preClassifierFeatures': 1}
+            screened = {'preClassifierFeatures.0': {'$exists': True}}
+            accepted = list(self.collection.find(dict(screened, status='approved'), projection))
+            rejected = list(self.collection.find(dict(screened, analysisStatus='rejected'), projection))
+            
+            logger.info(f"Pre-classifier training data: {len(accepted)} accepted, {len(rejected)} rejected")
+            return {'accepted': accepted, 'rejected': rejected}
+        except Exception as e:
+            logger.error(f"Failed to load pre-classifier training data: {e}")
+            return {'accepted': [], 'rejected': []}
+    
     def get_manual_review_sponsors(self) -> List[Dict]:
         """Get all sponsors requiring manual review"""
         try:
@@ -275,6 +698,10 @@ class SponsorDatabase:
     
     def create_affiliate(self, affiliate_data: Dict) -> str:
         """Create a new affiliate record or update existing one with newsletter info"""
+        return self.upsert_affiliate(affiliate_data)[0]
+    
+    def upsert_affiliate(self, affiliate_data: Dict) -> Tuple[str, bool]:
+        """create_affiliate, plus whether this call created the record or appended its newsletter"""
         try:
             root_domain = affiliate_data.get('rootDomain', '')
             
@@ -282,6 +709,8 @@ class SponsorDatabase:
                 logger.warning("No rootDomain provided, cannot create/update affiliate")
                 raise ValueError("rootDomain is required")
             
+            original_data = dict(affiliate_data)
+            
             # Use affiliates collection
             affiliates_collection = self.db['affiliates']
             
@@ -291,70 +720,85 @@ class SponsorDatabase:
             if existing_affiliate:
                 # Update existing affiliate: append newsletter to affiliatedNewsletters array
                 logger.info(f"Affiliate with domain {root_domain} exists, appending newsletter info")
-                
-                # Get the first newsletter entry from the data
-                new_newsletter = affiliate_data.get('affiliatedNewsletters', [{}])[0] if affiliate_data.get('affiliatedNewsletters') else {}
-                
-                # Check if this newsletter is already in the array
-                affiliated_newsletters = existing_affiliate.get('affiliatedNewsletters', [])
-                newsletter_exists = any(
-                    n.get('newsletterName') == new_newsletter.get('newsletterName')
-                    for n in affiliated_newsletters
-                )
-                
-                if not newsletter_exists and new_newsletter.get('newsletterName'):
-                    # Append new newsletter
-                    update_data = {
-                        '$push': {'affiliatedNewsletters': new_newsletter},
-                        '$set': {
-                            'dateAdded': existing_affiliate.get('dateAdded', datetime.utcnow()),
-                            'lastUpdated': datetime.utcnow()
-                        }
-                    }
-                    
-                    # Merge tags
-                    existing_tags = set(existing_affiliate.get('tags', []))
-                    new_tags = set(affiliate_data.get('tags', []))
-                    merged_tags = list(existing_tags.union(new_tags))
-                    if merged_tags:
-                        update_data['$set']['tags'] = merged_tags[:10]  # Limit to 10 tags
-                    
-                    result = affiliates_collection.update_one(
-                        {'_id': existing_affiliate['_id']},
-                        update_data
-                    )
-                    
-                    if result.modified_count > 0:
-                        logger.info(f"Updated affiliate {existing_affiliate['_id']} with new newsletter")
-                        return str(existing_affiliate['_id'])
-                    else:
-                        logger.warning(f"Failed to update affiliate {existing_affiliate['_id']}")
-                        return str(existing_affiliate['_id'])
-                else:
-                    logger.info(f"Newsletter already exists for affiliate {root_domain}")
-                    return str(existing_affiliate['_id'])
-            else:
-                # Create new affiliate
-                logger.info(f"Creating new affiliate with domain {root_domain}")
-                
-                # Add timestamps
-                affiliate_data['dateAdded'] = datetime.utcnow()
-                affiliate_data['lastUpdated'] = datetime.utcnow()
-                
-                # Set default values
-                affiliate_data.setdefault('status', 'pending')
-                affiliate_data.setdefault('tags', [])
-                affiliate_data.setdefault('affiliatedNewsletters', [])
-                affiliate_data.setdefault('interestedUsers', [])
-                
-                result = affiliates_collection.insert_one(affiliate_data)
-                logger.info(f"Created affiliate record: {result.inserted_id}")
-                return str(result.inserted_id)
+                return self._append_affiliate_newsletter(existing_affiliate, affiliate_data)
+            
+            # Create new affiliate
+            logger.info(f"Creating new affiliate with domain {root_domain}")
+            
+            # Add timestamps
+            affiliate_data['dateAdded'] = datetime.utcnow()
+            affiliate_data['lastUpdated'] = datetime.utcnow()
+            
+            # Set default values
+            affiliate_data.setdefault('status', 'pending')
+            affiliate_data.setdefault('tags', [])
+            affiliate_data.setdefault('affiliatedNewsletters', [])
+            affiliate_data.setdefault('interestedUsers', [])
+            
+            try:
+                upserted_id = affiliates_collection.update_one(
+                    {'rootDomain': root_domain}, {'$setOnInsert': affiliate_data}, upsert=True
+                ).upserted_id
+            except DuplicateKeyError:
+                upserted_id = None
+            if upserted_id is None:
+                logger.info(f"Affiliate {root_domain} was created concurrently, appending newsletter info")
+                existing_affiliate = affiliates_collection.find_one({'rootDomain': root_domain})
+                if not existing_affiliate:
+                    raise RuntimeError(f"Affiliate {root_domain} disappeared after a concurrent insert")
+                return self._append_affiliate_newsletter(existing_affiliate, original_data)
+            affiliate_data['_id'] = upserted_id
+            logger.info(f"Created affiliate record: {upserted_id}")
+            return str(upserted_id), True
             
         except Exception as e:
             logger.error(f"Failed to create/update affiliate: {e}")
             raise
     
+    def _append_affiliate_newsletter(self, existing_affiliate: Dict, affiliate_data: Dict) -> Tuple[str, bool]:
+        """Add the affiliate data's newsletter entry to an existing affiliate; True if it wasn't listed yet"""
+        # Get the first newsletter entry from the data
+        new_newsletter = affiliate_data.get('affiliatedNewsletters', [{}])[0] if affiliate_data.get('affiliatedNewsletters') else {}
+        
+        # Check if this newsletter is already in the array
+        affiliated_newsletters = existing_affiliate.get('affiliatedNewsletters', [])
+        newsletter_exists = any(
+            n.get('newsletterName') == new_newsletter.get('newsletterName')
+            for n in affiliated_newsletters
+        )
+        
+        if newsletter_exists or not new_newsletter.get('newsletterName'):
+            logger.info(f"Newsletter already exists for affiliate {existing_affiliate.get('rootDomain')}")
+            return str(existing_affiliate['_id']), False
+        
+        # Append new newsletter
+        update_data = {
+            '$push': {'affiliatedNewsletters': new_newsletter},
+            '$set': {
+                'dateAdded': existing_affiliate.get('dateAdded', datetime.utcnow()),
+                'lastUpdated': datetime.utcnow()
+            }
+        }
+        
+        # Merge tags
+        existing_tags = set(existing_affiliate.get('tags', []))
+        new_tags = set(affiliate_data.get('tags', []))
+        merged_tags = list(existing_tags.union(new_tags))
+        if merged_tags:
+            update_data['$set']['tags'] = merged_tags[:10]  # Limit to 10 tags
+        
+        result = self.db['affiliates'].update_one(
+            {'_id': existing_affiliate['_id'],
+             'affiliatedNewsletters.newsletterName': {'$ne': new_newsletter.get('newsletterName')}},
+            update_data
+        )
+        
+        if result.modified_count > 0:
+            logger.info(f"Updated affiliate {existing_affiliate['_id']} with new newsletter")
+            return str(existing_affiliate['_id']), True
+        logger.info(f"Newsletter was already added to affiliate {existing_affiliate['_id']}")
+        return str(existing_affiliate['_id']), False
+    
     def get_max_subscriber_count_for_newsletter(self, newsletter_name: str) -> int:
         """Get the maximum estimatedSubscribers value for a newsletter from existing records"""
         try:
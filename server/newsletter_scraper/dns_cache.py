@@ -0,0 +1,156 @@
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+from config import DNS_CACHE_TTL_SECONDS, DNS_NEGATIVE_TTL_SECONDS, DNS_PRE_RESOLVE_WORKERS, DNS_CACHE_MAX_HOSTS
+
+logger = logging.getLogger(__name__)
+
+# Definite "this name doesn't exist" answers; anything else (EAI_AGAIN, EAI_FAIL, ...) may be a resolver hiccup
+NEGATIVE_CACHE_ERRNOS = {errno for errno in (getattr(socket, 'EAI_NONAME', None), getattr(socket, 'EAI_NODATA', None))
+                         if errno is not None}
+
+
+class DNSCache:
+    """
+    getaddrinfo cache for sponsor hosts, with positive and negative TTLs.
+
+    install() routes socket.getaddrinfo through the cache, but only hosts the
+    website fetcher has asked about (is_resolvable / pre_resolve) are cached;
+    every other lookup in the process (MongoDB, IMAP, Gemini) goes straight to
+    the resolver. Names that definitely don't exist (NXDOMAIN is the slow case for
+    guessed affiliate domains) are remembered for DNS_NEGATIVE_TTL_SECONDS, so the
+    host is skipped without another lookup or TCP attempt; temporary resolver
+    failures are not cached. At most max_hosts hosts are kept, oldest dropped first.
+    """
+
+    def __init__(self, ttl: float = DNS_CACHE_TTL_SECONDS, negative_ttl: float = DNS_NEGATIVE_TTL_SECONDS,
+                 workers: int = DNS_PRE_RESOLVE_WORKERS, max_hosts: int = DNS_CACHE_MAX_HOSTS):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.workers = workers
+        self.max_hosts = max_hosts
+        self._original_getaddrinfo = socket.getaddrinfo
+        self._hosts: 'OrderedDict[str, float]' = OrderedDict()  # sponsor hosts to cache -> last asked about
+        self._answers: Dict[str, Dict[tuple, tuple]] = {}  # host -> lookup args -> (expires_at, addrinfo list)
+        self._failures: Dict[str, tuple] = {}  # host -> (expires_at, gaierror)
+        self._lock = threading.Lock()
+        self._installed = False
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'hits': 0, 'misses': 0, 'negative_hits': 0, 'pre_resolved': 0, 'unresolvable': 0}
+
+    def install(self):
+        """Route socket.getaddrinfo through this cache (idempotent)"""
+        with self._lock:
+            if not self._installed:
+                socket.getaddrinfo = self.getaddrinfo
+                self._installed = True
+
+    def uninstall(self):
+        with self._lock:
+            if self._installed:
+                socket.getaddrinfo = self._original_getaddrinfo
+                self._installed = False
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        host_key = host.lower() if isinstance(host, str) else host
+        key = (port, family, type, proto, flags)
+        now = time.time()
+        with self._lock:
+            tracked = host_key in self._hosts
+        if not tracked:
+            return self._original_getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            failure = self._failures.get(host_key)
+            if failure and failure[0] > now:
+                self.stats['negative_hits'] += 1
+                raise failure[1]
+            answer = self._answers.get(host_key, {}).get(key)
+            if answer and answer[0] > now:
+                self.stats['hits'] += 1
+                return answer[1]
+            self.stats['misses'] += 1
+
+        try:
+            result = self._original_getaddrinfo(host, port, family, type, proto, flags)
+        except socket.gaierror as e:
+            if e.errno in NEGATIVE_CACHE_ERRNOS:
+                with self._lock:
+                    if host_key in self._hosts:
+                        self._failures[host_key] = (time.time() + self.negative_ttl, e)
+            raise
+        with self._lock:
+            if host_key in self._hosts:
+                self._answers.setdefault(host_key, {})[key] = (time.time() + self.ttl, result)
+        return result
+
+    def _track(self, host: str):
+        """Cache lookups for host from now on; drops expired entries and the oldest hosts past max_hosts"""
+        now = time.time()
+        with self._lock:
+            self._hosts[host] = now
+            self._hosts.move_to_end(host)
+            # Hosts not asked about for longer than either TTL have nothing left worth keeping
+            horizon = now - max(self.ttl, self.negative_ttl)
+            while self._hosts:
+                oldest, seen = next(iter(self._hosts.items()))
+                if len(self._hosts) <= self.max_hosts and seen >= horizon:
+                    break
+                self._forget(oldest)
+
+    def _forget(self, host: str):
+        del self._hosts[host]
+        self._failures.pop(host, None)
+        self._answers.pop(host, None)
+
+    def is_resolvable(self, host: str) -> bool:
+        """
+        False only if host definitely doesn't exist (answered from the cache when possible).
+        A temporary resolver failure returns True and is left to the connection attempt.
+        """
+        if not host:
+            return False
+        try:
+            from urllib3.util.connection import allowed_gai_family
+            self._track(host.lower())
+            # Same arguments urllib3 uses, so the later connect is a cache hit
+            self.getaddrinfo(host, 443, allowed_gai_family(), socket.SOCK_STREAM)
+            return True
+        except socket.gaierror as e:
+            return e.errno not in NEGATIVE_CACHE_ERRNOS
+        except (UnicodeError, OSError):
+            return False
+
+    def pre_resolve(self, hosts: Iterable[str]) -> Dict[str, bool]:
+        """Resolve hosts in parallel; returns host -> resolvable"""
+        unique = sorted({host.lower() for host in hosts if host})
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(unique)), thread_name_prefix='dns') as executor:
+            results = dict(zip(unique, executor.map(self.is_resolvable, unique)))
+        unresolvable = [host for host, ok in results.items() if not ok]
+        with self._lock:
+            self.stats['pre_resolved'] += len(unique)
+            self.stats['unresolvable'] += len(unresolvable)
+        if unresolvable:
+            logger.info(f"🌐 {len(unresolvable)} candidate host(s) don't resolve and will be skipped: {unresolvable[:5]}")
+        return results
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = self._empty_stats()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+# Shared by every fetcher in the process
+dns_cache = DNSCache()
@@ -0,0 +1,116 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Dict, Iterable, Optional
+
+from config import EMAIL_JOB_LEASE_SECONDS, EMAIL_JOB_HEARTBEAT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    # Unique per lease holder, even for several scrapers in one process
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class EmailJobLeases:
+    """
+    One worker's view of the shared per-email job queue (the emailjobs collection).
+
+    Any worker can enqueue the unread emails it sees; enqueueing is idempotent per UID.
+    Workers then claim jobs one at a time with an atomic findOneAndUpdate lease, keep
+    the leases alive with a heartbeat while they work, and either finish a job or
+    release it for another worker to retry. A worker that dies stops heartbeating, so
+    its jobs become claimable again once EMAIL_JOB_LEASE_SECONDS have passed.
+    """
+
+    def __init__(self, db, worker_id: Optional[str] = None, lease_seconds: float = EMAIL_JOB_LEASE_SECONDS,
+                 heartbeat_seconds: float = EMAIL_JOB_HEARTBEAT_SECONDS):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stop = None
+        self.stats = {'enqueued': 0, 'claimed': 0, 'finished': 0, 'released': 0, 'leases_lost': 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def enqueue(self, uids: Iterable[str]) -> int:
+        added = self.db.enqueue_email_jobs(list(uids))
+        self._count('enqueued', added)
+        return added
+
+    def claim(self) -> Optional[str]:
+        """UID of a newly leased job, or None when no job is available"""
+        job = self.db.claim_email_job(self.worker_id, self.lease_seconds)
+        if not job:
+            return None
+        if job.get('attempts', 1) > 1:
+            logger.info(f"Retrying email job {job['uid']} (attempt {job['attempts']})")
+        with self._lock:
+            self._held.add(job['uid'])
+            self.stats['claimed'] += 1
+        return job['uid']
+
+    def finish(self, uid: str) -> bool:
+        """The email's results are committed; False if the lease had already been lost"""
+        with self._lock:
+            if uid not in self._held:
+                return False
+            self._held.discard(uid)
+        if self.db.finish_email_job(uid, self.worker_id):
+            self._count('finished')
+            return True
+        logger.warning(f"Lease on email job {uid} was lost before it finished (another worker may redo it)")
+        self._count('leases_lost')
+        return False
+
+    def release(self, uid: str, error: Optional[str] = None) -> bool:
+        """Hand a held job back to the queue for any worker to retry"""
+        with self._lock:
+            if uid not in self._held:
+                return False
+            self._held.discard(uid)
+        if self.db.release_email_job(uid, self.worker_id, error):
+            self._count('released')
+            return True
+        return False
+
+    def release_unfinished(self, error: Optional[str] = None) -> int:
+        """Hand every job still held back to the queue (deferred or failed emails). Returns jobs released"""
+        with self._lock:
+            held = list(self._held)
+        released = sum(1 for uid in held if self.release(uid, error))
+        if released:
+            logger.info(f"Released {released} unfinished email job(s) for retry")
+        return released
+
+    def start_heartbeat(self):
+        """Extend the held leases every heartbeat_seconds until stop_heartbeat"""
+        self._stop = threading.Event()
+        stop = self._stop
+
+        def beat():
+            while not stop.wait(self.heartbeat_seconds):
+                with self._lock:
+                    held = list(self._held)
+                if held:
+                    kept = self.db.heartbeat_email_jobs(self.worker_id, held, self.lease_seconds)
+                    if kept < len(held):
+                        logger.warning(f"{len(held) - kept} email job lease(s) lost to other workers")
+
+        threading.Thread(target=beat, name='email-job-heartbeat', daemon=True).start()
+
+    def stop_heartbeat(self):
+        if self._stop:
+            self._stop.set()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, worker_id=self.worker_id, held=len(self._held))
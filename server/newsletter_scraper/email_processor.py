@@ -1,20 +1,53 @@
 import imaplib
 import email
 import logging
+import multiprocessing
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 from config import (
     EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, EMAIL_FOLDER,
-    SPONSOR_MARKERS, MAX_EMAILS_PER_RUN, MIN_SPONSOR_INDICATORS, MIN_SPONSOR_SECTION_MARKERS
+    SPONSOR_MARKERS, MAX_EMAILS_PER_RUN, MIN_SPONSOR_INDICATORS, MIN_SPONSOR_SECTION_MARKERS,
+    EMAIL_PARSE_PROCESSES
 )
 
 logger = logging.getLogger(__name__)
 
+# Parser used inside process-pool workers (no IMAP connection)
+_worker_parser = None
+
+
+def _init_parser_worker():
+    global _worker_parser
+    _worker_parser = EmailProcessor(connect=False)
+
+
+def parse_raw_email(email_id: str, raw_email: bytes, parser: 'EmailProcessor' = None) -> Dict:
+    """
+    Parse RFC822 bytes into a compact, picklable email record: headers, body text and
+    the sponsor sections (text, links, evidence, confidence, status) already extracted.
+    Runs in a parser worker process, or in-process when parser is given.
+    """
+    parser = parser or _worker_parser
+    email_data = parser._build_email_data(email_id, raw_email)
+    sections = []
+    if parser.has_sponsor_indicators(email_data):
+        sections = parser.process_sponsor_sections_with_confidence(email_data)
+    email_data.pop('raw_message', None)
+    email_data['sponsor_sections'] = sections
+    return email_data
+
 class EmailProcessor:
-    def __init__(self):
+    def __init__(self, connect: bool = True):
         self.mail = None
-        self.connect()
+        # imaplib connections aren't thread-safe; pipeline stages share this one
+        self._imap_lock = threading.Lock()
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+        if connect:
+            self.connect()
     
     def connect(self):
         """Connect to email server"""
@@ -27,28 +60,91 @@ class EmailProcessor:
             logger.error(f"Failed to connect to email server: {e}")
             raise
     
+    def ensure_connected(self):
+        """Reconnect if the server dropped the connection (long-lived workers sit idle between runs)"""
+        try:
+            if self.mail:
+                with self._imap_lock:
+                    self.mail.noop()
+                return
+        except Exception as e:
+            logger.info(f"IMAP connection lost ({e}) - reconnecting")
+        self.connect()
+    
     def disconnect(self):
         """Disconnect from email server"""
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
         if self.mail:
             self.mail.close()
             self.mail.logout()
             logger.info("Disconnected from email server")
     
-    def get_recent_emails(self, limit: int = MAX_EMAILS_PER_RUN) -> List[Dict]:
-        """Get recent emails from inbox"""
+    def get_recent_email_ids(self, limit: int = MAX_EMAILS_PER_RUN) -> List[bytes]:
+        """
+        UIDs of the most recent unread emails (fetch each with fetch_email). UIDs rather than
+        sequence numbers, so the same email has the same ID on every connection and worker.
+        """
         try:
             if not self.mail:
                 logger.error("Email connection not established")
                 return []
                 
             # Search for unread emails
-            status, messages = self.mail.search(None, 'UNSEEN')
+            with self._imap_lock:
+                status, messages = self.mail.uid('search', None, 'UNSEEN')
             if status != 'OK':
                 logger.error("Failed to search emails")
                 return []
             
             email_ids = messages[0].split()
-            recent_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
+            return email_ids[-limit:] if len(email_ids) > limit else email_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to search recent emails: {e}")
+            return []
+    
+    def fetch_email(self, email_id: bytes) -> Optional[Dict]:
+        """Fetch and parse one email by ID (None if it couldn't be fetched)"""
+        return self._fetch_email(email_id)
+    
+    def fetch_raw_email(self, email_id: bytes) -> Optional[bytes]:
+        """Download one email's RFC822 bytes without parsing them"""
+        try:
+            with self._imap_lock:
+                status, msg_data = self.mail.uid('fetch', email_id, '(RFC822)')
+            if status != 'OK':
+                return None
+            return msg_data[0][1]
+        except Exception as e:
+            logger.warning(f"Failed to fetch email {email_id}: {e}")
+            return None
+    
+    def parse_email(self, email_id: bytes, raw_email: bytes) -> Dict:
+        """
+        Parse downloaded RFC822 bytes into a compact email record with its sponsor sections
+        extracted. With EMAIL_PARSE_PROCESSES > 0 the CPU-bound work (MIME walk, HTML to text,
+        section splitting, confidence) runs in a process pool, so concurrent callers use every core.
+        """
+        if EMAIL_PARSE_PROCESSES > 0:
+            return self._get_parse_pool().submit(parse_raw_email, email_id.decode(), raw_email).result()
+        return parse_raw_email(email_id.decode(), raw_email, parser=self)
+    
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                # Created lazily from a pipeline thread while IMAP/heartbeat/ticker threads run: forking
+                # would copy their held locks (logging's included) into the children, so spawn instead
+                self._parse_pool = ProcessPoolExecutor(max_workers=EMAIL_PARSE_PROCESSES,
+                                                       mp_context=multiprocessing.get_context('spawn'),
+                                                       initializer=_init_parser_worker)
+            return self._parse_pool
+    
+    def get_recent_emails(self, limit: int = MAX_EMAILS_PER_RUN) -> List[Dict]:
+        """Get recent emails from inbox"""
+        try:
+            recent_ids = self.get_recent_email_ids(limit)
             
             emails = []
             for email_id in recent_ids:
@@ -69,35 +165,35 @@ class EmailProcessor:
     
     def _fetch_email(self, email_id: bytes) -> Optional[Dict]:
         """Fetch individual email data"""
+        raw_email = self.fetch_raw_email(email_id)
+        if raw_email is None:
+            return None
         try:
-            status, msg_data = self.mail.fetch(email_id, '(RFC822)')
-            if status != 'OK':
-                return None
-            
-            raw_email = msg_data[0][1]
-            email_message = email.message_from_bytes(raw_email)
-            
-            # Extract email components
-            subject = self._decode_header(email_message.get('Subject', ''))
-            sender = self._decode_header(email_message.get('From', ''))
-            date = email_message.get('Date', '')
-            
-            # Get email body
-            body = self._extract_body(email_message)
-            
-            return {
-                'id': email_id.decode(),
-                'subject': subject,
-                'sender': sender,
-                'date': date,
-                'body': body,
-                'raw_message': email_message
-            }
-            
+            return self._build_email_data(email_id.decode(), raw_email)
         except Exception as e:
-            logger.warning(f"Failed to fetch email {email_id}: {e}")
+            logger.warning(f"Failed to parse email {email_id}: {e}")
             return None
     
+    def _build_email_data(self, email_id: str, raw_email: bytes) -> Dict:
+        email_message = email.message_from_bytes(raw_email)
+        
+        # Extract email components
+        subject = self._decode_header(email_message.get('Subject', ''))
+        sender = self._decode_header(email_message.get('From', ''))
+        date = email_message.get('Date', '')
+        
+        # Get email body
+        body = self._extract_body(email_message)
+        
+        return {
+            'id': email_id,
+            'subject': subject,
+            'sender': sender,
+            'date': date,
+            'body': body,
+            'raw_message': email_message
+        }
+    
     def _decode_header(self, header: str) -> str:
         """Decode email header"""
         try:
@@ -348,7 +444,8 @@ class EmailProcessor:
     def mark_email_as_read(self, email_id: str) -> bool:
         """Mark email as read"""
         try:
-            self.mail.store(email_id, '+FLAGS', '\\Seen')
+            with self._imap_lock:
+                self.mail.uid('store', email_id, '+FLAGS', '\\Seen')
             logger.debug(f"Marked email {email_id} as read")
             return True
         except Exception as e:
@@ -408,6 +505,10 @@ class EmailProcessor:
     
     def process_sponsor_sections_with_confidence(self, email_data: Dict) -> List[Dict]:
         """Process sponsor sections with confidence scoring and status assignment"""
+        if 'sponsor_sections' in email_data:
+            # Already extracted by parse_email
+            return email_data['sponsor_sections']
+        
         sponsor_sections = self.extract_sponsor_sections(email_data)
         
         if not sponsor_sections:
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from config import (
+    TAGS, FAKE_LLM_LATENCY_MS, FAKE_LLM_LATENCY_JITTER_MS,
+    FAKE_LLM_ERROR_RATE, FAKE_LLM_SEED
+)
+from llm_client import LLMBackend
+
+logger = logging.getLogger(__name__)
+
+
+class FakeUsageMetadata:
+    """Mirrors the token counters on a Gemini response"""
+
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeResponse:
+    """Minimal stand-in for a Gemini GenerateContentResponse"""
+
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        # Rough token estimate (~4 characters per token)
+        self.usage_metadata = FakeUsageMetadata(max(1, len(prompt) // 4), max(1, len(text) // 4))
+
+
+class FakeLLMError(RuntimeError):
+    """Injected backend failure (message mimics the real Gemini error text)"""
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Offline, deterministic stand-in for Gemini.
+
+    Recognises the contact, audience, tag and sponsor-analysis prompts built by
+    SponsorAnalyzer and answers with schema-valid output. Latency is drawn from a
+    normal distribution (mean/jitter in ms) and failures are injected at error_rate,
+    so throughput and concurrency limits can be measured without network access.
+    """
+
+    name = 'fake'
+
+    # Injected errors are weighted towards the failure modes seen in production
+    ERROR_KINDS = [
+        ('429 Resource has been exhausted (e.g. check quota).', 0.5),
+        ('503 The service is currently unavailable.', 0.2),
+        ('Deadline Exceeded', 0.2),
+        ('invalid_json', 0.1),
+    ]
+
+    def __init__(self, latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_config(cls) -> 'FakeLLMBackend':
+        return cls(
+            latency_ms=FAKE_LLM_LATENCY_MS,
+            latency_jitter_ms=FAKE_LLM_LATENCY_JITTER_MS,
+            error_rate=FAKE_LLM_ERROR_RATE,
+            seed=int(FAKE_LLM_SEED) if FAKE_LLM_SEED else None
+        )
+
+    def generate_content(self, prompt, **kwargs):
+        with self._rng_lock:
+            self.calls += 1
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.latency_jitter_ms)) / 1000.0
+            fail = self._rng.random() < self.error_rate
+            error_kind = self._pick_error() if fail else None
+
+        if delay:
+            time.sleep(delay)
+
+        if error_kind and error_kind != 'invalid_json':
+            raise FakeLLMError(error_kind)
+
+        prompt_text = str(prompt)
+        if error_kind == 'invalid_json':
+            return FakeResponse('Sorry, I cannot help with that {', prompt_text)
+        return FakeResponse(self._answer(prompt_text), prompt_text)
+
+    def _pick_error(self) -> str:
+        roll = self._rng.random()
+        cumulative = 0.0
+        for kind, weight in self.ERROR_KINDS:
+            cumulative += weight
+            if roll <= cumulative:
+                return kind
+        return self.ERROR_KINDS[-1][0]
+
+    def _answer(self, prompt: str) -> str:
+        """Route the prompt to a canned, schema-valid answer"""
+        if 'best contact person' in prompt:
+            return json.dumps(self._contact_answer(prompt))
+        if 'estimate the subscriber' in prompt:
+            return json.dumps(self._audience_answer(prompt))
+        if 'Assign 1-3 tags' in prompt:
+            return ', '.join(self._pick_tags(prompt))
+        if 'Analyze this potential newsletter sponsor' in prompt:
+            return json.dumps(self._analysis_answer(prompt))
+        return 'ok'
+
+    @staticmethod
+    def _field(prompt: str, label: str) -> str:
+        match = re.search(rf'^{label}:\s*(.+)$', prompt, re.MULTILINE)
+        return match.group(1).strip() if match else ''
+
+    @staticmethod
+    def _bucket(text: str, buckets: int) -> int:
+        """Stable hash so the same input always gets the same answer"""
+        return int(hashlib.md5(text.encode('utf-8')).hexdigest(), 16) % buckets
+
+    def _contact_answer(self, prompt: str) -> Dict:
+        domain = self._field(prompt, 'Website').replace('https://', '').replace('http://', '').strip('/')
+        bucket = self._bucket(domain, 4)
+        if not domain or bucket == 0:
+            return {
+                'contact_type': 'not_found', 'name': None, 'title': None, 'email': None,
+                'confidence': 0.0, 'source': 'fake', 'reasoning': 'Fake backend: no contact'
+            }
+        if bucket == 1:
+            return {
+                'contact_type': 'named_person', 'name': 'Alex Morgan', 'title': 'Head of Partnerships',
+                'email': f'alex.morgan@{domain}', 'confidence': 0.9, 'source': 'fake',
+                'reasoning': 'Fake backend: named contact'
+            }
+        if bucket == 2:
+            return {
+                'contact_type': 'business_email', 'name': None, 'title': None,
+                'email': f'partnerships@{domain}', 'confidence': 0.6, 'source': 'fake',
+                'reasoning': 'Fake backend: business email'
+            }
+        return {
+            'contact_type': 'generic_email', 'name': None, 'title': None,
+            'email': f'hello@{domain}', 'confidence': 0.4, 'source': 'fake',
+            'reasoning': 'Fake backend: generic email'
+        }
+
+    def _audience_answer(self, prompt: str) -> Dict:
+        newsletter = self._field(prompt, 'Newsletter Name')
+        count = [5000, 12000, 45000, 150000][self._bucket(newsletter, 4)]
+        return {'count': count, 'confidence': 0.85, 'reasoning': 'Fake backend estimate'}
+
+    def _pick_tags(self, prompt: str):
+        company = self._field(prompt, 'Company')
+        candidates = [tag for tag in TAGS if tag not in ('Affiliate', 'Other')]
+        first = self._bucket(company, len(candidates))
+        tags = [candidates[first], candidates[(first + 7) % len(candidates)]]
+        if 'affiliate' in prompt.lower() and 'Affiliate' not in tags:
+            tags.append('Affiliate')
+        return tags
+
+    def _analysis_answer(self, prompt: str) -> Dict:
+        company = self._field(prompt, 'Company')
+        is_affiliate = 'affiliate' in self._field(prompt, 'Description').lower()
+        tags = self._pick_tags(prompt)[:2]
+        if is_affiliate:
+            tags.append('Affiliate')
+        return {
+            'isLegitimate': self._bucket(company, 10) != 0,
+            'isAffiliateProgram': is_affiliate,
+            'businessType': 'SaaS',
+            'tags': tags,
+            'confidence': 0.75,
+            'reasoning': 'Fake backend analysis'
+        }
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import requests
+
+from config import (
+    HOST_HEALTH_SKIP_AFTER_FAILURES, HOST_HEALTH_DEGRADED_TIMEOUT,
+    HOST_HEALTH_BACKOFF_BASE_SECONDS, HOST_HEALTH_BACKOFF_MAX_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# 4xx codes that say "this host is overloaded / throttling us"; other 4xx (403 from bot
+# protection, 404 on a guessed path) say nothing about whether the site is up
+UNHEALTHY_STATUS_CODES = (429,)
+
+
+def _to_datetime(ts: Optional[float]) -> Optional[datetime]:
+    # Naive UTC, like every other timestamp this scraper writes to MongoDB
+    return datetime.utcfromtimestamp(ts) if ts else None
+
+
+def _to_timestamp(dt: Optional[datetime]) -> Optional[float]:
+    return dt.replace(tzinfo=timezone.utc).timestamp() if dt else None
+
+
+class HostUnavailableError(requests.ConnectionError):
+    """Raised instead of a request to a host that is inside its failure back-off window"""
+
+
+class HostHealth:
+    """
+    Per-host health for sponsor websites: recent failures, latency and last success.
+
+    After one failure the host gets a shortened timeout; after
+    HOST_HEALTH_SKIP_AFTER_FAILURES consecutive failures it is skipped until its
+    next re-check, which backs off exponentially (base * 2^(failures-1), capped).
+    State lives in memory and, when a SponsorDatabase is given, in the hosthealth
+    collection so later cycles and run_manual_analysis don't pay the full timeout again.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self._hosts: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.stats = self._empty_stats()
+        if self.db:
+            for record in self.db.get_unhealthy_hosts():
+                self._hosts[record['host']] = self._from_record(record)
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'skipped_requests': 0, 'shortened_timeouts': 0, 'failures_recorded': 0, 'recoveries': 0}
+
+    @staticmethod
+    def _new_entry() -> Dict:
+        return {'consecutive_failures': 0, 'total_failures': 0, 'avg_latency': None,
+                'last_success': None, 'last_failure': None, 'last_error': None, 'next_check_at': 0.0}
+
+    def _from_record(self, record: Dict) -> Dict:
+        entry = self._new_entry()
+        entry.update({
+            'consecutive_failures': record.get('consecutiveFailures', 0),
+            'total_failures': record.get('totalFailures', 0),
+            'avg_latency': record.get('avgLatencySeconds'),
+            'last_success': _to_timestamp(record.get('lastSuccess')),
+            'last_failure': _to_timestamp(record.get('lastFailure')),
+            'last_error': record.get('lastError'),
+            'next_check_at': _to_timestamp(record.get('nextCheckAt')) or 0.0
+        })
+        return entry
+
+    @staticmethod
+    def _in_backoff(entry: Dict, now: float) -> bool:
+        return entry['consecutive_failures'] >= HOST_HEALTH_SKIP_AFTER_FAILURES and now < entry['next_check_at']
+
+    def _persist(self, host: str, entry: Dict):
+        if not self.db:
+            return
+        self.db.save_host_health(host, {
+            'consecutiveFailures': entry['consecutive_failures'],
+            'totalFailures': entry['total_failures'],
+            'avgLatencySeconds': entry['avg_latency'],
+            'lastSuccess': _to_datetime(entry['last_success']),
+            'lastFailure': _to_datetime(entry['last_failure']),
+            'lastError': entry['last_error'],
+            'nextCheckAt': _to_datetime(entry['next_check_at'])
+        })
+
+    def should_skip(self, host: str) -> bool:
+        """True while the host is in its back-off window after repeated failures"""
+        with self._lock:
+            entry = self._hosts.get(host)
+            skip = bool(entry and self._in_backoff(entry, time.time()))
+            if skip:
+                self.stats['skipped_requests'] += 1
+            return skip
+
+    def timeout_for(self, host: str, timeout: float) -> float:
+        """Shortened timeout for hosts that failed recently (including the re-check after back-off)"""
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry and entry['consecutive_failures'] > 0 and timeout > HOST_HEALTH_DEGRADED_TIMEOUT:
+                self.stats['shortened_timeouts'] += 1
+                return HOST_HEALTH_DEGRADED_TIMEOUT
+            return timeout
+
+    def record_success(self, host: str, latency: float):
+        with self._lock:
+            entry = self._hosts.setdefault(host, self._new_entry())
+            recovered = entry['consecutive_failures'] > 0
+            left_backoff = entry['consecutive_failures'] >= HOST_HEALTH_SKIP_AFTER_FAILURES
+            entry['avg_latency'] = latency if entry['avg_latency'] is None else 0.7 * entry['avg_latency'] + 0.3 * latency
+            entry['last_success'] = time.time()
+            entry['consecutive_failures'] = 0
+            entry['next_check_at'] = 0.0
+            if recovered:
+                self.stats['recoveries'] += 1
+                snapshot = dict(entry)
+        if recovered:
+            logger.info(f"✅ Host recovered: {host}")
+        # Only back-off transitions are written back; everything else stays memory-only
+        if left_backoff:
+            self._persist(host, snapshot)
+
+    def record_failure(self, host: str, error: str):
+        with self._lock:
+            entry = self._hosts.setdefault(host, self._new_entry())
+            now = time.time()
+            was_in_backoff = self._in_backoff(entry, now)
+            entry['consecutive_failures'] += 1
+            entry['total_failures'] += 1
+            entry['last_failure'] = time.time()
+            entry['last_error'] = error[:200]
+            backoff = min(HOST_HEALTH_BACKOFF_MAX_SECONDS,
+                          HOST_HEALTH_BACKOFF_BASE_SECONDS * (2 ** (entry['consecutive_failures'] - 1)))
+            entry['next_check_at'] = time.time() + backoff
+            self.stats['failures_recorded'] += 1
+            entered_backoff = not was_in_backoff and self._in_backoff(entry, now)
+            snapshot = dict(entry)
+        logger.debug(f"Host failure #{snapshot['consecutive_failures']} for {host}: {error} (re-check in {backoff:.0f}s)")
+        if entered_backoff:
+            self._persist(host, snapshot)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = self._empty_stats()
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            stats = dict(self.stats)
+            stats['hosts_in_backoff'] = sum(1 for entry in self._hosts.values() if self._in_backoff(entry, now))
+        return stats
@@ -0,0 +1,350 @@
+import abc
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from config import (
+    GEMINI_BREAKER_FAILURE_THRESHOLD, GEMINI_BREAKER_LATENCY_THRESHOLD,
+    GEMINI_BREAKER_RESET_SECONDS, LLM_BACKEND
+)
+from pipeline import raise_if_cancelled
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a Gemini call is short-circuited because the breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for the Gemini client.
+
+    closed    -> calls go through; N consecutive failures (or slow calls) open it
+    open      -> calls are rejected until reset_seconds have passed
+    half_open -> a single trial call is let through; success closes, failure re-opens
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = GEMINI_BREAKER_FAILURE_THRESHOLD,
+                 latency_threshold: float = GEMINI_BREAKER_LATENCY_THRESHOLD,
+                 reset_seconds: float = GEMINI_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.times_opened = 0
+        self.short_circuited_calls = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at >= self.reset_seconds:
+                    self.state = self.HALF_OPEN
+                    self._trial_in_flight = False
+                    logger.info("🔌 Gemini circuit half-open - allowing a trial request")
+                else:
+                    self.short_circuited_calls += 1
+                    return False
+            # HALF_OPEN: only one trial call at a time
+            if self._trial_in_flight:
+                self.short_circuited_calls += 1
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def is_open(self) -> bool:
+        """Non-mutating check used to route work to local fallbacks up front"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return False
+            return time.time() - self.opened_at < self.reset_seconds
+
+    def record_success(self, latency: float):
+        """Record a completed call; slow calls count as failures"""
+        if self.latency_threshold and latency > self.latency_threshold:
+            self.record_failure(f"slow response ({latency:.1f}s > {self.latency_threshold:.1f}s)")
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("🔌 Gemini circuit closed - Gemini calls resumed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: str):
+        """Record a failed call and open the circuit if the threshold is reached"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"🔌 Gemini circuit OPEN after {self.consecutive_failures} failure(s): {error} "
+                                   f"- routing to local fallbacks for {self.reset_seconds:.0f}s")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def snapshot(self) -> Dict:
+        """Current breaker state for run summaries"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'short_circuited_calls': self.short_circuited_calls,
+                'last_error': self.last_error
+            }
+
+
+# Model metadata lookups are cached for the lifetime of the process (keyed by model name)
+_HEALTH_CHECK_CACHE: Dict[str, bool] = {}
+
+
+class LLMBackend(abc.ABC):
+    """
+    Interface for the text-generation backend used by SponsorAnalyzer.
+
+    Implementations return a response object exposing `.text` (and optionally
+    `.usage_metadata`), matching what google.generativeai returns.
+    """
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def generate_content(self, prompt, **kwargs):
+        """Generate a response for prompt"""
+
+    def health_check(self) -> bool:
+        return True
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini backend.
+
+    google.generativeai is imported, configured and health-checked on the first call,
+    not at construction time.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, model_name: str, api_key: str):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.model = None
+        self._genai = None
+        self._init_lock = threading.Lock()
+
+    def _ensure_model(self):
+        """Import google.generativeai and create the model on first use"""
+        if self.model is not None:
+            return self.model
+        with self._init_lock:
+            if self.model is not None:
+                return self.model
+            try:
+                logger.info("Importing Google Generative AI package...")
+                import google.generativeai as genai
+            except ImportError as e:
+                logger.error(f"❌ Google Generative AI package not available: {e}")
+                logger.error("Install with: pip install google-generativeai")
+                raise ImportError("Google Generative AI package (google-generativeai) is required but not installed. Install with: pip install google-generativeai")
+            
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+            self.health_check()
+            self.model = genai.GenerativeModel(self.model_name)
+            logger.info(f"✅ Gemini model {self.model_name} ready")
+            return self.model
+
+    def health_check(self) -> bool:
+        """Cheap model metadata lookup (no generation), cached for the process lifetime"""
+        if _HEALTH_CHECK_CACHE.get(self.model_name):
+            return True
+        try:
+            self._genai.get_model(f"models/{self.model_name}")
+        except Exception as e:
+            logger.error(f"❌ Gemini health check failed for {self.model_name}: {e}")
+            raise RuntimeError(f"Gemini health check failed: {e}")
+        _HEALTH_CHECK_CACHE[self.model_name] = True
+        logger.info(f"✅ Gemini health check passed for {self.model_name}")
+        return True
+
+    def generate_content(self, prompt, **kwargs):
+        return self._ensure_model().generate_content(prompt, **kwargs)
+
+
+def create_llm_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    """Build the configured backend ('gemini' or 'fake')"""
+    if name == 'fake':
+        from fake_llm import FakeLLMBackend
+        logger.info("🧪 Using offline fake LLM backend (no Gemini calls will be made)")
+        return FakeLLMBackend.from_config()
+    
+    from config import GEMINI_API_KEY
+    logger.info(f"Checking for Gemini API key...")
+    if not GEMINI_API_KEY:
+        error_msg = "❌ CRITICAL: Gemini API key not found in environment variables. Expected: GEMINI_API_KEY or sponsorDB_geminiKey"
+        logger.error(error_msg)
+        raise RuntimeError(f"Failed to initialize Gemini: {error_msg}")
+    
+    if not GEMINI_API_KEY.strip():
+        error_msg = "❌ CRITICAL: Gemini API key is empty. Scraper requires valid Gemini API key."
+        logger.error(error_msg)
+        raise RuntimeError(f"Failed to initialize Gemini: {error_msg}")
+    
+    logger.info(f"✅ Gemini API key found (length: {len(GEMINI_API_KEY)})")
+    # Use gemini-2.5-flash (latest and fastest model)
+    return GeminiBackend('gemini-2.5-flash', GEMINI_API_KEY)
+
+
+class LLMUsageStats:
+    """Per call type accounting: request count, tokens, latency histogram and error classes"""
+
+    # Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+    LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 20]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def _entry(self, call_type: str) -> Dict:
+        if call_type not in self._stats:
+            self._stats[call_type] = {
+                'calls': 0,
+                'errors': 0,
+                'short_circuited': 0,
+                'prompt_tokens': 0,
+                'output_tokens': 0,
+                'total_latency_seconds': 0.0,
+                'max_latency_seconds': 0.0,
+                'latency_histogram': {self._bucket_label(i): 0 for i in range(len(self.LATENCY_BUCKETS) + 1)},
+                'error_classes': {}
+            }
+        return self._stats[call_type]
+
+    def _bucket_label(self, index: int) -> str:
+        if index < len(self.LATENCY_BUCKETS):
+            return f"<{self.LATENCY_BUCKETS[index]}s"
+        return f">={self.LATENCY_BUCKETS[-1]}s"
+
+    def _bucket_for(self, latency: float) -> str:
+        for i, bound in enumerate(self.LATENCY_BUCKETS):
+            if latency < bound:
+                return self._bucket_label(i)
+        return self._bucket_label(len(self.LATENCY_BUCKETS))
+
+    def record_call(self, call_type: str, latency: float, response=None, error: Optional[Exception] = None):
+        usage = getattr(response, 'usage_metadata', None) if response is not None else None
+        with self._lock:
+            entry = self._entry(call_type)
+            entry['calls'] += 1
+            entry['total_latency_seconds'] += latency
+            entry['max_latency_seconds'] = max(entry['max_latency_seconds'], latency)
+            entry['latency_histogram'][self._bucket_for(latency)] += 1
+            if usage is not None:
+                entry['prompt_tokens'] += getattr(usage, 'prompt_token_count', 0) or 0
+                entry['output_tokens'] += getattr(usage, 'candidates_token_count', 0) or 0
+            if error is not None:
+                entry['errors'] += 1
+                error_class = type(error).__name__
+                entry['error_classes'][error_class] = entry['error_classes'].get(error_class, 0) + 1
+
+    def record_short_circuit(self, call_type: str):
+        with self._lock:
+            self._entry(call_type)['short_circuited'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def snapshot(self) -> Dict:
+        """Copy of the per call type stats plus a 'total' rollup"""
+        with self._lock:
+            by_type = {}
+            for call_type, entry in self._stats.items():
+                copy = dict(entry)
+                copy['latency_histogram'] = dict(entry['latency_histogram'])
+                copy['error_classes'] = dict(entry['error_classes'])
+                copy['avg_latency_seconds'] = round(entry['total_latency_seconds'] / entry['calls'], 3) if entry['calls'] else 0.0
+                copy['total_latency_seconds'] = round(entry['total_latency_seconds'], 3)
+                copy['max_latency_seconds'] = round(entry['max_latency_seconds'], 3)
+                by_type[call_type] = copy
+
+        total = {
+            'calls': sum(e['calls'] for e in by_type.values()),
+            'errors': sum(e['errors'] for e in by_type.values()),
+            'short_circuited': sum(e['short_circuited'] for e in by_type.values()),
+            'prompt_tokens': sum(e['prompt_tokens'] for e in by_type.values()),
+            'output_tokens': sum(e['output_tokens'] for e in by_type.values()),
+            'total_latency_seconds': round(sum(e['total_latency_seconds'] for e in by_type.values()), 3)
+        }
+        return {'by_call_type': by_type, 'total': total}
+
+
+class LLMClient:
+    """Wraps an LLMBackend, enforcing the circuit breaker and recording usage for every call"""
+
+    def __init__(self, backend: LLMBackend, breaker: Optional[CircuitBreaker] = None):
+        self.backend = backend
+        self.breaker = breaker or CircuitBreaker()
+        self.usage = LLMUsageStats()
+
+    def preflight(self):
+        """Strict startup check: run a real test generation and fail loudly if it does not work"""
+        logger.info("Testing LLM API connection (preflight)...")
+        try:
+            test_response = self.generate_content("test", call_type='preflight')
+            logger.info("✅ Gemini API test successful - Gemini analysis ENABLED")
+            logger.info(f"Test response: {test_response.text[:50]}...")
+        except Exception as test_error:
+            logger.error(f"❌ Gemini API test failed: {test_error}")
+            error_text = str(test_error).lower()
+            if "quota" in error_text or "quota_exceeded" in error_text:
+                error_msg = "❌ CRITICAL: Gemini API quota exceeded! Check your Google Cloud billing. Scraper requires working Gemini API."
+            elif "invalid" in error_text or "api_key" in error_text:
+                error_msg = "❌ CRITICAL: Invalid Gemini API key! Scraper requires valid Gemini API key."
+            elif "rate_limit" in error_text or "rate limit" in error_text:
+                error_msg = "❌ CRITICAL: Gemini API rate limit exceeded! Scraper requires working Gemini API."
+            else:
+                error_msg = f"❌ CRITICAL: Gemini API test failed: {test_error}. Scraper requires working Gemini API."
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+    def generate_content(self, prompt, call_type: str = 'other', **kwargs):
+        """Call the backend, raising CircuitOpenError instead of waiting on a failing API"""
+        raise_if_cancelled("Gemini call")
+        if not self.breaker.allow_request():
+            self.usage.record_short_circuit(call_type)
+            raise CircuitOpenError("Gemini circuit is open - skipping call")
+
+        start = time.time()
+        try:
+            response = self.backend.generate_content(prompt, **kwargs)
+        except Exception as e:
+            latency = time.time() - start
+            self.usage.record_call(call_type, latency, error=e)
+            self.breaker.record_failure(f"{type(e).__name__}: {e}")
+            raise
+        latency = time.time() - start
+        self.usage.record_call(call_type, latency, response=response)
+        self.breaker.record_success(latency)
+        return response
+
+    def is_available(self) -> bool:
+        """False while the breaker is open and callers should use local fallbacks"""
+        return not self.breaker.is_open()
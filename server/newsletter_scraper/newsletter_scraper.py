@@ -1,7 +1,10 @@
+import copy
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
@@ -9,7 +12,19 @@ from apscheduler.triggers.cron import CronTrigger
 from database import SponsorDatabase
 from email_processor import EmailProcessor
 from sponsor_analyzer import SponsorAnalyzer
-from config import LOG_LEVEL, LOG_FILE
+from cycle_budget import CycleBudget
+from email_jobs import EmailJobLeases
+from run_lock import RunLock
+from pipeline import HELD, Pipeline, raise_if_cancelled
+from config import (
+    LOG_LEVEL, LOG_FILE, DOMAIN_CONTACT_REFRESH_BATCH,
+    PIPELINE_FETCH_WORKERS, PIPELINE_PARSE_WORKERS, PIPELINE_LINK_WORKERS,
+    PIPELINE_ENRICH_WORKERS, PIPELINE_PERSIST_WORKERS, PIPELINE_ENRICH_QUEUE_SIZE,
+    EMAIL_PARSE_PROCESSES, CYCLE_COST_HISTORY, CYCLE_DEFAULT_EMAIL_SECONDS,
+    PROGRESS_COUNTERS_INTERVAL_SECONDS, EMAIL_JOB_LEASES, CYCLE_DEADLINE_RESERVE_SECONDS,
+    RUN_LOCK_POLL_SECONDS, RUN_LOCK_WAIT_SECONDS, MANUAL_ANALYSIS_PAGE_SIZE, MANUAL_ANALYSIS_WORKERS,
+    MANUAL_ANALYSIS_MAX_SECONDS
+)
 
 # Configure logging
 logging.basicConfig(
@@ -23,31 +38,18 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-class NewsletterScraper:
-    def __init__(self):
-        self.db = SponsorDatabase()
-        self.email_processor = EmailProcessor()
-        self.sponsor_analyzer = SponsorAnalyzer()
-        self.scheduler = BlockingScheduler()
-        
-        # Verify Gemini is available (required)
-        if not self.sponsor_analyzer.gemini_model:
-            error_msg = "❌ CRITICAL: Gemini model is not available. Scraper requires Gemini to function."
-            logger.error(error_msg)
-            raise RuntimeError(error_msg)
-        
-        logger.info("✅ Gemini model initialized - Scraper ready to run")
-        
-    def run_scraping_cycle(self, max_emails=10):
-        """Run a single scraping cycle with email limit to prevent timeouts"""
-        logger.info(f"Starting newsletter scraping cycle (max_emails={max_emails})")
-        start_time = time.time()
-        total_sponsors = 0
-        processed_emails = 0
-        new_pending_sponsors = 0  # Track newly added sponsors that need review
+class _ScrapingCycle:
+    """Counters for one scraping cycle, updated from every pipeline stage"""
+    
+    def __init__(self, budget: CycleBudget, jobs: Optional[EmailJobLeases] = None):
+        self.budget = budget
+        # Shared per-email job leases when several scraper processes work the same inbox
+        self.jobs = jobs
+        # Set when the pipeline is abandoned at its deadline; stages make no further writes
+        self.cancelled = threading.Event()
         
         # Track rejection reasons
-        rejection_stats = {
+        self.rejection_stats = {
             'emails_without_sponsor_indicators': 0,
             'emails_without_sponsor_sections': 0,
             'sections_rejected_low_confidence': 0,
@@ -64,223 +66,287 @@ class NewsletterScraper:
         }
         
         # Track contact quality metrics
-        contact_quality_stats = {
+        self.contact_quality_stats = {
             'named_person_found': 0,      # HIGH VALUE
             'business_email_found': 0,     # MEDIUM VALUE
             'generic_email_found': 0,     # LOW VALUE
             'no_contact_found': 0,        # FAILED
-            'total_sponsors_processed': 0
+            'total_sponsors_processed': 0,
+            'pending_gemini_enrichment': 0  # Used local fallbacks while Gemini circuit was open
         }
         
+        self.totals = {
+            'processed_emails': 0,
+            'total_sponsors': 0,
+            'new_pending_sponsors': 0  # Track newly added sponsors that need review
+        }
+        
+        # Enrichment runs once per root domain; other links to the domain reuse it
+        self.dedup_stats = {
+            'domains_enriched': 0,
+            'enrichments_saved': 0,
+            'newsletter_entries_added': 0
+        }
+        self.domain_enrichments: Dict[str, '_DomainEnrichment'] = {}
+        
+        # Cache subscriber counts per newsletter to avoid repeated DB queries
+        self.newsletter_subscriber_cache = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+    
+    def count(self, stats: Dict, key: str, amount: int = 1):
+        with self._lock:
+            stats[key] += amount
+    
+    def claim_domain(self, root_domain: Optional[str]) -> Tuple['_DomainEnrichment', bool]:
+        """The domain's enrichment slot, and whether the caller is the first link to it (and must fill it)"""
+        if not root_domain:
+            return _DomainEnrichment(), True
+        with self._lock:
+            enrichment = self.domain_enrichments.get(root_domain)
+            if enrichment:
+                return enrichment, False
+            enrichment = self.domain_enrichments[root_domain] = _DomainEnrichment()
+            return enrichment, True
+    
+    def counters(self) -> Dict:
+        """Consistent copy of the running totals and rejection counts (for progress events)"""
+        with self._lock:
+            return dict(self.totals, rejection_stats=dict(self.rejection_stats))
+
+
+class _DomainEnrichment:
+    """One root domain's enrichment in a cycle, shared by every link to that domain"""
+    
+    def __init__(self):
+        self.enriched = None  # enrich_candidate result (None if it failed)
+        self.analyzed = None  # validated, Gemini-analyzed sponsor headed for a new record
+        self.enriched_existing = False  # the first link added this contact info to an existing sponsor
+        self.done = False
+        self.waiters: List['_LinkItem'] = []  # links parked until the first one completes
+        self.lock = threading.Lock()
+    
+    def park(self, item: '_LinkItem') -> bool:
+        """Park item until the enrichment completes; False if it already has"""
+        with self.lock:
+            if self.done:
+                return False
+            self.waiters.append(item)
+            return True
+    
+    def complete(self) -> List['_LinkItem']:
+        """Mark the enrichment complete and take the links parked on it"""
+        with self.lock:
+            self.done = True
+            waiters, self.waiters = self.waiters, []
+            return waiters
+
+
+class _EmailTicket:
+    """Sponsor links of one email still in the pipeline; the email is marked read when the last one is through"""
+    
+    def __init__(self, email_id: str):
+        self.email_id = email_id
+        self.links = 0
+        self.pending = 0
+        self.failed = False
+        self.deferred = False  # dropped at the cycle deadline; left unread for the next cycle
+        self.domains = set()  # root domains already linked from this email
+        self.lock = threading.Lock()
+
+
+class _LinkItem:
+    """One sponsor link travelling through screening, enrichment and persistence"""
+    
+    def __init__(self, ticket: _EmailTicket, link: str, section: Dict, newsletter_name: str, cached_subscriber_count: int):
+        self.ticket = ticket
+        self.link = link
+        self.section = section
+        self.newsletter_name = newsletter_name
+        self.cached_subscriber_count = cached_subscriber_count
+        self.candidate = None
+        self.priority = 0.0  # expected value of enrichment; the enrich stage takes the best first
+        self.sponsor = None
+        self.existing = None
+        self.reused = False  # enriched by another link to the same domain
+        self.enrichment = None  # slot of the domain this first link enriched; completed once it is persisted
+        self.shared = False  # reuses another link's enrichment; only adds this newsletter's entry
+
+
+class NewsletterScraper:
+    def __init__(self, preflight: bool = False):
+        self.db = SponsorDatabase()
+        self.email_processor = EmailProcessor()
+        self.sponsor_analyzer = SponsorAnalyzer(preflight=preflight, db=self.db)
+        self.scheduler = BlockingScheduler()
+        # Optional callable(event: Dict) receiving progress events during run_scraping_cycle
+        self.progress = None
+        # Latest cycle's pipeline; workers of an abandoned one may still be stopping
+        self._pipeline: Optional[Pipeline] = None
+        
+        # Verify Gemini is available (required)
+        if not self.sponsor_analyzer.gemini_model:
+            error_msg = "❌ CRITICAL: Gemini model is not available. Scraper requires Gemini to function."
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        
+        logger.info("✅ Gemini client configured - Scraper ready to run")
+        
+    def run_scraping_cycle(self, max_emails=10, deadline: Optional[float] = None):
+        """
+        Run a scraping cycle unless one is already running in any process (scheduler,
+        api_wrapper or worker service). A trigger that arrives during an active run asks
+        for one follow-up run and waits for it - running it itself once the lock frees -
+        and otherwise returns the active run's result, marked coalesced. The holder runs
+        a requested follow-up itself on release when it has time left, so it doesn't
+        depend on a waiter outlasting the run.
+        With EMAIL_JOB_LEASES, cycles share the inbox through job leases and may overlap.
+        """
+        if EMAIL_JOB_LEASES:
+            return self._run_scraping_cycle(max_emails, deadline)
+        lock = RunLock(self.db)
+        if lock.acquire():
+            return self._run_locked_cycle(lock, max_emails, deadline)
+        return self._coalesce_with_active_run(lock, max_emails, deadline)
+    
+    def _run_locked_cycle(self, lock: RunLock, max_emails: int, deadline: Optional[float]) -> Dict:
+        # The lock is released once the cycle's workers have exited, which may be after this returns
+        released = []
+        try:
+            summary = self._run_scraping_cycle(max_emails, deadline,
+                                               on_stopped=lambda result: released.append(lock.release(result)))
+        except BaseException:
+            if not released:
+                lock.release({'error': 'scraping cycle did not complete'})
+            raise
+        
+        if released and released[0] and lock.follow_up_requested:
+            # Triggers that arrived during this run asked for one more, and may all have stopped waiting
+            if self._follow_up_fits(deadline) and lock.acquire():
+                logger.info("🔒 Running the follow-up cycle requested during this one")
+                follow_up = self._run_locked_cycle(lock, max_emails, deadline)
+                return dict(summary, coalesced=False, follow_up=follow_up)
+            # The flag stays set; whichever trigger takes the lock next runs the cycle that covers it
+            logger.info("🔒 No time left for the requested follow-up cycle - leaving it to the next trigger")
+        return dict(summary, coalesced=False)
+    
+    @staticmethod
+    def _follow_up_fits(deadline: Optional[float]) -> bool:
+        """Whether a follow-up cycle could still admit at least one email before the deadline"""
+        return deadline is None or deadline - time.time() > CYCLE_DEADLINE_RESERVE_SECONDS + CYCLE_DEFAULT_EMAIL_SECONDS
+    
+    def _coalesce_with_active_run(self, lock: RunLock, max_emails: int, deadline: Optional[float]) -> Dict:
+        """Wait on the run holding the lock instead of starting a parallel one"""
+        state = lock.request_follow_up()
+        if state is None:
+            # The active run finished in between
+            if lock.acquire():
+                return self._run_locked_cycle(lock, max_emails, deadline)
+            state = lock.state()
+        observed = state.get('generation', 0)
+        logger.info(f"🔒 Scraping cycle already running ({state.get('owner')}) - queued one follow-up run and waiting")
+        self._emit('run_coalesced', active_owner=state.get('owner'), active_generation=observed)
+        
+        wait_until = deadline - CYCLE_DEADLINE_RESERVE_SECONDS if deadline else time.time() + RUN_LOCK_WAIT_SECONDS
+        while time.time() < wait_until:
+            time.sleep(min(RUN_LOCK_POLL_SECONDS, max(0.0, wait_until - time.time())))
+            state = lock.state()
+            if state.get('lastGeneration', 0) > observed:
+                # A run that started after this trigger has finished (another waiter ran the follow-up)
+                return self._coalesced_summary(state)
+            if lock.acquire():
+                # This trigger runs the follow-up; the cycle budget fits it into what's left of the deadline
+                return self._run_locked_cycle(lock, max_emails, deadline)
+        
+        logger.info("🔒 Active scraping cycle still running at this trigger's deadline - returning without a run")
+        return self._coalesced_summary(state)
+    
+    def _coalesced_summary(self, state: Dict) -> Dict:
+        """Summary for a trigger that didn't run a cycle itself: the latest published result"""
+        summary = {'new_sponsors_added': 0, 'need_review': 0, 'complete': 0, 'emails_processed': 0}
+        summary.update(state.get('lastResult') or {})
+        summary.update({
+            'coalesced': True,
+            'still_running': bool(state.get('owner')),
+            'follow_up_queued': bool(state.get('followUpRequested')),
+            'result_finished_at': state['lastFinishedAt'].isoformat() if state.get('lastFinishedAt') else None
+        })
+        return summary
+    
+    def _run_scraping_cycle(self, max_emails=10, deadline: Optional[float] = None,
+                            on_stopped: Optional[Callable[[Dict], None]] = None):
+        """
+        Run a single scraping cycle with email limit to prevent timeouts.
+        With a deadline (epoch seconds), emails are only admitted while their estimated cost
+        still fits, in-flight work is drained, and a (possibly partial) summary is returned
+        before the deadline. Emails that didn't fit stay unread for the next cycle.
+        Work still in flight at the deadline is cancelled; its email leases are released, and
+        on_stopped(summary) is called, only once those workers have exited.
+        """
+        logger.info(f"Starting newsletter scraping cycle (max_emails={max_emails})")
+        start_time = time.time()
+        previous = self._pipeline
+        if previous and not previous.wait_stopped(None if deadline is None else max(0.0, deadline - start_time)):
+            logger.warning("Previous cycle's abandoned workers are still stopping - skipping this cycle")
+            summary = {'new_sponsors_added': 0, 'need_review': 0, 'complete': 0, 'emails_processed': 0,
+                       'duration_seconds': time.time() - start_time, 'error': 'previous cycle still stopping'}
+            if on_stopped:
+                on_stopped(summary)
+            return summary
+        summary = self._scraping_cycle(max_emails, deadline, start_time)
+        if on_stopped:
+            pipeline = self._pipeline if self._pipeline is not previous else None
+            if pipeline:
+                pipeline.when_stopped(lambda: on_stopped(summary))
+            else:
+                on_stopped(summary)
+        return summary
+    
+    def _scraping_cycle(self, max_emails: int, deadline: Optional[float], start_time: float) -> Dict:
+        self.sponsor_analyzer.reset_llm_stats()
+        self.sponsor_analyzer.reset_http_stats()
+        self.sponsor_analyzer.reset_page_cache()
+        cycle = _ScrapingCycle(CycleBudget(deadline, self.db.get_recent_email_costs(CYCLE_COST_HISTORY)),
+                               EmailJobLeases(self.db) if EMAIL_JOB_LEASES else None)
+        if deadline:
+            logger.info(f"⏳ Cycle deadline in {deadline - start_time:.0f}s "
+                        f"(estimated {cycle.budget.estimate():.1f}s per email)")
+        rejection_stats = cycle.rejection_stats
+        contact_quality_stats = cycle.contact_quality_stats
+        
         try:
-            # Get recent emails with limit
-            emails = self.email_processor.get_recent_emails(limit=max_emails)
-            logger.info(f"Found {len(emails)} emails to process")
+            # Emails stream through fetch -> parse -> link screening -> enrichment -> persistence;
+            # bounded queues between the stages keep memory flat while IMAP, parsing and website/Gemini work overlap
+            email_ids = self.email_processor.get_recent_email_ids(limit=max_emails)
+            logger.info(f"Found {len(email_ids)} emails to process")
+            self._emit('cycle_started', max_emails=max_emails, emails_found=len(email_ids),
+                       deadline_seconds=round(deadline - start_time, 1) if deadline else None)
+            
+            if cycle.jobs:
+                # Every worker enqueues what it sees; each email is then processed by whichever worker leases it
+                cycle.jobs.enqueue(email_id.decode() for email_id in email_ids)
+                emails = self._leased_emails(cycle, max_emails)
+                cycle.jobs.start_heartbeat()
+            else:
+                emails = self._admitted_emails(cycle, email_ids)
             
-            # Cache subscriber counts per newsletter to avoid repeated DB queries
-            newsletter_subscriber_cache = {}
+            pipeline = self._pipeline = self._build_pipeline(cycle)
+            ticker_stop = self._start_progress_ticker(cycle)
+            try:
+                pipeline.run(emails, deadline=cycle.budget.drain_until)
+            finally:
+                ticker_stop.set()
+                if cycle.jobs:
+                    # Leases stay held (and heartbeated) until abandoned workers have exited
+                    pipeline.when_stopped(lambda: self._release_jobs(cycle))
+            email_job_stats = cycle.jobs.snapshot() if cycle.jobs else None
+            pipeline_stats = pipeline.snapshot()
+            deadline_stats = cycle.budget.snapshot()
+            self._save_cycle_timing(cycle, time.time() - start_time)
             
-            for email_data in emails:
-                try:
-                    # Check if email has sponsor indicators
-                    if not self.email_processor.has_sponsor_indicators(email_data):
-                        rejection_stats['emails_without_sponsor_indicators'] += 1
-                        continue
-                    
-                    # Extract newsletter name
-                    newsletter_name = self.email_processor.get_newsletter_name(email_data)
-                    
-                    # Cache subscriber count for this newsletter (query DB once per newsletter)
-                    if newsletter_name and newsletter_name not in newsletter_subscriber_cache:
-                        cached_count = self.db.get_max_subscriber_count_for_newsletter(newsletter_name)
-                        newsletter_subscriber_cache[newsletter_name] = cached_count
-                        if cached_count > 0:
-                            logger.info(f"📊 Cached subscriber count for '{newsletter_name}': {cached_count:,}")
-                    
-                    # Extract sponsor sections with confidence scoring
-                    sponsor_sections = self.email_processor.process_sponsor_sections_with_confidence(email_data)
-                    
-                    if not sponsor_sections:
-                        rejection_stats['emails_without_sponsor_sections'] += 1
-                        continue
-                    
-                    rejection_stats['total_sections_found'] += len(sponsor_sections)
-                    
-                    # Process each sponsor section (filter by confidence and status)
-                    for section in sponsor_sections:
-                        # Skip rejected sections
-                        if section.get('processing_status') == 'rejected':
-                            rejection_stats['sections_rejected_low_confidence'] += 1
-                            continue
-                        
-                        # Get confidence and status (but don't log every section)
-                        confidence = section.get('confidence_score', 0)
-                        status = section.get('processing_status', 'unknown')
-                        
-                        # Pass cached subscriber count to analyzer
-                        cached_subscriber_count = newsletter_subscriber_cache.get(newsletter_name, 0)
-                        
-                        sponsors = self.sponsor_analyzer.analyze_sponsor_section(
-                            section, newsletter_name, cached_subscriber_count
-                        )
-                        
-                        for sponsor in sponsors:
-                            rejection_stats['total_sponsors_analyzed'] += 1
-                            sponsor_name = sponsor.get('sponsorName', 'Unknown')
-                            sponsor_domain = sponsor.get('rootDomain', 'Unknown')
-                            
-                            logger.info(f"🔍 Processing sponsor: {sponsor_name} ({sponsor_domain})")
-                            
-                            # 1. VALIDATION: Check if domain is denied
-                            if self.db.is_domain_denied(sponsor['rootDomain']):
-                                logger.info(f"❌ REJECTED: Domain denied - {sponsor_domain}")
-                                rejection_stats['domains_denied'] += 1
-                                continue
-                            
-                            # 2. VALIDATION: Check for self-reference (newsletter advertising itself)
-                            newsletter_domain = self.sponsor_analyzer._extract_newsletter_domain(newsletter_name)
-                            if newsletter_domain and sponsor['rootDomain'].lower() == newsletter_domain.lower():
-                                logger.info(f"❌ REJECTED: Self-reference - {sponsor_domain}")
-                                rejection_stats['self_reference_skipped'] += 1
-                                continue
-                            
-                            # 3. VALIDATION: Check if sponsor already exists
-                            existing = self.db.get_sponsor_by_domain(sponsor['rootDomain'])
-                            if existing:
-                                logger.info(f"ℹ️ Sponsor already exists: {sponsor_domain} (ID: {existing.get('_id', 'N/A')})")
-                                # If existing sponsor has no contact info, try to enrich it
-                                if existing.get('contactMethod') == 'none' and sponsor.get('contactMethod') != 'none':
-                                    try:
-                                        logger.info(f"💎 Enriching existing sponsor with contact info: {sponsor.get('sponsorEmail')}")
-                                        # Update existing record with new contact info
-                                        update_data = {
-                                            'sponsorEmail': sponsor.get('sponsorEmail'),
-                                            'contactMethod': sponsor.get('contactMethod'),
-                                            'contactPersonName': sponsor.get('contactPersonName'),
-                                            'contactPersonTitle': sponsor.get('contactPersonTitle'),
-                                            'contactType': sponsor.get('contactType'),
-                                            'confidence': sponsor.get('confidence'),
-                                            'lastAnalyzed': datetime.utcnow()
-                                        }
-                                        self.db.update_sponsor(str(existing['_id']), update_data)
-                                        rejection_stats['enriched_existing'] += 1
-                                        logger.info(f"✅ Successfully enriched sponsor: {sponsor_name}")
-                                    except Exception as e:
-                                        logger.error(f"❌ Failed to enrich sponsor {sponsor_name}: {e}")
-                                        rejection_stats['save_failed'] += 1
-                                else:
-                                    logger.info(f"ℹ️ Sponsor already exists with contact info - skipping")
-                                    rejection_stats['already_exists'] += 1
-                                continue
-                            
-                            # 4. VALIDATION: Mandatory contact info requirement - RELAXED
-                            # CHANGED: Allow sponsors without contact info to be saved as pending
-                            # If they passed legitimacy checks, they're likely sponsors - save them for manual review
-                            # No longer rejecting here - let them be saved with pending status
-                            if not sponsor.get('sponsorEmail'):
-                                logger.info(f"⚠️ No contact info for {sponsor_name}, but saving as pending for manual review")
-                                # Don't increment rejection_stats - this is intentional, not a rejection
-                            
-                            # 6. VALIDATION: Subscriber estimate - if missing, mark as pending but still save
-                            estimated_subs = sponsor.get('estimatedSubscribers', 0)
-                            if not estimated_subs or estimated_subs <= 0:
-                                logger.info(f"⚠️ No subscriber estimate for {sponsor_name} (estimated: {estimated_subs}) - marking as pending")
-                                sponsor['estimatedSubscribers'] = 0  # Set to 0 so it doesn't cause issues
-                                sponsor['analysisStatus'] = 'pending'  # Mark for manual review
-                                # Don't reject - save as pending for manual review
-                            
-                            logger.info(f"✅ Sponsor passed all validations: {sponsor_name}")
-                            
-                            # Add confidence and processing status from section
-                            sponsor['confidence'] = confidence
-                            sponsor['processing_status'] = status
-                            
-                            # Set analysis status based on contact info (email only now)
-                            if sponsor.get('sponsorEmail'):
-                                sponsor['analysisStatus'] = 'complete'
-                                sponsor['confidence'] = max(sponsor.get('confidence', 0), 0.8)
-                            else:
-                                sponsor['analysisStatus'] = 'pending'
-                                sponsor['confidence'] = max(sponsor.get('confidence', 0), 0.5)
-                            
-                            # Optional: Use Gemini for final analysis (sponsor data enhancement)
-                            # Note: Email finding already happens in _scrape_website_info (Gemini first, then web scraping)
-                            if self.sponsor_analyzer.gemini_model:
-                                sponsor = self.sponsor_analyzer.gemini_analyze_sponsor(sponsor)
-                            
-                            # Track contact quality metrics
-                            contact_quality_stats['total_sponsors_processed'] += 1
-                            contact_type = sponsor.get('contactType', 'not_found')
-                            if contact_type == 'named_person':
-                                contact_quality_stats['named_person_found'] += 1
-                            elif contact_type == 'business_email':
-                                contact_quality_stats['business_email_found'] += 1
-                            elif contact_type == 'generic_email':
-                                contact_quality_stats['generic_email_found'] += 1
-                            elif not sponsor.get('sponsorEmail'):
-                                contact_quality_stats['no_contact_found'] += 1
-                            
-                            # Save to database - route to affiliates or sponsors collection
-                            try:
-                                logger.info(f"💾 Attempting to save sponsor: {sponsor_name} to database...")
-                                # Check if this is an affiliate program
-                                if sponsor.get('isAffiliateProgram'):
-                                    logger.info(f"📦 Detected affiliate program: {sponsor_name}")
-                                    # Convert to affiliate format
-                                    affiliate_data = {
-                                        'affiliateName': sponsor['sponsorName'],
-                                        'affiliateLink': sponsor['sponsorLink'],
-                                        'rootDomain': sponsor['rootDomain'],
-                                        'tags': sponsor.get('tags', []),
-                                        'affiliatedNewsletters': [{
-                                            'newsletterName': newsletter_name,
-                                            'estimatedAudience': sponsor.get('estimatedSubscribers', 0),
-                                            'contentTags': sponsor.get('tags', []),
-                                            'dateAffiliated': datetime.utcnow(),
-                                            'emailAddress': sponsor.get('sponsorEmail', '')
-                                        }],
-                                        'commissionInfo': sponsor.get('affiliateSignupLink', ''),
-                                        'status': 'pending'
-                                    }
-                                    # Save to affiliates collection
-                                    affiliate_id = self.db.create_affiliate(affiliate_data)
-                                    logger.info(f"✅ Saved affiliate program: {sponsor_name} (ID: {affiliate_id})")
-                                    total_sponsors += 1
-                                    
-                                    # Track if this new affiliate needs review (pending status)
-                                    if affiliate_data.get('status') == 'pending':
-                                        new_pending_sponsors += 1
-                                else:
-                                    # Save to sponsors collection (existing logic)
-                                    logger.info(f"💾 Saving sponsor to database: {sponsor_name} (domain: {sponsor_domain})")
-                                    logger.info(f"   Contact: {sponsor.get('sponsorEmail', 'None')}")
-                                    logger.info(f"   Contact Type: {sponsor.get('contactType', 'None')}")
-                                    logger.info(f"   Estimated Subs: {sponsor.get('estimatedSubscribers', 0)}")
-                                    sponsor_id = self.db.create_sponsor(sponsor)
-                                    logger.info(f"✅ Successfully saved sponsor: {sponsor_name} (ID: {sponsor_id})")
-                                    total_sponsors += 1
-                                    
-                                    # Track if this new sponsor needs review (pending status)
-                                    if sponsor.get('analysisStatus') == 'pending':
-                                        new_pending_sponsors += 1
-                                    
-                            except Exception as e:
-                                logger.error(f"❌ Failed to save sponsor/affiliate {sponsor_name}: {e}")
-                                logger.error(f"   Error type: {type(e).__name__}")
-                                logger.error(f"   Sponsor data keys: {list(sponsor.keys())}")
-                                import traceback
-                                logger.error(f"   Traceback: {traceback.format_exc()}")
-                                rejection_stats['save_failed'] += 1
-                                continue
-                    
-                    # Mark email as read
-                    self.email_processor.mark_email_as_read(email_data['id'])
-                    processed_emails += 1
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process email {email_data.get('id', 'unknown')}: {e}")
-                    rejection_stats['email_processing_errors'] += 1
-                    continue
+            processed_emails = cycle.totals['processed_emails']
+            total_sponsors = cycle.totals['total_sponsors']
+            new_pending_sponsors = cycle.totals['new_pending_sponsors']
             
             # Log comprehensive summary with rejection stats
             duration = time.time() - start_time
@@ -348,6 +414,89 @@ class NewsletterScraper:
             else:
                 logger.info("   • No sponsors processed in this cycle")
             
+            logger.info("")
+            gemini_circuit = self.sponsor_analyzer.gemini_circuit_snapshot()
+            logger.info("🔌 GEMINI CIRCUIT:")
+            logger.info(f"   • State: {gemini_circuit.get('state')}")
+            if gemini_circuit.get('times_opened'):
+                logger.info(f"   • Times Opened: {gemini_circuit['times_opened']}")
+                logger.info(f"   • Calls Short-Circuited: {gemini_circuit.get('short_circuited_calls', 0)}")
+                logger.info(f"   • Last Error: {gemini_circuit.get('last_error')}")
+                logger.info(f"   • Sponsors Flagged for Gemini Enrichment: {contact_quality_stats['pending_gemini_enrichment']}")
+            
+            logger.info("")
+            llm_stats = self.sponsor_analyzer.llm_stats_snapshot()
+            llm_total = llm_stats.get('total', {})
+            logger.info("🤖 GEMINI USAGE:")
+            logger.info(f"   • Requests: {llm_total.get('calls', 0)} (errors: {llm_total.get('errors', 0)}, short-circuited: {llm_total.get('short_circuited', 0)})")
+            logger.info(f"   • Tokens: {llm_total.get('prompt_tokens', 0):,} prompt / {llm_total.get('output_tokens', 0):,} output")
+            logger.info(f"   • Time in Gemini: {llm_total.get('total_latency_seconds', 0):.1f}s")
+            for call_type, call_stats in llm_stats.get('by_call_type', {}).items():
+                logger.info(f"   • {call_type}: {call_stats['calls']} calls, avg {call_stats['avg_latency_seconds']:.2f}s, "
+                            f"max {call_stats['max_latency_seconds']:.2f}s, {call_stats['errors']} errors")
+            
+            pre_classifier_stats = self.sponsor_analyzer.pre_classifier_snapshot()
+            if pre_classifier_stats['enabled'] or pre_classifier_stats['local_tags_assigned']:
+                logger.info("🧮 PRE-CLASSIFIER:")
+                logger.info(f"   • Clear Negatives Skipped: {pre_classifier_stats['clear_negatives_skipped']}")
+                logger.info(f"   • Local Tag Assignments: {pre_classifier_stats['local_tags_assigned']}")
+                logger.info(f"   • Gemini Calls Avoided: {pre_classifier_stats['gemini_calls_avoided']}")
+            
+            dedup_stats = dict(cycle.dedup_stats)
+            logger.info(f"♻️ DOMAIN DEDUP: {dedup_stats['domains_enriched']} domains enriched, "
+                        f"{dedup_stats['enrichments_saved']} repeat enrichments saved, "
+                        f"{dedup_stats['newsletter_entries_added']} newsletter entries added to them")
+            
+            contact_store_stats = self.sponsor_analyzer.contact_store_snapshot()
+            logger.info(f"📇 CONTACT STORE: {contact_store_stats['hits']} reused, "
+                        f"{contact_store_stats['discoveries']} discovery runs")
+            
+            http_stats = self.sponsor_analyzer.http_stats_snapshot()
+            logger.info("🌐 WEBSITE REQUESTS:")
+            logger.info(f"   • Requests: {http_stats['requests']} across {http_stats['hosts']} hosts")
+            logger.info(f"   • Connections: {http_stats['connections_opened']} opened, "
+                        f"{http_stats['connections_reused']} reused ({http_stats['reuse_ratio'] * 100:.0f}% reuse)")
+            streaming = http_stats.get('streaming', {})
+            logger.info(f"   • Page Bytes Read: {streaming.get('bytes_read', 0) / 1024:.0f} KB "
+                        f"({streaming.get('pages_stopped_early', 0)} stopped early, {streaming.get('pages_truncated', 0)} truncated, "
+                        f"{streaming.get('non_html_aborted', 0)} non-HTML aborted)")
+            dns_stats = http_stats.get('dns', {})
+            logger.info(f"   • DNS: {dns_stats.get('hits', 0)} cache hits, {dns_stats.get('misses', 0)} lookups, "
+                        f"{dns_stats.get('unresolvable', 0)} unresolvable candidates skipped")
+            politeness = http_stats.get('politeness', {})
+            logger.info(f"   • Politeness: {politeness.get('delayed_requests', 0)} requests delayed "
+                        f"({politeness.get('politeness_wait_seconds', 0)}s), {politeness.get('robots_disallowed', 0)} blocked by robots.txt")
+            host_health = http_stats.get('host_health', {})
+            if host_health.get('failures_recorded') or host_health.get('hosts_in_backoff'):
+                logger.info(f"   • Unhealthy Hosts: {host_health.get('hosts_in_backoff', 0)} in back-off, "
+                            f"{host_health.get('skipped_requests', 0)} requests skipped, "
+                            f"{host_health.get('shortened_timeouts', 0)} shortened timeouts")
+            crawler_stats = http_stats.get('crawler', {})
+            logger.info(f"   • Concurrent Page Fetches: {crawler_stats.get('pages_fetched', 0)} fetched, "
+                        f"{crawler_stats.get('pages_dropped_at_deadline', 0)} dropped at deadline")
+            page_cache_stats = self.sponsor_analyzer.page_cache_snapshot()
+            logger.info(f"   • Page Cache: {page_cache_stats['hits']} hits, {page_cache_stats['misses']} misses, "
+                        f"{page_cache_stats['revalidated']} revalidated, {page_cache_stats['bytes_downloaded'] / 1024:.0f} KB downloaded")
+            
+            if deadline:
+                logger.info("⏳ DEADLINE:")
+                logger.info(f"   • Emails Admitted: {deadline_stats['admitted']}, not admitted: {deadline_stats['not_admitted']}, "
+                            f"dropped in flight: {deadline_stats['dropped_at_deadline']}")
+                logger.info(f"   • Seconds per Email: estimated {deadline_stats['estimated_seconds_per_email']}, "
+                            f"observed {deadline_stats['observed_seconds_per_email']}")
+                logger.info(f"   • Seconds Left: {deadline_stats['seconds_left']}")
+            
+            if email_job_stats:
+                logger.info(f"📬 EMAIL JOBS ({email_job_stats['worker_id']}): {email_job_stats['claimed']} leased, "
+                            f"{email_job_stats['finished']} finished, {email_job_stats['released']} released for retry, "
+                            f"{email_job_stats['leases_lost']} leases lost, {email_job_stats['enqueued']} newly enqueued")
+            
+            logger.info("🧵 PIPELINE:")
+            for stage_name, stage_stats in pipeline_stats.items():
+                logger.info(f"   • {stage_name}: {stage_stats['processed']} items ({stage_stats['workers']} workers), "
+                            f"{stage_stats['busy_seconds']:.1f}s busy, max queue {stage_stats['max_queue']}, "
+                            f"{stage_stats['errors']} errors")
+            
             logger.info("")
             logger.info(f"⏱️  Duration: {duration:.1f}s")
             logger.info("=" * 70)
@@ -361,7 +510,19 @@ class NewsletterScraper:
                 'emails_processed': processed_emails,
                 'duration_seconds': duration,
                 'rejection_stats': rejection_stats,
-                'contact_quality_stats': contact_quality_stats
+                'contact_quality_stats': contact_quality_stats,
+                'gemini_circuit': gemini_circuit,
+                'llm_stats': llm_stats,
+                'pre_classifier_stats': pre_classifier_stats,
+                'http_stats': http_stats,
+                'page_cache_stats': page_cache_stats,
+                'contact_store_stats': contact_store_stats,
+                'dedup_stats': dedup_stats,
+                'pipeline_stats': pipeline_stats,
+                'deadline_stats': deadline_stats,
+                'email_job_stats': email_job_stats,
+                'partial': deadline_stats['partial'],
+                'pipeline_abandoned': pipeline.abandoned
             }
             
         except Exception as e:
@@ -371,54 +532,649 @@ class NewsletterScraper:
                 'new_sponsors_added': 0,
                 'need_review': 0,
                 'complete': 0,
-                'emails_processed': processed_emails,
+                'emails_processed': cycle.totals['processed_emails'],
                 'duration_seconds': time.time() - start_time,
                 'error': str(e),
-                'rejection_stats': rejection_stats if 'rejection_stats' in locals() else {}
+                'rejection_stats': rejection_stats if 'rejection_stats' in locals() else {},
+                'gemini_circuit': self.sponsor_analyzer.gemini_circuit_snapshot(),
+                'llm_stats': self.sponsor_analyzer.llm_stats_snapshot(),
+                'http_stats': self.sponsor_analyzer.http_stats_snapshot()
             }
     
-    def run_manual_analysis(self):
-        """Run analysis on pending sponsors"""
-        logger.info("Starting manual analysis of pending sponsors")
+    def _emit(self, event: str, **fields):
+        """Send a progress event to self.progress, if set (never lets a consumer error break the cycle)"""
+        if not self.progress:
+            return
+        try:
+            self.progress(dict(fields, event=event, at=datetime.utcnow().isoformat()))
+        except Exception as e:
+            logger.warning(f"Progress consumer failed on {event}: {e}")
+    
+    @staticmethod
+    def _release_jobs(cycle: _ScrapingCycle):
+        cycle.jobs.stop_heartbeat()
+        cycle.jobs.release_unfinished()
+    
+    def _start_progress_ticker(self, cycle: _ScrapingCycle) -> threading.Event:
+        """Emit running counters every PROGRESS_COUNTERS_INTERVAL_SECONDS until the returned event is set"""
+        stop = threading.Event()
+        if not self.progress:
+            return stop
+        
+        def tick():
+            while not stop.wait(PROGRESS_COUNTERS_INTERVAL_SECONDS):
+                self._emit('counters', elapsed_seconds=round(time.time() - cycle.started_at, 1), **cycle.counters())
         
-        pending_sponsors = self.db.get_pending_sponsors()
-        logger.info(f"Found {len(pending_sponsors)} pending sponsors")
+        threading.Thread(target=tick, name='progress-ticker', daemon=True).start()
+        return stop
+    
+    def _reject_sponsor(self, cycle: _ScrapingCycle, reason: str, sponsor: Dict):
+        cycle.count(cycle.rejection_stats, reason)
+        self._emit('sponsor_rejected', reason=reason, sponsor_name=sponsor.get('sponsorName'),
+                   root_domain=sponsor.get('rootDomain'))
+    
+    def _admitted_emails(self, cycle: _ScrapingCycle, email_ids: List[bytes]):
+        """Email IDs for the pipeline, for as long as the cycle budget admits them"""
+        for index, email_id in enumerate(email_ids):
+            if not cycle.budget.admit(email_id.decode()):
+                logger.info(f"⏳ Deadline near - leaving {len(email_ids) - index} email(s) for the next cycle")
+                return
+            yield email_id
+    
+    def _leased_emails(self, cycle: _ScrapingCycle, limit: int):
+        """Email UIDs leased from the shared job queue, for as long as the cycle budget admits them"""
+        for _ in range(limit):
+            uid = cycle.jobs.claim()
+            if uid is None:
+                return
+            if not cycle.budget.admit(uid):
+                cycle.jobs.release(uid)
+                logger.info("⏳ Deadline near - leaving the remaining email jobs for the next cycle or another worker")
+                return
+            yield uid.encode()
+    
+    def _save_cycle_timing(self, cycle: _ScrapingCycle, duration: float):
+        budget = cycle.budget.snapshot()
+        self.db.save_cycle_timing({
+            'emailsAdmitted': budget['admitted'],
+            'emailsProcessed': cycle.totals['processed_emails'],
+            'durationSeconds': round(duration, 2),
+            'secondsPerEmail': budget['observed_seconds_per_email'] or 0,
+            'deadlineSet': budget['deadline_set'],
+            'partial': budget['partial']
+        })
+    
+    def _build_pipeline(self, cycle: _ScrapingCycle) -> Pipeline:
+        pipeline = Pipeline(
+            'scrape',
+            on_finished=lambda item: self._finish_item(cycle, item),
+            on_error=lambda item, error: self._fail_item(cycle, item, error),
+            cancelled=cycle.cancelled
+        )
+        pipeline.add_stage('fetch', self._fetch_email, PIPELINE_FETCH_WORKERS)
+        # Enough parse workers to keep every parser process busy
+        parse_workers = max(PIPELINE_PARSE_WORKERS, EMAIL_PARSE_PROCESSES)
+        pipeline.add_stage('parse', lambda fetched: self._parse_email(cycle, fetched), parse_workers)
+        pipeline.add_stage('screen', lambda item: self._screen_link(cycle, item), PIPELINE_LINK_WORKERS)
+        # Best candidates are enriched first, so a deadline defers the low-value tail to the next cycle
+        pipeline.add_stage('enrich', lambda item: self._enrich_sponsor(cycle, item), PIPELINE_ENRICH_WORKERS,
+                           queue_size=PIPELINE_ENRICH_QUEUE_SIZE, priority=lambda item: item.priority)
+        pipeline.add_stage('persist', lambda item: self._persist_sponsor(cycle, item), PIPELINE_PERSIST_WORKERS)
+        return pipeline
+    
+    def _fetch_email(self, email_id: bytes) -> List[Tuple[bytes, bytes]]:
+        """Pipeline stage: download one email over IMAP (parsing happens in the next stage)"""
+        raw_email = self.email_processor.fetch_raw_email(email_id)
+        return [(email_id, raw_email)] if raw_email else []
+    
+    def _parse_email(self, cycle: _ScrapingCycle, fetched: Tuple[bytes, bytes]) -> List[_LinkItem]:
+        """Pipeline stage: sponsor sections of one email -> one item per sponsor link"""
+        rejection_stats = cycle.rejection_stats
+        if cycle.budget.expired():
+            cycle.budget.dropped(fetched[0].decode())
+            return []
+        email_data = self.email_processor.parse_email(*fetched)
+        
+        # Check if email has sponsor indicators
+        if not self.email_processor.has_sponsor_indicators(email_data):
+            cycle.count(rejection_stats, 'emails_without_sponsor_indicators')
+            self._emit('email_skipped', email_id=email_data['id'], reason='emails_without_sponsor_indicators')
+            self._finish_job(cycle, email_data['id'])
+            return []
+        
+        # Extract newsletter name
+        newsletter_name = self.email_processor.get_newsletter_name(email_data)
+        
+        # Cache subscriber count for this newsletter (query DB once per newsletter)
+        if newsletter_name and newsletter_name not in cycle.newsletter_subscriber_cache:
+            cached_count = self.db.get_max_subscriber_count_for_newsletter(newsletter_name)
+            cycle.newsletter_subscriber_cache[newsletter_name] = cached_count
+            if cached_count > 0:
+                logger.info(f"📊 Cached subscriber count for '{newsletter_name}': {cached_count:,}")
+        
+        # Extract sponsor sections with confidence scoring
+        sponsor_sections = self.email_processor.process_sponsor_sections_with_confidence(email_data)
+        
+        if not sponsor_sections:
+            cycle.count(rejection_stats, 'emails_without_sponsor_sections')
+            self._emit('email_skipped', email_id=email_data['id'], reason='emails_without_sponsor_sections')
+            self._finish_job(cycle, email_data['id'])
+            return []
+        
+        cycle.count(rejection_stats, 'total_sections_found', len(sponsor_sections))
+        
+        # Resolve all candidate hosts up front (in parallel); unresolvable ones are skipped later
+        self.sponsor_analyzer.pre_resolve_sections(sponsor_sections)
+        
+        ticket = _EmailTicket(email_data['id'])
+        cached_subscriber_count = cycle.newsletter_subscriber_cache.get(newsletter_name, 0)
+        items = []
+        for section in sponsor_sections:
+            # Skip rejected sections
+            if section.get('processing_status') == 'rejected':
+                cycle.count(rejection_stats, 'sections_rejected_low_confidence')
+                continue
+            for link in section.get('links', []):
+                items.append(_LinkItem(ticket, link, section, newsletter_name, cached_subscriber_count))
+        
+        ticket.pending = ticket.links = len(items)
+        if not items:
+            self._complete_email(cycle, ticket)
+        return items
+    
+    def _screen_link(self, cycle: _ScrapingCycle, item: _LinkItem) -> List[_LinkItem]:
+        """Pipeline stage: local checks on a sponsor link before any network work"""
+        item.candidate = self.sponsor_analyzer.screen_link(
+            item.link, item.section.get('section_text', ''), item.newsletter_name, item.cached_subscriber_count
+        )
+        if not item.candidate:
+            return []
+        root_domain = item.candidate.get('root_domain')
+        if root_domain:
+            with item.ticket.lock:
+                duplicate = root_domain in item.ticket.domains
+                item.ticket.domains.add(root_domain)
+            if duplicate:
+                # Another link in the same email already stands for this sponsor
+                logger.debug(f"Skipping duplicate link to {root_domain} in email {item.ticket.email_id}")
+                return []
+        known_in_db = bool(root_domain and self.db.get_sponsor_by_domain(root_domain))
+        item.priority = self.sponsor_analyzer.candidate_priority(
+            item.candidate, item.section.get('confidence_score', 0.0), known_in_db
+        )
+        return [item]
+    
+    def _enrich_sponsor(self, cycle: _ScrapingCycle, item: _LinkItem) -> List[_LinkItem]:
+        """Pipeline stage: website/Gemini enrichment (once per root domain) and validation of a screened sponsor"""
+        if cycle.budget.expired():
+            # Past the cycle deadline: don't start website/Gemini work; the email is retried next cycle
+            item.ticket.deferred = True
+            cycle.budget.dropped(item.ticket.email_id)
+            return []
+        
+        enrichment, first = cycle.claim_domain(item.candidate.get('root_domain'))
+        if not first:
+            # Another link in this cycle is enriching this domain: wait on its slot, not on a worker
+            if enrichment.park(item):
+                return HELD
+            return self._reuse_enrichment(cycle, item, enrichment)
+        
+        try:
+            results = self._enrich_domain(cycle, item, enrichment)
+        except Exception:
+            for waiter in enrichment.complete():
+                self._finish_item(cycle, waiter)
+            raise
+        if results:
+            # Parked links stay parked until this one is persisted, so they never reach the record first
+            item.enrichment = enrichment
+            return results
+        # Nothing to persist for this link: the parked ones go on by themselves
+        resumed = self._resume_waiters(cycle, enrichment)
+        if resumed:
+            # Handing on other items means the pipeline won't finish this one
+            self._finish_item(cycle, item)
+        return resumed
+    
+    def _resume_waiters(self, cycle: _ScrapingCycle, enrichment: _DomainEnrichment) -> List[_LinkItem]:
+        """Complete the domain's slot; its parked links that still have something to save"""
+        resumed = []
+        for waiter in enrichment.complete():
+            try:
+                results = self._reuse_enrichment(cycle, waiter, enrichment)
+            except Exception as e:
+                results = []
+                self._fail_item(cycle, waiter, e)
+            if results:
+                resumed.extend(results)
+            else:
+                self._finish_item(cycle, waiter)
+        return resumed
+    
+    def _enrich_domain(self, cycle: _ScrapingCycle, item: _LinkItem, enrichment: _DomainEnrichment) -> List[_LinkItem]:
+        """The first link to a root domain: enrich it and keep the outcome for the others"""
+        enrichment.enriched = self.sponsor_analyzer.enrich_candidate(item.candidate)
+        if not enrichment.enriched:
+            return []
+        cycle.count(cycle.dedup_stats, 'domains_enriched')
+        results = self._validate_sponsor(cycle, item, copy.deepcopy(enrichment.enriched))
+        if results and item.existing:
+            enrichment.enriched_existing = True
+        elif results:
+            # Snapshot before persistence mutates it
+            enrichment.analyzed = copy.deepcopy(item.sponsor)
+        return results
+    
+    def _reuse_enrichment(self, cycle: _ScrapingCycle, item: _LinkItem, enrichment: _DomainEnrichment) -> List[_LinkItem]:
+        """A later link to an enriched domain: reuse the first link's result instead of redoing it"""
+        if not enrichment.enriched:
+            return []
+        if enrichment.enriched_existing:
+            # The first link already sent this contact info to the existing sponsor
+            logger.info(f"♻️ {item.candidate.get('root_domain')} was already enriched this cycle - "
+                        f"nothing to add for {item.newsletter_name}")
+            return []
+        item.reused = True
+        item.shared = enrichment.analyzed is not None
+        sponsor = self.sponsor_analyzer.fan_out_enrichment(enrichment.analyzed or enrichment.enriched, item.candidate)
+        logger.info(f"♻️ Reusing this cycle's enrichment of {sponsor.get('rootDomain')} for {item.newsletter_name}")
+        return self._validate_sponsor(cycle, item, sponsor)
+    
+    def _validate_sponsor(self, cycle: _ScrapingCycle, item: _LinkItem, sponsor: Dict) -> List[_LinkItem]:
+        """Validation and Gemini analysis of an enriched sponsor (shared items only need the per-newsletter checks)"""
+        rejection_stats = cycle.rejection_stats
+        cycle.count(rejection_stats, 'total_sponsors_analyzed')
+        sponsor_name = sponsor.get('sponsorName', 'Unknown')
+        sponsor_domain = sponsor.get('rootDomain', 'Unknown')
+        newsletter_name = item.newsletter_name
+        
+        logger.info(f"🔍 Processing sponsor: {sponsor_name} ({sponsor_domain})")
+        
+        # 1. VALIDATION: Check if domain is denied
+        if self.db.is_domain_denied(sponsor['rootDomain']):
+            logger.info(f"❌ REJECTED: Domain denied - {sponsor_domain}")
+            self._reject_sponsor(cycle, 'domains_denied', sponsor)
+            return []
+        
+        # 2. VALIDATION: Check for self-reference (newsletter advertising itself)
+        newsletter_domain = self.sponsor_analyzer._extract_newsletter_domain(newsletter_name)
+        if newsletter_domain and sponsor['rootDomain'].lower() == newsletter_domain.lower():
+            logger.info(f"❌ REJECTED: Self-reference - {sponsor_domain}")
+            self._reject_sponsor(cycle, 'self_reference_skipped', sponsor)
+            return []
+        
+        if item.shared:
+            # The domain's record comes from the first link; this link adds its newsletter to it
+            item.sponsor = sponsor
+            return [item]
+        
+        # 3. VALIDATION: Check if sponsor already exists
+        existing = self.db.get_sponsor_by_domain(sponsor['rootDomain'])
+        if existing:
+            logger.info(f"ℹ️ Sponsor already exists: {sponsor_domain} (ID: {existing.get('_id', 'N/A')})")
+            # If existing sponsor has no contact info, try to enrich it
+            if existing.get('contactMethod') == 'none' and sponsor.get('contactMethod') != 'none':
+                item.sponsor = sponsor
+                item.existing = existing
+                return [item]
+            logger.info(f"ℹ️ Sponsor already exists with contact info - skipping")
+            self._reject_sponsor(cycle, 'already_exists', sponsor)
+            return []
+        
+        # 4. VALIDATION: Mandatory contact info requirement - RELAXED
+        # CHANGED: Allow sponsors without contact info to be saved as pending
+        # If they passed legitimacy checks, they're likely sponsors - save them for manual review
+        # No longer rejecting here - let them be saved with pending status
+        if not sponsor.get('sponsorEmail'):
+            logger.info(f"⚠️ No contact info for {sponsor_name}, but saving as pending for manual review")
+            # Don't increment rejection_stats - this is intentional, not a rejection
+        
+        # 6. VALIDATION: Subscriber estimate - if missing, mark as pending but still save
+        estimated_subs = sponsor.get('estimatedSubscribers', 0)
+        if not estimated_subs or estimated_subs <= 0:
+            logger.info(f"⚠️ No subscriber estimate for {sponsor_name} (estimated: {estimated_subs}) - marking as pending")
+            sponsor['estimatedSubscribers'] = 0  # Set to 0 so it doesn't cause issues
+            sponsor['analysisStatus'] = 'pending'  # Mark for manual review
+            # Don't reject - save as pending for manual review
+        
+        logger.info(f"✅ Sponsor passed all validations: {sponsor_name}")
+        
+        # Add confidence and processing status from section
+        sponsor['confidence'] = item.section.get('confidence_score', 0)
+        sponsor['processing_status'] = item.section.get('processing_status', 'unknown')
+        
+        # Set analysis status based on contact info (email only now)
+        if sponsor.get('sponsorEmail'):
+            sponsor['analysisStatus'] = 'complete'
+            sponsor['confidence'] = max(sponsor.get('confidence', 0), 0.8)
+        else:
+            sponsor['analysisStatus'] = 'pending'
+            sponsor['confidence'] = max(sponsor.get('confidence', 0), 0.5)
+        
+        # Optional: Use Gemini for final analysis (sponsor data enhancement)
+        # Note: Email finding already happens in _scrape_website_info (Gemini first, then web scraping)
+        raise_if_cancelled(f"Analysis of {sponsor_domain}")
+        if self.sponsor_analyzer.gemini_model:
+            sponsor = self.sponsor_analyzer.gemini_analyze_sponsor(sponsor)
         
-        for sponsor in pending_sponsors:
+        item.sponsor = sponsor
+        return [item]
+    
+    def _persist_sponsor(self, cycle: _ScrapingCycle, item: _LinkItem) -> List[_LinkItem]:
+        """Pipeline stage: save a new sponsor/affiliate, or add contact info to an existing sponsor"""
+        try:
+            self._save_sponsor(cycle, item)
+        except Exception:
+            if item.enrichment:
+                for waiter in item.enrichment.complete():
+                    self._finish_item(cycle, waiter)
+            raise
+        if item.enrichment:
+            # The domain's record is written: links parked behind this one add their newsletters to it, in order
+            for waiter in self._resume_waiters(cycle, item.enrichment):
+                try:
+                    self._save_sponsor(cycle, waiter)
+                except Exception as e:
+                    self._fail_item(cycle, waiter, e)
+                self._finish_item(cycle, waiter)
+        return []
+    
+    def _save_sponsor(self, cycle: _ScrapingCycle, item: _LinkItem):
+        rejection_stats = cycle.rejection_stats
+        contact_quality_stats = cycle.contact_quality_stats
+        sponsor = item.sponsor
+        sponsor_name = sponsor.get('sponsorName', 'Unknown')
+        sponsor_domain = sponsor.get('rootDomain', 'Unknown')
+        newsletter_name = item.newsletter_name
+        raise_if_cancelled(f"Saving {sponsor_domain}")
+        
+        if item.existing:
             try:
-                # Re-analyze with Gemini (includes email finding in STEP 1)
-                if self.sponsor_analyzer.gemini_model:
-                    updated_sponsor = self.sponsor_analyzer.gemini_analyze_sponsor(sponsor)
+                logger.info(f"💎 Enriching existing sponsor with contact info: {sponsor.get('sponsorEmail')}")
+                # Update existing record with new contact info
+                update_data = {
+                    'sponsorEmail': sponsor.get('sponsorEmail'),
+                    'contactMethod': sponsor.get('contactMethod'),
+                    'contactPersonName': sponsor.get('contactPersonName'),
+                    'contactPersonTitle': sponsor.get('contactPersonTitle'),
+                    'contactType': sponsor.get('contactType'),
+                    'confidence': sponsor.get('confidence'),
+                    'lastAnalyzed': datetime.utcnow()
+                }
+                self.db.update_sponsor(str(item.existing['_id']), update_data)
+                cycle.count(rejection_stats, 'enriched_existing')
+                if item.reused:
+                    cycle.count(cycle.dedup_stats, 'enrichments_saved')
+                logger.info(f"✅ Successfully enriched sponsor: {sponsor_name}")
+                self._emit('sponsor_saved', kind='enriched_existing', sponsor_name=sponsor_name, root_domain=sponsor_domain,
+                           id=str(item.existing['_id']), contact_type=sponsor.get('contactType'))
+            except Exception as e:
+                logger.error(f"❌ Failed to enrich sponsor {sponsor_name}: {e}")
+                self._reject_sponsor(cycle, 'save_failed', sponsor)
+            return
+        
+        if item.shared:
+            try:
+                # Appends this newsletter's entry (name, audience, tags) to the domain's record
+                if sponsor.get('isAffiliateProgram'):
+                    record_id, added = self.db.upsert_affiliate(self._affiliate_record(sponsor, newsletter_name))
+                else:
+                    record_id, added = self.db.upsert_sponsor(sponsor)
+                if added:
+                    cycle.count(cycle.dedup_stats, 'enrichments_saved')
+                    cycle.count(cycle.dedup_stats, 'newsletter_entries_added')
+                    self._emit('sponsor_saved', kind='newsletter_entry', sponsor_name=sponsor_name,
+                               root_domain=sponsor_domain, id=str(record_id), newsletter_name=newsletter_name)
                 else:
-                    updated_sponsor = sponsor
+                    logger.info(f"ℹ️ {newsletter_name} is already listed for {sponsor_domain}")
+            except Exception as e:
+                logger.error(f"❌ Failed to add newsletter {newsletter_name} to {sponsor_domain}: {e}")
+                self._reject_sponsor(cycle, 'save_failed', sponsor)
+            return
+        
+        # Track contact quality metrics
+        cycle.count(contact_quality_stats, 'total_sponsors_processed')
+        contact_type = sponsor.get('contactType', 'not_found')
+        if contact_type == 'named_person':
+            cycle.count(contact_quality_stats, 'named_person_found')
+        elif contact_type == 'business_email':
+            cycle.count(contact_quality_stats, 'business_email_found')
+        elif contact_type == 'generic_email':
+            cycle.count(contact_quality_stats, 'generic_email_found')
+        elif not sponsor.get('sponsorEmail'):
+            cycle.count(contact_quality_stats, 'no_contact_found')
+        if sponsor.get('pendingGeminiEnrichment'):
+            cycle.count(contact_quality_stats, 'pending_gemini_enrichment')
+        
+        # Save to database - route to affiliates or sponsors collection
+        try:
+            logger.info(f"💾 Attempting to save sponsor: {sponsor_name} to database...")
+            # Check if this is an affiliate program
+            if sponsor.get('isAffiliateProgram'):
+                logger.info(f"📦 Detected affiliate program: {sponsor_name}")
+                # Convert to affiliate format
+                affiliate_data = self._affiliate_record(sponsor, newsletter_name)
+                # Save to affiliates collection
+                affiliate_id = self.db.create_affiliate(affiliate_data)
+                logger.info(f"✅ Saved affiliate program: {sponsor_name} (ID: {affiliate_id})")
+                cycle.count(cycle.totals, 'total_sponsors')
+                if item.reused:
+                    cycle.count(cycle.dedup_stats, 'enrichments_saved')
+                self._emit('sponsor_saved', kind='affiliate', sponsor_name=sponsor_name, root_domain=sponsor_domain,
+                           id=str(affiliate_id), status=affiliate_data.get('status'))
                 
-                # Update in database
-                self.db.update_sponsor(str(sponsor['_id']), updated_sponsor)
-                logger.info(f"Updated sponsor: {sponsor.get('sponsorName', 'Unknown')}")
+                # Track if this new affiliate needs review (pending status)
+                if affiliate_data.get('status') == 'pending':
+                    cycle.count(cycle.totals, 'new_pending_sponsors')
+            else:
+                # Save to sponsors collection (existing logic)
+                logger.info(f"💾 Saving sponsor to database: {sponsor_name} (domain: {sponsor_domain})")
+                logger.info(f"   Contact: {sponsor.get('sponsorEmail', 'None')}")
+                logger.info(f"   Contact Type: {sponsor.get('contactType', 'None')}")
+                logger.info(f"   Estimated Subs: {sponsor.get('estimatedSubscribers', 0)}")
+                sponsor_id = self.db.create_sponsor(sponsor)
+                logger.info(f"✅ Successfully saved sponsor: {sponsor_name} (ID: {sponsor_id})")
+                cycle.count(cycle.totals, 'total_sponsors')
+                if item.reused:
+                    cycle.count(cycle.dedup_stats, 'enrichments_saved')
+                self._emit('sponsor_saved', kind='sponsor', sponsor_name=sponsor_name, root_domain=sponsor_domain,
+                           id=str(sponsor_id), status=sponsor.get('analysisStatus'), contact_type=sponsor.get('contactType'))
+                
+                # Track if this new sponsor needs review (pending status)
+                if sponsor.get('analysisStatus') == 'pending':
+                    cycle.count(cycle.totals, 'new_pending_sponsors')
+                
+        except Exception as e:
+            logger.error(f"❌ Failed to save sponsor/affiliate {sponsor_name}: {e}")
+            logger.error(f"   Error type: {type(e).__name__}")
+            logger.error(f"   Sponsor data keys: {list(sponsor.keys())}")
+            import traceback
+            logger.error(f"   Traceback: {traceback.format_exc()}")
+            self._reject_sponsor(cycle, 'save_failed', sponsor)
+    
+    def _affiliate_record(self, sponsor: Dict, newsletter_name: str) -> Dict:
+        return {
+            'affiliateName': sponsor['sponsorName'],
+            'affiliateLink': sponsor['sponsorLink'],
+            'rootDomain': sponsor['rootDomain'],
+            'tags': sponsor.get('tags', []),
+            'affiliatedNewsletters': [{
+                'newsletterName': newsletter_name,
+                'estimatedAudience': sponsor.get('estimatedSubscribers', 0),
+                'contentTags': sponsor.get('tags', []),
+                'dateAffiliated': datetime.utcnow(),
+                'emailAddress': sponsor.get('sponsorEmail', '')
+            }],
+            'commissionInfo': sponsor.get('affiliateSignupLink', ''),
+            'status': 'pending'
+        }
+    
+    def _finish_item(self, cycle: _ScrapingCycle, item):
+        """An item left the pipeline; once all links of an email are through, the email is done"""
+        if isinstance(item, tuple):
+            # Dropped by the parse stage (no sponsor content): the email costs what it took to get here
+            cycle.budget.finished(item[0].decode())
+        if not isinstance(item, _LinkItem):
+            return
+        ticket = item.ticket
+        with ticket.lock:
+            ticket.pending -= 1
+            done = ticket.pending == 0 and not ticket.failed and not ticket.deferred
+        if done:
+            self._complete_email(cycle, ticket)
+    
+    def _fail_item(self, cycle: _ScrapingCycle, item, error: Exception):
+        """A stage raised: the email stays unread (retried next cycle), counted once per email"""
+        if isinstance(item, _LinkItem):
+            with item.ticket.lock:
+                first_failure = not item.ticket.failed
+                item.ticket.failed = True
+            email_id = item.ticket.email_id
+        else:
+            first_failure = True
+            # Raw email ID (fetch stage) or (email ID, RFC822 bytes) (parse stage)
+            email_id = item[0] if isinstance(item, tuple) else item
+        logger.error(f"Failed to process email {email_id}: {error}")
+        if first_failure:
+            cycle.count(cycle.rejection_stats, 'email_processing_errors')
+    
+    def _complete_email(self, cycle: _ScrapingCycle, ticket: _EmailTicket):
+        if cycle.cancelled.is_set():
+            # Abandoned at the deadline: left unread (and its lease released) for the next cycle
+            return
+        # Mark email as read
+        self.email_processor.mark_email_as_read(ticket.email_id)
+        cycle.count(cycle.totals, 'processed_emails')
+        cycle.budget.finished(ticket.email_id)
+        self._finish_job(cycle, ticket.email_id)
+        self._emit('email_processed', email_id=ticket.email_id, sponsor_links=ticket.links)
+    
+    def _finish_job(self, cycle: _ScrapingCycle, email_id: str):
+        """The email's effects are committed: its shared job is done (jobs not finished are released for retry)"""
+        if cycle.jobs and not cycle.cancelled.is_set():
+            cycle.jobs.finish(email_id)
+    
+    def run_manual_analysis(self, deadline: Optional[float] = None, page_size: int = MANUAL_ANALYSIS_PAGE_SIZE) -> Dict:
+        """
+        Re-analyze pending sponsors, oldest lastAnalyzed first, one page at a time. Each page is
+        analyzed concurrently and written back in one bulk write holding only the fields that
+        changed plus lastAnalyzed. lastAnalyzed is also the checkpoint: processed sponsors move to
+        the back of the queue, so a run stopped by its deadline or an open Gemini circuit is
+        picked up where it left off by the next one.
+        """
+        logger.info("Starting manual analysis of pending sponsors")
+        started_at = datetime.utcnow()
+        stats = {'pages': 0, 'analyzed': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'stopped': None}
+        
+        with ThreadPoolExecutor(max_workers=MANUAL_ANALYSIS_WORKERS, thread_name_prefix='manual-analysis') as executor:
+            while True:
+                if deadline and time.time() >= deadline:
+                    stats['stopped'] = 'deadline'
+                    break
+                if self.sponsor_analyzer.gemini_model and not self.sponsor_analyzer._gemini_available():
+                    # Analyzing now would only flag everything for Gemini enrichment again
+                    stats['stopped'] = 'gemini_circuit_open'
+                    break
+                page = self.db.get_pending_sponsors_page(started_at, page_size)
+                if not page:
+                    break
+                stats['pages'] += 1
                 
+                results = [result for result in executor.map(lambda sponsor: self._reanalyze_sponsor(sponsor, deadline), page)
+                           if result]
+                for _, _, outcome in results:
+                    stats[outcome] += 1
+                stats['analyzed'] += len(results)
+                try:
+                    self.db.bulk_update_sponsors([(sponsor_id, fields) for sponsor_id, fields, _ in results])
+                except Exception:
+                    stats['stopped'] = 'write_failed'
+                    break
+                logger.info(f"Manual analysis page {stats['pages']}: {len(results)} sponsors analyzed")
+                if len(results) < len(page):
+                    # The deadline came mid-page; the rest keep their place at the front of the queue
+                    stats['stopped'] = 'deadline'
+                    break
+        
+        logger.info(f"Manual analysis finished: {stats['analyzed']} analyzed ({stats['updated']} updated, "
+                    f"{stats['unchanged']} unchanged, {stats['failed']} failed) in {stats['pages']} pages"
+                    + (f" - stopped: {stats['stopped']}" if stats['stopped'] else ""))
+        return stats
+    
+    def _reanalyze_sponsor(self, sponsor: Dict, deadline: Optional[float]) -> Optional[Tuple[object, Dict, str]]:
+        """(sponsor _id, changed fields, outcome) for one pending sponsor, or None if past the deadline"""
+        if deadline and time.time() >= deadline:
+            return None
+        original = copy.deepcopy(sponsor)
+        try:
+            # Re-analyze with Gemini (includes email finding in STEP 1)
+            if self.sponsor_analyzer.gemini_model:
+                updated_sponsor = self.sponsor_analyzer.gemini_analyze_sponsor(sponsor)
+            else:
+                updated_sponsor = sponsor
+                if not sponsor.get('sponsorEmail'):
+                    self.sponsor_analyzer.apply_stored_contact(updated_sponsor, sponsor.get('rootDomain'))
+            changes = {key: value for key, value in updated_sponsor.items()
+                       if key != '_id' and (key not in original or original[key] != value)}
+            outcome = 'updated' if changes else 'unchanged'
+            if changes:
+                logger.info(f"Updated sponsor: {sponsor.get('sponsorName', 'Unknown')} ({', '.join(sorted(changes))})")
+        except Exception as e:
+            logger.error(f"Failed to analyze sponsor {sponsor.get('_id')}: {e}")
+            changes = {'lastAnalysisError': str(e)}
+            outcome = 'failed'
+        # Always moves the sponsor behind the rest of the backlog, failed ones included
+        changes['lastAnalyzed'] = datetime.utcnow()
+        return sponsor['_id'], changes, outcome
+    
+    def refresh_domain_contacts(self, limit: int = DOMAIN_CONTACT_REFRESH_BATCH):
+        """Re-run contact discovery for stored domains whose result is due for a refresh"""
+        stale = self.db.get_stale_domain_contacts(limit)
+        logger.info(f"Refreshing contacts for {len(stale)} domain(s)")
+        
+        for doc in stale:
+            domain = doc['rootDomain']
+            try:
+                self.sponsor_analyzer._scrape_website_info(
+                    f"https://{domain}", domain, None, doc.get('companyName'), use_store=False
+                )
             except Exception as e:
-                logger.error(f"Failed to analyze sponsor {sponsor.get('_id')}: {e}")
+                logger.error(f"Failed to refresh contacts for {domain}: {e}")
                 continue
     
     def start_scheduler(self):
         """Start the scheduled scraper"""
         logger.info("Starting newsletter scraper scheduler")
         
-        # Schedule every 30 minutes scraping
+        # Schedule every 30 minutes scraping; a tick while a cycle is still running is merged
+        # into one (other processes are kept out by the run lock in run_scraping_cycle)
         self.scheduler.add_job(
             func=self.run_scraping_cycle,
             trigger=IntervalTrigger(minutes=30),
             id='half_hourly_scraping',
             name='Half-Hourly Newsletter Scraping',
-            replace_existing=True
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
         
-        # Schedule daily manual analysis
+        # Schedule daily manual analysis, time-boxed; unfinished sponsors are first in line the next night
         self.scheduler.add_job(
-            func=self.run_manual_analysis,
+            func=lambda: self.run_manual_analysis(deadline=time.time() + MANUAL_ANALYSIS_MAX_SECONDS),
             trigger=CronTrigger(hour=2, minute=0),  # 2 AM daily
             id='daily_analysis',
             name='Daily Manual Analysis',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Schedule daily refresh of stored contact discovery results
+        self.scheduler.add_job(
+            func=self.refresh_domain_contacts,
+            trigger=CronTrigger(hour=3, minute=0),  # 3 AM daily
+            id='domain_contact_refresh',
+            name='Daily Domain Contact Refresh',
             replace_existing=True
         )
         
@@ -465,6 +1221,7 @@ class NewsletterScraper:
         """Cleanup resources"""
         try:
             self.email_processor.disconnect()
+            self.sponsor_analyzer.close()
             self.db.close()
             logger.info("Cleanup completed")
         except Exception as e:
@@ -472,10 +1229,10 @@ class NewsletterScraper:
 
 def main():
     """Main entry point"""
-    scraper = NewsletterScraper()
-    
     import sys
-    if len(sys.argv) > 1 and sys.argv[1] == '--once':
+    scraper = NewsletterScraper(preflight='--preflight' in sys.argv[1:])
+    
+    if '--once' in sys.argv[1:]:
         # Run once for testing
         scraper.run_once()
     else:
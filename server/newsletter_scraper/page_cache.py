@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+
+from config import PAGE_CACHE_MAX_BYTES, PAGE_CACHE_DIR, PAGE_CACHE_DISK_TTL_SECONDS
+from page_extractor import PageExtract, declared_charset, extract_page
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = ('utm_', 'ref', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+
+
+def normalize_url(url: str) -> str:
+    """Cache key: lowercase scheme/host, no default port, fragment or tracking params, '/' for empty path"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower() or 'https'
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    path = parsed.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((scheme, host, path, '', query, ''))
+
+
+class CachedPage:
+    """A fetched page: raw bytes, status, validators and a lazily built (shared, read-only) extract"""
+
+    def __init__(self, url: str, status_code: int, content: bytes,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 fetched_at: Optional[float] = None, stopped_early: bool = False,
+                 encoding: Optional[str] = None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        # Charset from the Content-Type header (None if not declared; the extractor then checks <meta charset>)
+        self.encoding = encoding
+        # Reading stopped at a footer/mailto marker - fine for that caller, incomplete for anyone else
+        self.stopped_early = stopped_early
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at or time.time()
+        self._extract = None
+        self._extract_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    @property
+    def extract(self) -> PageExtract:
+        # Extracted once per page in a single parser pass; callers only read from it
+        with self._extract_lock:
+            if self._extract is None:
+                self._extract = extract_page(self.content, self.encoding)
+            return self._extract
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+    @classmethod
+    def from_response(cls, url: str, response) -> 'CachedPage':
+        return cls(url, response.status_code, response.content,
+                   etag=response.headers.get('ETag'),
+                   last_modified=response.headers.get('Last-Modified'),
+                   stopped_early=getattr(response, 'stopped_early', False),
+                   encoding=declared_charset(response.headers))
+
+
+class PageCache:
+    """
+    Fetched-page cache keyed by normalised URL.
+
+    Memory tier: LRU bounded by total body bytes, cleared at the start of every
+    scraping cycle so a sponsor homepage is downloaded and parsed once per cycle
+    no matter how many analyzer steps read it.
+    Disk tier (optional, PAGE_CACHE_DIR): persists successful pages across runs.
+    Entries with an ETag/Last-Modified are revalidated with a conditional GET;
+    entries without validators are reused until PAGE_CACHE_DISK_TTL_SECONDS.
+    """
+
+    def __init__(self, fetcher, max_bytes: int = PAGE_CACHE_MAX_BYTES,
+                 cache_dir: Optional[str] = PAGE_CACHE_DIR, disk_ttl: float = PAGE_CACHE_DISK_TTL_SECONDS):
+        self.fetcher = fetcher
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir or None
+        self.disk_ttl = disk_ttl
+        self._pages: 'OrderedDict[str, CachedPage]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = self._empty_stats()
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'hits': 0, 'misses': 0, 'disk_hits': 0, 'revalidated': 0, 'evictions': 0, 'bytes_downloaded': 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def get(self, url: str, timeout: float = 5, stop_at: Optional[Tuple[str, ...]] = None) -> CachedPage:
+        """
+        Return the page for url, fetching (or revalidating) only when it isn't cached.
+        stop_at lets callers that only need emails/footer links stop the download early;
+        a page cached that way is refetched in full for callers that need the whole page.
+        """
+        key = normalize_url(url)
+
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None and (not page.stopped_early or stop_at):
+                self._pages.move_to_end(key)
+                self.stats['hits'] += 1
+                return page
+
+        self._count('misses')
+        stored = self._load_disk(key)
+        headers = {}
+        if stored is not None:
+            if not stored.etag and not stored.last_modified:
+                if time.time() - stored.fetched_at < self.disk_ttl:
+                    self._count('disk_hits')
+                    self._remember(key, stored)
+                    return stored
+            else:
+                if stored.etag:
+                    headers['If-None-Match'] = stored.etag
+                if stored.last_modified:
+                    headers['If-Modified-Since'] = stored.last_modified
+
+        response = self.fetcher.fetch_page(url, timeout=timeout, stop_at=stop_at, headers=headers or None)
+        if stored is not None and response.status_code == 304:
+            self._count('revalidated')
+            stored.fetched_at = time.time()
+            self._save_disk(key, stored)
+            self._remember(key, stored)
+            return stored
+
+        page = CachedPage.from_response(url, response)
+        self._count('bytes_downloaded', page.size)
+        self._remember(key, page)
+        if page.status_code < 400 and not page.stopped_early:
+            self._save_disk(key, page)
+        return page
+
+    def _remember(self, key: str, page: CachedPage):
+        if page.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._pages[key] = page
+            self._bytes += page.size
+            while self._bytes > self.max_bytes and self._pages:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats['evictions'] += 1
+
+    def _disk_paths(self, key: str):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json"), os.path.join(self.cache_dir, f"{digest}.html")
+
+    def _load_disk(self, key: str) -> Optional[CachedPage]:
+        if not self.cache_dir:
+            return None
+        meta_path, body_path = self._disk_paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+            return CachedPage(meta['url'], meta['status_code'], content, meta.get('etag'),
+                              meta.get('last_modified'), meta.get('fetched_at'), encoding=meta.get('charset'))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable page cache entry for {key}: {e}")
+            return None
+
+    def _save_disk(self, key: str, page: CachedPage):
+        if not self.cache_dir:
+            return
+        meta_path, body_path = self._disk_paths(key)
+        try:
+            with open(body_path, 'wb') as f:
+                f.write(page.content)
+            with open(meta_path, 'w') as f:
+                json.dump({'url': page.url, 'status_code': page.status_code, 'etag': page.etag,
+                           'last_modified': page.last_modified, 'fetched_at': page.fetched_at,
+                           'charset': page.encoding}, f)
+        except Exception as e:
+            logger.debug(f"Failed to write page cache entry for {key}: {e}")
+
+    def clear(self):
+        """Drop the in-memory tier (disk entries are kept for revalidation next run)"""
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = self._empty_stats()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pages'] = len(self._pages)
+            stats['bytes_cached'] = self._bytes
+        stats['disk_enabled'] = bool(self.cache_dir)
+        return stats
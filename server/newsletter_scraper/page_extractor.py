@@ -0,0 +1,155 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=..."> near the top of the page
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+META_SNIFF_BYTES = 4096
+
+# Elements whose text is never visible
+INVISIBLE_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+
+class PageExtract:
+    """
+    The artifacts the analyzer reads from a sponsor web page.
+
+    links / footer_links / nav_links are (href, link text) pairs in document order;
+    text is the visible text with whitespace-separated text nodes; mailtos are the
+    addresses from mailto: links.
+    """
+
+    def __init__(self):
+        self.title = ''
+        self.description = ''
+        self.links: List[Tuple[str, str]] = []
+        self.footer_links: List[Tuple[str, str]] = []
+        self.nav_links: List[Tuple[str, str]] = []
+        self.mailtos: List[str] = []
+        self.text = ''
+
+
+class _ExtractingParser(HTMLParser):
+    """Single pass over the HTML; keeps counters for open footer/nav/invisible elements instead of a tree"""
+
+    def __init__(self, extract: PageExtract):
+        super().__init__(convert_charrefs=True)
+        self.extract = extract
+        self.text_parts: List[str] = []
+        self.title_parts: List[str] = []
+        self.in_title = False
+        self.invisible_depth = 0
+        self.footer_depth = 0
+        self.nav_depth = 0
+        self.link_href: Optional[str] = None
+        self.link_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in INVISIBLE_TAGS:
+            self.invisible_depth += 1
+        elif tag == 'title':
+            self.in_title = True
+        elif tag == 'meta':
+            attributes = dict(attrs)
+            if (attributes.get('name') or '').lower() == 'description' and not self.extract.description:
+                self.extract.description = (attributes.get('content') or '').strip()
+        elif tag == 'footer':
+            self.footer_depth += 1
+        elif tag == 'nav':
+            self.nav_depth += 1
+        elif tag == 'a':
+            self._close_link()
+            href = dict(attrs).get('href')
+            if href is not None:
+                self.link_href = href
+                self.link_parts = []
+                if href.lower().startswith('mailto:'):
+                    address = href[len('mailto:'):].split('?')[0].strip()
+                    if address:
+                        self.extract.mailtos.append(address)
+
+    def handle_endtag(self, tag):
+        if tag in INVISIBLE_TAGS:
+            self.invisible_depth = max(0, self.invisible_depth - 1)
+        elif tag == 'title':
+            self.in_title = False
+            if not self.extract.title:
+                self.extract.title = ''.join(self.title_parts).strip()
+        elif tag == 'a':
+            self._close_link()
+        elif tag == 'footer':
+            self._close_link()
+            self.footer_depth = max(0, self.footer_depth - 1)
+        elif tag == 'nav':
+            self._close_link()
+            self.nav_depth = max(0, self.nav_depth - 1)
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+            return
+        if self.invisible_depth:
+            return
+        self.text_parts.append(data)
+        if self.link_href is not None:
+            self.link_parts.append(data)
+
+    def _close_link(self):
+        if self.link_href is None:
+            return
+        link = (self.link_href, ''.join(self.link_parts).strip())
+        self.extract.links.append(link)
+        if self.footer_depth:
+            self.extract.footer_links.append(link)
+        if self.nav_depth:
+            self.extract.nav_links.append(link)
+        self.link_href = None
+        self.link_parts = []
+
+    def finish(self):
+        self.close()
+        self._close_link()
+        if self.in_title and not self.extract.title:
+            self.extract.title = ''.join(self.title_parts).strip()
+        self.extract.text = ' '.join(part.strip() for part in self.text_parts if part.strip())
+
+
+def declared_charset(headers) -> Optional[str]:
+    """
+    Charset set explicitly in the Content-Type header, or None. Unlike
+    requests' Response.encoding, no ISO-8859-1 default is assumed for text/*.
+    """
+    for param in (headers.get('Content-Type') or '').split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset' and value.strip().strip('"\''):
+            return value.strip().strip('"\'')
+    return None
+
+
+def page_encoding(content: bytes, declared: Optional[str] = None) -> str:
+    """The header charset when there is one, else the page's <meta charset>, else UTF-8"""
+    for candidate in (declared, _meta_charset(content)):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return 'utf-8'
+
+
+def _meta_charset(content: bytes) -> Optional[str]:
+    match = META_CHARSET_RE.search(content[:META_SNIFF_BYTES])
+    return match.group(1).decode('ascii') if match else None
+
+
+def extract_page(content: bytes, encoding: Optional[str] = None) -> PageExtract:
+    """
+    Extract title, description, links, footer/nav links, visible text and mailtos in one pass.
+    encoding is the charset declared in the Content-Type header, if any.
+    """
+    extract = PageExtract()
+    parser = _ExtractingParser(extract)
+    parser.feed(content.decode(page_encoding(content, encoding), errors='replace'))
+    parser.finish()
+    return extract
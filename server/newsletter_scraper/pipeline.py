@@ -0,0 +1,220 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import PIPELINE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Tells a stage worker there is no more input
+_DONE = object()
+
+# Returned by a handler that parks its item: the pipeline neither forwards nor finishes it.
+# Whoever parked it later hands it on among another item's results, or finishes it itself
+HELD = object()
+
+# Cancel flag of the pipeline a worker thread belongs to (read by cancelled())
+_worker = threading.local()
+
+
+class StageCancelled(RuntimeError):
+    """A side effect was attempted on a worker of a pipeline abandoned at its deadline"""
+
+
+def cancelled() -> bool:
+    """True on a worker thread of a pipeline that was abandoned; deep calls check it before side effects"""
+    event = getattr(_worker, 'cancelled', None)
+    return bool(event and event.is_set())
+
+
+def raise_if_cancelled(action: str):
+    if cancelled():
+        raise StageCancelled(f"{action} skipped: pipeline was abandoned at its deadline")
+
+
+class _Stage:
+    def __init__(self, name: str, handler: Callable, workers: int, queue_size: int, priority: Optional[Callable]):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.priority = priority
+        if priority:
+            self.queue: queue.Queue = queue.PriorityQueue(maxsize=max(1, queue_size))
+        else:
+            self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.alive = 0
+        self.stats = {'processed': 0, 'forwarded': 0, 'errors': 0, 'busy_seconds': 0.0, 'max_queue': 0}
+
+
+class Pipeline:
+    """
+    Staged producer/consumer pipeline with a bounded queue in front of every stage.
+
+    A stage handler takes one item and returns the items to hand to the next stage
+    (an empty list drops the item). Puts block while the next queue is full, so a
+    slow stage throttles the ones before it and memory stays bounded by the queue
+    sizes. Items that leave the pipeline - dropped, failed or through the last
+    stage - are passed to on_finished; handler exceptions go to on_error first.
+    A stage added with a priority function takes the highest-priority waiting item
+    first instead of the oldest (ties in arrival order). A handler that has to wait on
+    another item returns HELD instead of blocking its worker.
+
+    A run abandoned at its deadline sets the cancelled event: queued items are then
+    discarded unseen, results of calls still in flight are neither forwarded nor
+    passed to on_finished, and handlers (or anything they call, via cancelled())
+    check it before further side effects. when_stopped runs cleanup once the last
+    worker has actually exited.
+    """
+
+    def __init__(self, name: str, on_finished: Optional[Callable] = None, on_error: Optional[Callable] = None,
+                 cancelled: Optional[threading.Event] = None):
+        self.name = name
+        self.on_finished = on_finished
+        self.on_error = on_error
+        self.cancelled = cancelled or threading.Event()
+        self._stages: List[_Stage] = []
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self.abandoned = False
+
+    def add_stage(self, name: str, handler: Callable, workers: int = 1,
+                  queue_size: int = PIPELINE_QUEUE_SIZE, priority: Optional[Callable] = None) -> 'Pipeline':
+        self._stages.append(_Stage(name, handler, workers, queue_size, priority))
+        return self
+
+    def run(self, items: Iterable, deadline: Optional[float] = None):
+        """
+        Feed items into the first stage and block until every stage has drained.
+        With a deadline, stop waiting at that time even if workers are still busy
+        (they are daemon threads); abandoned and cancelled are set when that happens.
+        """
+        if not self._stages:
+            return
+        threads = self._threads
+        for index, stage in enumerate(self._stages):
+            stage.alive = stage.workers
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f"{self.name}-{stage.name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        first = self._stages[0]
+        try:
+            for item in items:
+                self._put(first, item)
+        finally:
+            self._close(first)
+            for thread in threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.time()))
+                if thread.is_alive():
+                    self.abandoned = True
+                    self.cancelled.set()
+                    logger.warning(f"{self.name} pipeline still busy at its deadline - cancelled, returning without it")
+                    break
+
+    def wait_stopped(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to timeout for the workers of an abandoned run to exit; True once none is alive"""
+        until = None if timeout is None else time.time() + timeout
+        for thread in self._threads:
+            thread.join(None if until is None else max(0.0, until - time.time()))
+            if thread.is_alive():
+                return False
+        return True
+
+    def when_stopped(self, callback: Callable):
+        """Call callback once every worker has exited: right away, or from a reaper thread after an abandoned run"""
+        alive = [thread for thread in self._threads if thread.is_alive()]
+        if not alive:
+            callback()
+            return
+
+        def reap():
+            for thread in alive:
+                thread.join()
+            logger.info(f"{self.name} pipeline: abandoned workers have stopped")
+            self._notify(callback)
+
+        threading.Thread(target=reap, name=f"{self.name}-reaper", daemon=True).start()
+
+    def _put(self, stage: _Stage, item):
+        if stage.priority:
+            item = (-stage.priority(item), next(self._sequence), item)
+        stage.queue.put(item)
+        with self._lock:
+            stage.stats['max_queue'] = max(stage.stats['max_queue'], stage.queue.qsize())
+
+    def _work(self, index: int):
+        stage = self._stages[index]
+        next_stage = self._stages[index + 1] if index + 1 < len(self._stages) else None
+        _worker.cancelled = self.cancelled
+        while True:
+            item = stage.queue.get()
+            if stage.priority:
+                item = item[2]
+            if item is _DONE:
+                break
+            if self.cancelled.is_set():
+                continue
+            started = time.time()
+            try:
+                results = stage.handler(item)
+                held = results is HELD
+                results = [] if held else results or []
+                failed = False
+            except Exception as e:
+                results = []
+                held = False
+                failed = True
+                if not self.cancelled.is_set():
+                    self._notify(self.on_error, item, e)
+            with self._lock:
+                stage.stats['processed'] += 1
+                stage.stats['errors'] += failed
+                stage.stats['busy_seconds'] += time.time() - started
+
+            if held or self.cancelled.is_set():
+                continue
+            if next_stage is None:
+                self._notify(self.on_finished, item)
+            elif not results:
+                # Fan-out stages return their input's successors; only a dropped item leaves here
+                self._notify(self.on_finished, item)
+            else:
+                for result in results:
+                    self._put(next_stage, result)
+                with self._lock:
+                    stage.stats['forwarded'] += len(results)
+
+        # The last worker of a stage closes the next one
+        with self._lock:
+            stage.alive -= 1
+            closing = stage.alive == 0
+        if closing and next_stage is not None:
+            self._close(next_stage)
+
+    def _close(self, stage: _Stage):
+        """One end-of-input marker per worker; in a priority queue they sort after every item"""
+        for _ in range(stage.workers):
+            stage.queue.put((float('inf'), next(self._sequence), _DONE) if stage.priority else _DONE)
+
+    def _notify(self, callback: Optional[Callable], *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"{self.name} pipeline callback failed: {e}")
+
+    def snapshot(self) -> Dict:
+        """Per-stage counters: items processed/forwarded/failed, time spent in the handler, deepest queue"""
+        with self._lock:
+            return {
+                stage.name: dict(stage.stats, workers=stage.workers,
+                                 busy_seconds=round(stage.stats['busy_seconds'], 2))
+                for stage in self._stages
+            }
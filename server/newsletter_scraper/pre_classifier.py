@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Local sponsor pre-classifier.
+
+A small Bernoulli naive Bayes model over the signals SponsorAnalyzer already
+computes (context keywords, legitimacy checks, fallback tag keyword hits). It is
+trained from labelled sponsornews records and saved as a JSON artifact; at runtime
+it short-circuits clear negatives before any Gemini call. Only records that carry
+the features screen_link computed for them are used, so training sees exactly what
+scoring sees (email context included).
+
+Usage:
+    python pre_classifier.py --train        # train from MongoDB and write the artifact
+    python pre_classifier.py --benchmark    # hold-out evaluation: Gemini calls avoided vs precision kept
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import PRE_CLASSIFIER_MODEL_PATH, PRE_CLASSIFIER_REJECT_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Gemini calls a fully enriched candidate costs (contact, audience, tags, analyze)
+GEMINI_CALLS_PER_CANDIDATE = 4
+
+
+class PreClassifier:
+    """Bernoulli naive Bayes over binary feature names; P(accepted sponsor | features)"""
+
+    def __init__(self, model: Optional[Dict] = None):
+        self.model = model
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.model and self.model.get('class_counts'))
+
+    @classmethod
+    def load(cls, path: str = PRE_CLASSIFIER_MODEL_PATH) -> 'PreClassifier':
+        """Load the serialised artifact; returns an untrained (no-op) classifier if missing"""
+        if not path or not os.path.exists(path):
+            logger.info(f"Pre-classifier artifact not found ({path}) - pre-classification disabled")
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                model = json.load(f)
+            logger.info(f"✅ Loaded pre-classifier trained on {sum(model['class_counts'])} records ({model.get('trained_at')})")
+            return cls(model)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load pre-classifier from {path}: {e}")
+            return cls()
+
+    def save(self, path: str = PRE_CLASSIFIER_MODEL_PATH):
+        with open(path, 'w') as f:
+            json.dump(self.model, f, indent=1, sort_keys=True)
+        logger.info(f"💾 Saved pre-classifier artifact to {path}")
+
+    @classmethod
+    def train(cls, examples: List[Tuple[List[str], int]]) -> 'PreClassifier':
+        """Train from (feature names, label) pairs where label 1 = accepted sponsor, 0 = rejected"""
+        class_counts = [0, 0]
+        feature_counts: Dict[str, List[int]] = {}
+        for features, label in examples:
+            class_counts[label] += 1
+            for feature in set(features):
+                feature_counts.setdefault(feature, [0, 0])[label] += 1
+        return cls({
+            'version': 1,
+            'trained_at': datetime.utcnow().isoformat(),
+            'class_counts': class_counts,
+            'feature_counts': feature_counts
+        })
+
+    def score(self, features: List[str]) -> Optional[float]:
+        """Probability the candidate is an accepted sponsor, or None if no model is loaded"""
+        if not self.is_trained:
+            return None
+        class_counts = self.model['class_counts']
+        feature_counts = self.model['feature_counts']
+        total = sum(class_counts)
+        present = set(features)
+
+        log_probs = []
+        for label in (0, 1):
+            log_prob = math.log((class_counts[label] + 1) / (total + 2))
+            for feature, counts in feature_counts.items():
+                # Laplace-smoothed Bernoulli likelihood of the feature being present/absent
+                p = (counts[label] + 1) / (class_counts[label] + 2)
+                log_prob += math.log(p if feature in present else 1 - p)
+            log_probs.append(log_prob)
+
+        # Normalise in log space
+        peak = max(log_probs)
+        exp_neg, exp_pos = (math.exp(lp - peak) for lp in log_probs)
+        return exp_pos / (exp_neg + exp_pos)
+
+    def is_clear_negative(self, features: List[str], threshold: float = PRE_CLASSIFIER_REJECT_THRESHOLD) -> bool:
+        score = self.score(features)
+        return score is not None and score < threshold
+
+
+def build_training_examples(training_data: Dict) -> List[Tuple[List[str], int]]:
+    """
+    Turn labelled records into (features, label) pairs. Records without the screening-time
+    features (saved before the pre-classifier, or bare denied domains) are skipped: rebuilding
+    them without the email context would teach the model how records were stored instead.
+    """
+    examples = []
+    skipped = 0
+    for label, key in ((1, 'accepted'), (0, 'rejected')):
+        for record in training_data.get(key, []):
+            features = record.get('preClassifierFeatures')
+            if features:
+                examples.append((list(features), label))
+            else:
+                skipped += 1
+    if skipped:
+        logger.info(f"Skipped {skipped} record(s) without screening-time features")
+    return examples
+
+
+def benchmark(examples: List[Tuple[List[str], int]], holdout: float = 0.2,
+              threshold: float = PRE_CLASSIFIER_REJECT_THRESHOLD, seed: int = 42) -> Dict:
+    """Train on a split, then report Gemini calls avoided and precision kept on the held-out part"""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    split = max(1, int(len(shuffled) * (1 - holdout)))
+    train_set, test_set = shuffled[:split], shuffled[split:]
+    classifier = PreClassifier.train(train_set)
+
+    skipped = [(features, label) for features, label in test_set if classifier.is_clear_negative(features, threshold)]
+    kept = [(features, label) for features, label in test_set if not classifier.is_clear_negative(features, threshold)]
+    positives = sum(label for _, label in test_set)
+    positives_kept = sum(label for _, label in kept)
+
+    return {
+        'train_records': len(train_set),
+        'test_records': len(test_set),
+        'threshold': threshold,
+        'candidates_skipped': len(skipped),
+        'gemini_calls_avoided': len(skipped) * GEMINI_CALLS_PER_CANDIDATE,
+        'skipped_that_were_negative': sum(1 for _, label in skipped if label == 0),
+        'precision_before': round(positives / len(test_set), 3) if test_set else 0.0,
+        'precision_after': round(positives_kept / len(kept), 3) if kept else 0.0,
+        'accepted_sponsors_kept': f"{positives_kept}/{positives}"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train or evaluate the local sponsor pre-classifier')
+    parser.add_argument('--train', action='store_true', help='Train from MongoDB and write the artifact')
+    parser.add_argument('--benchmark', action='store_true', help='Hold-out evaluation on MongoDB records')
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--threshold', type=float, default=PRE_CLASSIFIER_REJECT_THRESHOLD)
+    parser.add_argument('--output', default=PRE_CLASSIFIER_MODEL_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from database import SponsorDatabase
+
+    db = SponsorDatabase()
+    try:
+        examples = build_training_examples(db.get_pre_classifier_training_data())
+        logger.info(f"Built {len(examples)} labelled examples "
+                    f"({sum(label for _, label in examples)} accepted)")
+
+        if args.benchmark:
+            print(json.dumps(benchmark(examples, args.holdout, args.threshold), indent=2))
+        if args.train:
+            PreClassifier.train(examples).save(args.output)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
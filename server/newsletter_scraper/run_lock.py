@@ -0,0 +1,74 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+from config import RUN_LOCK_TTL_SECONDS
+from email_jobs import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+SCRAPING_CYCLE_LOCK = 'scraping_cycle'
+
+# Summary fields published with a released lock for triggers that coalesced with the run
+RESULT_FIELDS = (
+    'new_sponsors_added', 'need_review', 'complete', 'emails_processed', 'duration_seconds',
+    'rejection_stats', 'contact_quality_stats', 'deadline_stats', 'partial', 'error'
+)
+
+
+class RunLock:
+    """
+    Cross-process lock on a named run (the scraperlocks collection).
+
+    The holder keeps the lock's TTL alive with a heartbeat, so a crashed process frees
+    it after RUN_LOCK_TTL_SECONDS. Every acquisition bumps the lock's generation; on
+    release the holder publishes its result under that generation. A trigger that finds
+    the lock held sets a single followUpRequested flag, however many triggers arrive,
+    which the next acquisition clears. release records whether the flag was set, so the
+    holder can run the follow-up itself when no waiter is left to do it.
+    """
+
+    def __init__(self, db, name: str = SCRAPING_CYCLE_LOCK, owner: Optional[str] = None,
+                 ttl_seconds: float = RUN_LOCK_TTL_SECONDS):
+        self.db = db
+        self.name = name
+        self.owner = owner or default_worker_id()
+        self.ttl_seconds = ttl_seconds
+        self.generation = None
+        self.follow_up_requested = False
+        self._stop = None
+
+    def acquire(self) -> bool:
+        doc = self.db.acquire_run_lock(self.name, self.owner, self.ttl_seconds)
+        if not doc:
+            return False
+        self.generation = doc.get('generation')
+        self._start_heartbeat()
+        return True
+
+    def release(self, summary: Dict) -> bool:
+        if self._stop:
+            self._stop.set()
+        result = {key: summary[key] for key in RESULT_FIELDS if key in summary}
+        released = self.db.release_run_lock(self.name, self.owner, self.generation, result)
+        self.follow_up_requested = bool(released and released.get('followUpRequested'))
+        return released is not None
+
+    def request_follow_up(self) -> Optional[Dict]:
+        """Lock state after asking for a follow-up run, or None if the lock is no longer held"""
+        return self.db.request_follow_up_run(self.name)
+
+    def state(self) -> Dict:
+        return self.db.get_run_lock(self.name) or {}
+
+    def _start_heartbeat(self):
+        self._stop = threading.Event()
+        stop = self._stop
+
+        def beat():
+            while not stop.wait(self.ttl_seconds / 3):
+                if not self.db.refresh_run_lock(self.name, self.owner, self.ttl_seconds):
+                    logger.warning(f"Lost the {self.name} lock while running (TTL expired)")
+                    return
+
+        threading.Thread(target=beat, name=f'{self.name}-lock-heartbeat', daemon=True).start()
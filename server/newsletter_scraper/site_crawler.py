@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import CRAWL_MAX_CONCURRENCY, CRAWL_PER_HOST_CONCURRENCY, CRAWL_SPONSOR_DEADLINE_SECONDS
+from page_cache import CachedPage, PageCache, normalize_url
+from web_fetcher import HostUnresolvableError
+
+logger = logging.getLogger(__name__)
+
+
+class SiteCrawler:
+    """
+    Concurrent page fetcher for sponsor website enrichment.
+
+    Once the homepage has been parsed, every candidate page discovered on it is
+    fetched in parallel instead of one 5-second request after another. Fetches run
+    on a shared thread pool (global concurrency cap) over the pooled session, with
+    a per-host semaphore so one sponsor's site never gets more than a few parallel
+    requests, and an overall per-sponsor deadline after which pending pages are dropped.
+    Pages land in the PageCache, so later steps read them without refetching.
+    """
+
+    def __init__(self, page_cache: PageCache, max_concurrency: int = CRAWL_MAX_CONCURRENCY,
+                 per_host: int = CRAWL_PER_HOST_CONCURRENCY):
+        self.page_cache = page_cache
+        self.per_host = per_host
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='crawler')
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'pages_requested': 0, 'pages_fetched': 0, 'pages_failed': 0, 'pages_dropped_at_deadline': 0,
+                'probes_sent': 0}
+
+    @staticmethod
+    def new_deadline(seconds: float = CRAWL_SPONSOR_DEADLINE_SECONDS) -> float:
+        """Absolute deadline for one sponsor's website enrichment"""
+        return time.time() + seconds
+
+    @staticmethod
+    def remaining(deadline: Optional[float], cap: float) -> float:
+        """Time left before the deadline, capped at the normal per-request timeout"""
+        if deadline is None:
+            return cap
+        return max(0.0, min(cap, deadline - time.time()))
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _fetch(self, url: str, deadline: Optional[float], timeout: float,
+               stop_at: Optional[Tuple[str, ...]]) -> Optional[CachedPage]:
+        slot = self._host_slot(url)
+        wait_budget = self.remaining(deadline, timeout)
+        if not slot.acquire(timeout=wait_budget):
+            return None
+        try:
+            request_timeout = self.remaining(deadline, timeout)
+            if request_timeout <= 0:
+                return None
+            page = self.page_cache.get(url, timeout=request_timeout, stop_at=stop_at)
+            self._count('pages_fetched')
+            return page
+        except Exception as e:
+            self._count('pages_failed')
+            logger.debug(f"Crawler failed to fetch {url}: {e}")
+            return None
+        finally:
+            slot.release()
+
+    def fetch_all(self, urls: List[str], deadline: Optional[float] = None, timeout: float = 5,
+                  stop_at: Optional[Tuple[str, ...]] = None) -> Dict[str, Optional[CachedPage]]:
+        """
+        Fetch urls concurrently; returns url -> page (None if it failed or missed the deadline).
+        Duplicate URLs (after normalisation) are only requested once. stop_at is passed to the page cache.
+        """
+        futures = {}
+        seen = {}
+        for url in urls:
+            key = normalize_url(url)
+            if key in seen:
+                continue
+            seen[key] = url
+            futures[url] = self._executor.submit(self._fetch, url, deadline, timeout, stop_at)
+        self._count('pages_requested', len(futures))
+
+        if futures:
+            wait_timeout = None if deadline is None else max(0.0, deadline - time.time())
+            wait(futures.values(), timeout=wait_timeout)
+
+        results = {}
+        for url, future in futures.items():
+            if future.done():
+                results[url] = future.result()
+            else:
+                # Still queued or in flight at the deadline - drop it (a running request still fills the cache)
+                future.cancel()
+                self._count('pages_dropped_at_deadline')
+                results[url] = None
+        for url in urls:
+            if url not in results:
+                results[url] = results.get(seen[normalize_url(url)])
+        return results
+
+    def probe_first(self, urls: List[str], timeout: float = 2) -> Optional[str]:
+        """
+        HEAD all urls concurrently and return the first one (in list order) that answers < 400.
+        Lower-priority probes still queued once a winner is known are cancelled.
+        """
+        return self.probe_candidates(urls, timeout)[0]
+
+    def probe_candidates(self, urls: List[str], timeout: float = 2) -> Tuple[Optional[str], bool]:
+        """
+        probe_first, plus whether a miss is conclusive: every probe got a definite answer
+        (a 4xx, or a host that doesn't exist) rather than a timeout, connection error,
+        server error or a host in back-off.
+        """
+        def probe(url: str) -> Optional[bool]:
+            try:
+                status = self.page_cache.fetcher.head(url, timeout=timeout).status_code
+            except HostUnresolvableError:
+                return False
+            except Exception:
+                return None
+            if status < 400:
+                return True
+            return None if status >= 500 or status == 429 else False
+
+        futures = [(url, self._executor.submit(probe, url)) for url in urls]
+        self._count('probes_sent', len(futures))
+        winner = None
+        conclusive = True
+        for url, future in futures:
+            if winner is None:
+                live = future.result()
+                if live:
+                    winner = url
+                elif live is None:
+                    conclusive = False
+            else:
+                future.cancel()
+        return winner, winner is not None or conclusive
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = self._empty_stats()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
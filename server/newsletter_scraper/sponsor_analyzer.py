@@ -1,93 +1,207 @@
+import copy
 import logging
+import math
 import os
 import re
-import requests
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
 from config import (
     EXCLUDED_DOMAINS, NON_SPONSOR_COMPANIES, KNOWN_SPONSORS,
-    TAGS, BUSINESS_EMAIL_PATTERNS, AFFILIATE_INDICATORS
+    TAGS, BUSINESS_EMAIL_PATTERNS, AFFILIATE_INDICATORS, PRE_CLASSIFIER_TAG_MIN_HITS,
+    AFFILIATE_REDIRECT_MEMORY_TTL_SECONDS, AFFILIATE_REDIRECT_MEMORY_MAX_ENTRIES
 )
+from llm_client import LLMBackend, LLMClient, create_llm_backend
+from pre_classifier import PreClassifier
+from dns_cache import dns_cache
+from host_health import HostHealth
+from page_cache import PageCache
+from page_extractor import PageExtract
+from site_crawler import SiteCrawler
+from web_fetcher import WebFetcher, STOP_AT_FOOTER, STOP_AT_MAILTO
 
 logger = logging.getLogger(__name__)
 
+# Sponsor fields a contact discovery run sets (stored as the domain's best contact)
+CONTACT_FIELDS = ('sponsorEmail', 'contactMethod', 'contactType', 'contactPersonName',
+                  'contactPersonTitle', 'confidence', 'analysisStatus')
+
+# Contact pages are only read for emails: stop downloading once a mailto or the footer has been seen
+CONTACT_PAGE_STOP_AT = (STOP_AT_MAILTO, STOP_AT_FOOTER)
+
+# Weights of the enrichment priority signals (each signal scaled to 0-1)
+PRIORITY_WEIGHTS = {
+    'section_confidence': 0.30,
+    'known_sponsor': 0.20,
+    'new_domain': 0.15,
+    'strong_context': 0.15,
+    'audience': 0.10,
+    'pre_score': 0.10
+}
+# Newsletter audience that earns the full audience weight (log scale below it)
+PRIORITY_FULL_AUDIENCE = 1_000_000
+
 class SponsorAnalyzer:
-    def __init__(self):
+    def __init__(self, preflight: bool = False, llm_backend: Optional[LLMBackend] = None, db=None):
         self.gemini_model = None
+        # Optional SponsorDatabase for persistent lookups (affiliate redirect mappings)
+        self.db = db
         logger.info("=== INITIALIZING SPONSOR ANALYZER ===")
         
-        # Try to initialize Google Gemini client
-        try:
-            logger.info("Attempting to import Google Generative AI package...")
-            import google.generativeai as genai
-            from config import GEMINI_API_KEY
-            logger.info("Google Generative AI package imported successfully")
-            
-            logger.info(f"Checking for Gemini API key...")
-            if not GEMINI_API_KEY:
-                error_msg = "❌ CRITICAL: Gemini API key not found in environment variables. Expected: GEMINI_API_KEY or sponsorDB_geminiKey"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-                
-            if not GEMINI_API_KEY.strip():
-                error_msg = "❌ CRITICAL: Gemini API key is empty. Scraper requires valid Gemini API key."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-                
-            logger.info(f"✅ Gemini API key found (length: {len(GEMINI_API_KEY)})")
-            logger.info("Configuring Gemini API...")
-            genai.configure(api_key=GEMINI_API_KEY)
-            logger.info("✅ Gemini API configured successfully")
-            
-            logger.info("Creating Gemini model...")
-            # Use gemini-2.5-flash (latest and fastest model)
-            self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-            logger.info("✅ Gemini model created successfully")
-            
-            # Test the model with a simple API call
-            logger.info("Testing Gemini API connection...")
+        # Backend is pluggable (Gemini in production, FakeLLMBackend for offline benchmarks/tests).
+        # The Gemini backend is lazy: google.generativeai is imported and the model created on first use,
+        # so spawning api_wrapper.py no longer pays for the import and a billed test generation up front
+        backend = llm_backend or create_llm_backend()
+        
+        # Wrapped in LLMClient so outages trip the circuit breaker instead of stalling every sponsor
+        self.gemini_model = LLMClient(backend)
+        
+        # Local pre-classifier short-circuits clear negatives / obvious tags before any LLM call
+        self.pre_classifier = PreClassifier.load()
+        self.pre_classifier_stats = {'clear_negatives_skipped': 0, 'local_tags_assigned': 0}
+        # Per-cycle counters are bumped from every enrich-stage thread
+        self._stats_lock = threading.Lock()
+        
+        # Reuse of stored contact discovery results (domaincontacts) vs fresh discovery runs
+        self.contact_store_stats = {'hits': 0, 'discoveries': 0}
+        
+        # One pooled keep-alive session for every website request (homepage, contact page, affiliate probes)
+        self.fetcher = WebFetcher(HostHealth(db))
+        # Pages fetched this cycle (homepage is read by contact, affiliate-indicator and signup-link steps)
+        self.page_cache = PageCache(self.fetcher)
+        # Candidate contact pages are fetched concurrently under global/per-host caps and a per-sponsor deadline
+        self.crawler = SiteCrawler(self.page_cache)
+        # In-process copy of the affiliateredirects lookups, bounded and short-lived so the Mongo TTL still applies
+        self._affiliate_redirect_cache: 'OrderedDict[Tuple[str, str], Tuple[float, Optional[str]]]' = OrderedDict()
+        self._affiliate_redirect_lock = threading.Lock()
+        
+        # --preflight keeps the old strict startup check (real test generation)
+        if preflight:
             try:
-                test_response = self.gemini_model.generate_content("test")
-                logger.info("✅ Gemini API test successful - Gemini analysis ENABLED")
-                logger.info(f"Test response: {test_response.text[:50]}...")
-            except Exception as test_error:
-                logger.error(f"❌ Gemini API test failed: {test_error}")
-                error_msg = None
-                if "quota" in str(test_error).lower() or "quota_exceeded" in str(test_error).lower():
-                    error_msg = "❌ CRITICAL: Gemini API quota exceeded! Check your Google Cloud billing. Scraper requires working Gemini API."
-                    logger.error(error_msg)
-                elif "invalid" in str(test_error).lower() or "api_key" in str(test_error).lower():
-                    error_msg = "❌ CRITICAL: Invalid Gemini API key! Scraper requires valid Gemini API key."
-                    logger.error(error_msg)
-                elif "rate_limit" in str(test_error).lower() or "rate limit" in str(test_error).lower():
-                    error_msg = "❌ CRITICAL: Gemini API rate limit exceeded! Scraper requires working Gemini API."
-                    logger.error(error_msg)
-                else:
-                    error_msg = f"❌ CRITICAL: Gemini API test failed: {test_error}. Scraper requires working Gemini API."
-                    logger.error(error_msg)
-                
+                self.gemini_model.preflight()
+            except Exception:
                 self.gemini_model = None
-                raise RuntimeError(error_msg or f"Gemini API test failed: {test_error}")
-                
-        except ImportError as e:
-            logger.error(f"❌ Google Generative AI package not available: {e}")
-            logger.error("Install with: pip install google-generativeai")
-            logger.error("❌ CRITICAL: Gemini is REQUIRED. Scraper will not run without it.")
-            raise ImportError("Google Generative AI package (google-generativeai) is required but not installed. Install with: pip install google-generativeai")
-        except Exception as e:
-            logger.error(f"❌ Gemini client initialization failed: {e}")
-            logger.error("❌ CRITICAL: Gemini initialization failed. Scraper will not run without Gemini.")
-            raise RuntimeError(f"Failed to initialize Gemini: {e}")
-        
-        # Verify Gemini is actually available
-        if not self.gemini_model:
-            error_msg = "❌ CRITICAL: Gemini model is not available. Scraper requires Gemini to function."
-            logger.error(error_msg)
-            raise RuntimeError(error_msg)
+                raise
         
         logger.info("=== SPONSOR ANALYZER INITIALIZATION COMPLETE ===")
     
+    def _gemini_available(self) -> bool:
+        """True if Gemini can be called now (model loaded and circuit breaker not open)"""
+        return bool(self.gemini_model) and self.gemini_model.is_available()
+    
+    def llm_stats_snapshot(self) -> Dict:
+        """Per call type request/token/latency accounting since the last reset"""
+        if not self.gemini_model:
+            return {}
+        return self.gemini_model.usage.snapshot()
+    
+    def reset_llm_stats(self):
+        """Start a fresh accounting window (called at the start of each cycle)"""
+        if self.gemini_model:
+            self.gemini_model.usage.reset()
+        with self._stats_lock:
+            self.pre_classifier_stats = {'clear_negatives_skipped': 0, 'local_tags_assigned': 0}
+            self.contact_store_stats = {'hits': 0, 'discoveries': 0}
+    
+    def _count(self, stats: Dict, key: str, amount: int = 1):
+        with self._stats_lock:
+            stats[key] += amount
+    
+    def contact_store_snapshot(self) -> Dict:
+        """Contact lookups answered by the domaincontacts store vs discovery runs since the last reset"""
+        with self._stats_lock:
+            return dict(self.contact_store_stats)
+    
+    def pre_classifier_snapshot(self) -> Dict:
+        """Pre-classifier decisions since the last reset, with the Gemini calls they avoided"""
+        from pre_classifier import GEMINI_CALLS_PER_CANDIDATE
+        with self._stats_lock:
+            stats = dict(self.pre_classifier_stats)
+        stats['enabled'] = self.pre_classifier.is_trained
+        stats['gemini_calls_avoided'] = (stats['clear_negatives_skipped'] * GEMINI_CALLS_PER_CANDIDATE
+                                         + stats['local_tags_assigned'])
+        return stats
+    
+    def build_pre_classifier_features(self, company_name: str, domain: str, url: str,
+                                      context: Optional[str] = None, description: Optional[str] = None) -> List[str]:
+        """Binary feature names for the pre-classifier, built from the existing validation signals"""
+        features = []
+        for name, value in self._legitimacy_signals(company_name, domain, url).items():
+            if value:
+                features.append(f"legit:{name}")
+        if context:
+            for name, value in self._context_signals(url, context).items():
+                if value:
+                    features.append(f"ctx:{name}")
+        has_affiliate, tag_scores = self._tag_keyword_scores({
+            'sponsorName': company_name,
+            'extractedDescription': description
+        })
+        if has_affiliate:
+            features.append("tag:Affiliate")
+        features.extend(f"tag:{tag}" for tag in tag_scores)
+        suffix = domain.lower().rsplit('.', 1)[-1] if '.' in domain else ''
+        if suffix:
+            features.append(f"tld:{suffix}")
+        if len(company_name.split()) > 3:
+            features.append("name:long")
+        return features
+    
+    def _confident_local_tags(self, sponsor_data: Dict) -> Optional[List[str]]:
+        """Keyword tags when one tag clearly dominates; None means Gemini should decide"""
+        _, tag_scores = self._tag_keyword_scores(sponsor_data)
+        ranked = sorted(tag_scores.values(), reverse=True)
+        if not ranked or ranked[0] < PRE_CLASSIFIER_TAG_MIN_HITS:
+            return None
+        if len(ranked) > 1 and ranked[1] == ranked[0]:
+            return None
+        return self._assign_tags_fallback(sponsor_data)
+    
+    def gemini_circuit_snapshot(self) -> Dict:
+        """Circuit breaker state for run summaries"""
+        if not self.gemini_model:
+            return {'state': 'unavailable'}
+        return self.gemini_model.breaker.snapshot()
+    
+    def http_stats_snapshot(self) -> Dict:
+        """Website requests, keep-alive connection reuse and crawler counts since the last reset"""
+        stats = self.fetcher.connection_stats()
+        stats['crawler'] = self.crawler.snapshot()
+        return stats
+    
+    def reset_http_stats(self):
+        self.fetcher.reset_stats()
+        self.crawler.reset_stats()
+    
+    def page_cache_snapshot(self) -> Dict:
+        """Page cache hits/misses/revalidations since the last reset"""
+        return self.page_cache.snapshot()
+    
+    def reset_page_cache(self):
+        """Start a new cycle: forget in-memory pages (disk tier is revalidated instead)"""
+        self.page_cache.clear()
+        self.page_cache.reset_stats()
+    
+    def close(self):
+        """Release pooled HTTP connections and crawler threads"""
+        self.crawler.close()
+        self.fetcher.close()
+    
+    def pre_resolve_sections(self, sections: List[Dict]) -> Dict[str, bool]:
+        """Resolve every candidate link host in an email's sections in parallel before enrichment"""
+        hosts = set()
+        for section in sections:
+            if section.get('processing_status') == 'rejected':
+                continue
+            for link in section.get('links', []):
+                host = urlparse(link if link.startswith('http') else f"https://{link}").hostname
+                if host:
+                    hosts.add(host)
+        return dns_cache.pre_resolve(hosts)
+    
     def analyze_sponsor_section(self, section_data: Dict, newsletter_name: str, cached_subscriber_count: Optional[int] = None) -> List[Dict]:
         """Analyze a sponsor section and extract sponsor information"""
         try:
@@ -121,6 +235,14 @@ class SponsorAnalyzer:
     
     def _analyze_single_link(self, link: str, context: str, newsletter_name: str, cached_subscriber_count: Optional[int] = None) -> Optional[Dict]:
         """Analyze a single link and extract sponsor information"""
+        candidate = self.screen_link(link, context, newsletter_name, cached_subscriber_count)
+        return self.enrich_candidate(candidate) if candidate else None
+    
+    def screen_link(self, link: str, context: str, newsletter_name: str, cached_subscriber_count: Optional[int] = None) -> Optional[Dict]:
+        """
+        Local checks for a sponsor link (blacklist, self-reference, context, company name,
+        legitimacy, pre-classifier). Returns the candidate to pass to enrich_candidate, or None.
+        """
         try:
             # Parse URL
             parsed_url = urlparse(link)
@@ -164,8 +286,84 @@ class SponsorAnalyzer:
                 return None
             logger.info(f"✓ Passed legitimacy check")
             
+            # 6b. LOCAL PRE-CLASSIFIER - skip clear negatives before any Gemini call
+            features = self.build_pre_classifier_features(company_name, root_domain, link, context=context)
+            pre_score = self.pre_classifier.score(features)
+            if pre_score is not None and self.pre_classifier.is_clear_negative(features):
+                logger.info(f"REJECTED: Pre-classifier clear negative ({pre_score:.3f}) - {company_name}")
+                self._count(self.pre_classifier_stats, 'clear_negatives_skipped')
+                return None
+            
             logger.info(f"SUCCESS: Sponsor passed all checks - {company_name}")
+            return {
+                'link': link,
+                'context': context,
+                'newsletter_name': newsletter_name,
+                'cached_subscriber_count': cached_subscriber_count,
+                'root_domain': root_domain,
+                'company_name': company_name,
+                'features': features,
+                'pre_score': pre_score
+            }
             
+        except Exception as e:
+            logger.warning(f"Failed to analyze link {link}: {e}")
+            return None
+    
+    def candidate_priority(self, candidate: Dict, section_confidence: float = 0.0, known_in_db: bool = False) -> float:
+        """
+        Expected value of enriching a screened candidate (0-1, higher first), from signals
+        screening already computed: section confidence, the KNOWN_SPONSORS whitelist,
+        sponsorship wording around the link, cached newsletter audience, the pre-classifier
+        score, and whether the domain is new to the database.
+        """
+        features = set(candidate.get('features') or ())
+        audience = candidate.get('cached_subscriber_count') or 0
+        if 'ctx:strong_sponsor_keyword' in features:
+            context = 1.0
+        elif 'ctx:sponsor_keyword' in features:
+            context = 0.5
+        else:
+            context = 0.0
+        signals = {
+            'section_confidence': min(1.0, max(0.0, section_confidence or 0.0)),
+            'known_sponsor': 1.0 if 'legit:known_sponsor' in features else 0.0,
+            'new_domain': 0.0 if known_in_db else 1.0,
+            'strong_context': context,
+            'audience': min(1.0, math.log10(1 + audience) / math.log10(PRIORITY_FULL_AUDIENCE)),
+            # Unknown when the pre-classifier isn't trained yet: neutral
+            'pre_score': 0.5 if candidate.get('pre_score') is None else candidate['pre_score']
+        }
+        return round(sum(PRIORITY_WEIGHTS[name] * value for name, value in signals.items()), 4)
+    
+    def fan_out_enrichment(self, enriched: Dict, candidate: Dict) -> Dict:
+        """
+        Another occurrence of an already enriched domain: a copy of the domain-level result
+        (website info, contacts, affiliate detection, tags) with the per-newsletter fields -
+        link, newsletter name and audience - taken from this candidate
+        """
+        sponsor = copy.deepcopy(enriched)
+        newsletter_name = candidate.get('newsletter_name')
+        sponsor['sponsorLink'] = candidate.get('link', sponsor.get('sponsorLink'))
+        sponsor['newsletterSponsored'] = newsletter_name
+        sponsor['sourceNewsletter'] = newsletter_name
+        estimate = self._estimate_subscriber_count(candidate.get('context') or '', newsletter_name,
+                                                   candidate.get('cached_subscriber_count'))
+        sponsor['estimatedSubscribers'] = estimate['count']
+        sponsor['subscriberReasoning'] = estimate['reasoning']
+        return sponsor
+    
+    def enrich_candidate(self, candidate: Dict) -> Optional[Dict]:
+        """Network-bound analysis of a screened link: website/Gemini contact discovery, audience, affiliate and tags"""
+        link = candidate['link']
+        context = candidate['context']
+        newsletter_name = candidate['newsletter_name']
+        cached_subscriber_count = candidate['cached_subscriber_count']
+        root_domain = candidate['root_domain']
+        company_name = candidate['company_name']
+        features = candidate['features']
+        pre_score = candidate['pre_score']
+        try:
             # Check if link is an affiliate redirect and try to find real domain
             # e.g., moneypickle.go2cloud.org -> moneypickle.com
             real_domain = self._extract_real_domain_from_affiliate_redirect(link, root_domain, company_name)
@@ -190,6 +388,8 @@ class SponsorAnalyzer:
                 'discoveryMethod': 'email_scraper',
                 'analysisStatus': 'pending',
                 'confidence': 0.0,
+                'preClassifierFeatures': features,  # Stored so future training sees the runtime features
+                'preClassifierScore': pre_score,
                 '_cached_subscriber_count': cached_subscriber_count  # Pass cached count for estimation
             }
             
@@ -235,8 +435,13 @@ class SponsorAnalyzer:
                 except Exception as e:
                     logger.warning(f"⚠️ Error finding affiliate link for {company_name}: {e}")
             
-            # 10. AUTOMATIC TAG ASSIGNMENT
-            assigned_tags = self._assign_tags_ai(sponsor_data)
+            # 10. AUTOMATIC TAG ASSIGNMENT (local keywords when unambiguous, otherwise Gemini)
+            assigned_tags = self._confident_local_tags(sponsor_data)
+            if assigned_tags:
+                self._count(self.pre_classifier_stats, 'local_tags_assigned')
+                logger.info(f"Clear keyword tags - skipping Gemini tagging: {assigned_tags}")
+            else:
+                assigned_tags = self._assign_tags_ai(sponsor_data)
             
             # 11. ENSURE AFFILIATE TAG IS ADDED FOR AFFILIATE PROGRAMS
             if is_affiliate and 'Affiliate' not in assigned_tags:
@@ -392,18 +597,25 @@ class SponsorAnalyzer:
         
         return False
     
-    def _has_sufficient_context(self, link: str, section_text: str) -> bool:
-        """Check if link has sufficient sponsorship context around it"""
+    def _context_signals(self, link: str, section_text: str) -> Dict[str, bool]:
+        """Sponsorship signals in the text around a link (shared by context check and pre-classifier)"""
+        signals = {
+            'link_found': False,
+            'content_indicator': False,
+            'strong_sponsor_keyword': False,
+            'sponsor_keyword': False,
+            'business_term': False
+        }
+        
         # Find link position in text
         link_pos = section_text.find(link)
         if link_pos == -1:
             # Try to find just the domain
-            from urllib.parse import urlparse
             domain = urlparse(link).netloc
             link_pos = section_text.find(domain)
             if link_pos == -1:
-                logger.debug(f"Link not found in section text")
-                return False
+                return signals
+        signals['link_found'] = True
         
         # Get 300 chars before and after link (increased from 200)
         start = max(0, link_pos - 300)
@@ -412,42 +624,54 @@ class SponsorAnalyzer:
         
         logger.debug(f"Context for validation: {context[:200]}...")
         
-        # Check for content indicators that suggest this is NOT a sponsor
+        # Content indicators suggest this is NOT a sponsor
         content_indicators = [
             'READ MORE', 'FULL ARTICLE', 'CONTINUE READING',
             'BLOG POST', 'NEWS ARTICLE', 'STORY', 'JOURNAL',
             'TODAY\'S NEWS', 'DAILY UPDATE', 'WEEKLY ROUNDUP'
         ]
+        signals['content_indicator'] = any(indicator in context for indicator in content_indicators)
         
-        has_content_indicator = any(indicator in context for indicator in content_indicators)
-        if has_content_indicator:
-            logger.debug(f"Has content indicators - likely not a sponsor")
-            return False
-        
-        # Strong sponsor indicators - if we find these, we're good
+        # Strong sponsor indicators
         strong_sponsor_keywords = [
             'SPONSORED BY', 'BROUGHT TO YOU BY', 'PRESENTED BY', 
             'PAID PARTNERSHIP', 'PARTNER CONTENT', 'ADVERTISEMENT'
         ]
-        
-        if any(kw in context for kw in strong_sponsor_keywords):
-            logger.debug(f"Found strong sponsor keyword - approved")
-            return True
+        signals['strong_sponsor_keyword'] = any(kw in context for kw in strong_sponsor_keywords)
         
         # Weaker sponsor indicators
         sponsor_keywords = ['SPONSOR', 'PARTNER', 'PAID']
-        has_sponsor_keyword = any(kw in context for kw in sponsor_keywords)
+        signals['sponsor_keyword'] = any(kw in context for kw in sponsor_keywords)
         
         # Business/CTA terms
         business_terms = [
             'TRY', 'GET', 'START', 'LEARN', 'VISIT', 'DISCOUNT', 
             'CODE', 'OFFER', 'SIGN UP', 'FREE', 'DEMO', 'PRICING'
         ]
-        has_business_term = any(term in context for term in business_terms)
+        signals['business_term'] = any(term in context for term in business_terms)
+        
+        return signals
+    
+    def _has_sufficient_context(self, link: str, section_text: str) -> bool:
+        """Check if link has sufficient sponsorship context around it"""
+        signals = self._context_signals(link, section_text)
+        
+        if not signals['link_found']:
+            logger.debug(f"Link not found in section text")
+            return False
+        
+        if signals['content_indicator']:
+            logger.debug(f"Has content indicators - likely not a sponsor")
+            return False
+        
+        # Strong sponsor indicators - if we find these, we're good
+        if signals['strong_sponsor_keyword']:
+            logger.debug(f"Found strong sponsor keyword - approved")
+            return True
         
         # Accept if we have sponsor keyword OR business term (not both required)
-        result = has_sponsor_keyword or has_business_term
-        logger.debug(f"Context check result: sponsor_kw={has_sponsor_keyword}, business={has_business_term}, result={result}")
+        result = signals['sponsor_keyword'] or signals['business_term']
+        logger.debug(f"Context check result: sponsor_kw={signals['sponsor_keyword']}, business={signals['business_term']}, result={result}")
         
         return result
     
@@ -654,51 +878,67 @@ class SponsorAnalyzer:
     # REMOVED: _is_newsletter_sponsor_page method - we no longer check application URLs
     # Only storing email contacts now
     
-    def _is_legitimate_company(self, company_name: str, domain: str, url: str) -> bool:
-        """Check if this is a legitimate business that could sponsor newsletters"""
+    def _legitimacy_signals(self, company_name: str, domain: str, url: str) -> Dict[str, bool]:
+        """Business legitimacy signals for a candidate (shared by legitimacy check and pre-classifier)"""
         domain_lower = domain.lower()
         url_lower = url.lower()
         name_lower = company_name.lower()
         
-        # Check whitelist first - known legitimate sponsors
-        for known_sponsor in KNOWN_SPONSORS:
-            if (known_sponsor.lower() in domain_lower or 
-                known_sponsor.lower() in name_lower):
-                logger.debug(f"Whitelist match: {known_sponsor} - {domain}")
-                return True
+        # Whitelist - known legitimate sponsors
+        known_sponsor = any(known.lower() in domain_lower or known.lower() in name_lower
+                            for known in KNOWN_SPONSORS)
         
-        # Must not be clearly a blog/content site (relaxed check)
-        if self._is_clearly_content_site(domain, url, name_lower):
-            logger.debug(f"Legitimacy fail: Blog/content site - {domain}")
-            return False
-        
-        # Must have evidence of B2B business model OR business page structure
+        # Evidence of B2B business model
         business_indicators = [
             'app', 'platform', 'software', 'tool', 'service', 'solution',
             'company', 'corp', 'inc', 'llc', 'ltd', 'group', 'tech',
             'systems', 'labs', 'works', 'studio', 'agency', 'consulting',
             'api', 'saas', 'cloud', 'enterprise', 'business', 'professional'
         ]
-        
         has_business_indicator = any(indicator in domain_lower or indicator in name_lower 
                                    for indicator in business_indicators)
         
-        if not has_business_indicator:
-            logger.debug(f"Legitimacy fail: No business indicators - {domain}, {company_name}")
-        else:
-            logger.debug(f"Found business indicators in: {domain}, {company_name}")
-        
-        # Check for business page patterns
+        # Business page patterns
         business_url_patterns = [
             r'/contact', r'/about', r'/partnership', r'/partners', r'/advertise',
             r'/media-kit', r'/press', r'/business', r'/enterprise', r'/pricing'
         ]
-        
         has_business_page = any(re.search(pattern, url_lower) for pattern in business_url_patterns)
         
         # If it's a root domain, assume it has business pages
-        if url_lower == f"https://{domain_lower}" or url_lower == f"http://{domain_lower}":
-            has_business_page = True
+        root_url = url_lower == f"https://{domain_lower}" or url_lower == f"http://{domain_lower}"
+        
+        return {
+            'known_sponsor': known_sponsor,
+            'content_site': self._is_clearly_content_site(domain, url, name_lower),
+            'business_indicator': has_business_indicator,
+            'business_page': has_business_page or root_url,
+            'root_url': root_url
+        }
+    
+    def _is_legitimate_company(self, company_name: str, domain: str, url: str) -> bool:
+        """Check if this is a legitimate business that could sponsor newsletters"""
+        signals = self._legitimacy_signals(company_name, domain, url)
+        
+        # Check whitelist first - known legitimate sponsors
+        if signals['known_sponsor']:
+            logger.debug(f"Whitelist match - {domain}")
+            return True
+        
+        # Must not be clearly a blog/content site (relaxed check)
+        if signals['content_site']:
+            logger.debug(f"Legitimacy fail: Blog/content site - {domain}")
+            return False
+        
+        has_business_indicator = signals['business_indicator']
+        has_business_page = signals['business_page']
+        
+        if not has_business_indicator:
+            logger.debug(f"Legitimacy fail: No business indicators - {domain}, {company_name}")
+        else:
+            logger.debug(f"Found business indicators in: {domain}, {company_name}")
+        
+        if signals['root_url']:
             logger.debug(f"Root domain detected - assuming business pages: {url}")
         
         if has_business_page:
@@ -844,39 +1084,123 @@ class SponsorAnalyzer:
                 'reasoning': 'Conservative default estimate - 5K subscribers'
             }
     
-    def _scrape_website_info(self, url: str, domain: str, newsletter_name: str = None, company_name: str = None) -> Optional[Dict]:
-        """Scrape additional information from the website - Try Gemini first, then web scraping"""
+    def _apply_gemini_contact(self, target: Dict, contact_result: Dict):
+        """Copy a Gemini contact result onto a sponsor/info dict (status and confidence by contact type)"""
+        contact_type = contact_result.get('contact_type', 'generic_email')
+        confidence = contact_result.get('confidence', 0.5)
+        
+        target['sponsorEmail'] = contact_result['email']
+        target['contactMethod'] = 'email'
+        target['contactType'] = contact_type
+        target['confidence'] = confidence
+        
+        # Store named person details if available
+        if contact_type == 'named_person':
+            target['contactPersonName'] = contact_result.get('name')
+            target['contactPersonTitle'] = contact_result.get('title')
+            target['analysisStatus'] = 'complete'
+            target['confidence'] = max(confidence, 0.85)
+        elif contact_type == 'business_email':
+            target['analysisStatus'] = 'complete'
+            target['confidence'] = max(confidence, 0.6)
+        elif contact_type == 'generic_email':
+            target['analysisStatus'] = 'needs_review'  # Mark for manual verification
+            target['confidence'] = max(confidence, 0.4)
+    
+    def _contact_candidate(self, email: str, source: str, contact_type: str, confidence: float,
+                           name: str = None, title: str = None) -> Dict:
+        return {
+            'email': email,
+            'source': source,
+            'contactType': contact_type,
+            'confidence': confidence,
+            'name': name,
+            'title': title,
+            'discoveredAt': datetime.utcnow()
+        }
+    
+    def _stored_contacts(self, domain: str) -> Optional[Dict]:
+        """Stored discovery result for the domain (found or known not-found), if any"""
+        if not self.db or not domain:
+            return None
+        stored = self.db.get_domain_contacts(domain)
+        if stored:
+            self._count(self.contact_store_stats, 'hits')
+        return stored
+    
+    def _save_contacts(self, domain: str, candidates: List[Dict], info: Dict, company_name: str = None):
+        if not self.db or not domain:
+            return
+        best = {field: info[field] for field in CONTACT_FIELDS if field in info} if info.get('sponsorEmail') else None
+        self.db.save_domain_contacts(domain, candidates, best, company_name)
+    
+    def apply_stored_contact(self, target: Dict, domain: str) -> bool:
+        """Fill target's contact fields from the domaincontacts store; True if a stored contact was used"""
+        stored = self._stored_contacts(domain)
+        if stored and stored.get('best'):
+            target.update(stored['best'])
+            logger.info(f"📇 Using stored contact for {domain}: {stored['best'].get('sponsorEmail')}")
+            return True
+        return False
+    
+    def _scrape_website_info(self, url: str, domain: str, newsletter_name: str = None, company_name: str = None,
+                             use_store: bool = True) -> Optional[Dict]:
+        """
+        Scrape additional information from the website - Try Gemini first, then web scraping.
+        Contact discovery is skipped when the domaincontacts store already has a result for the
+        domain (use_store=False forces a fresh run, as the scheduled refresh does); fresh runs
+        record every candidate email they find. Only a completed discovery is stored.
+        """
         info = {}
         contact_email = None
+        candidates = []
+        # Without Gemini configured the website scan is the whole discovery
+        gemini_answered = not self.gemini_model
+        homepage_scanned = False
+        
+        # STEP 0: Stored discovery result (refreshed on a schedule, not per sighting)
+        stored = self._stored_contacts(domain) if use_store else None
+        if stored:
+            if stored.get('best'):
+                info.update(stored['best'])
+                logger.info(f"📇 Using stored contact for {domain}: {info.get('sponsorEmail')}")
+            else:
+                logger.info(f"📇 Stored result: no contact found for {domain} (next refresh {stored.get('refreshAfter')})")
+                info['contactMethod'] = 'none'
+                info['analysisStatus'] = 'pending'
+                info['confidence'] = 0.0
+            # Contact discovery is skipped, but tagging still needs the homepage title/description
+            if url.startswith(('http://', 'https://')):
+                try:
+                    page = self.page_cache.get(url, timeout=5)
+                    page.raise_for_status()
+                    info.update(self._page_details(page.extract))
+                except Exception as e:
+                    logger.debug(f"Failed to read homepage details for {url}: {e}")
+            return info
+        self._count(self.contact_store_stats, 'discoveries')
         
         # STEP 1: Try Gemini FIRST to find contact email (prioritizes named contacts)
-        if self.gemini_model:
+        if self.gemini_model and not self._gemini_available():
+            # Circuit open - go straight to web scraping and revisit with Gemini later
+            logger.info(f"🔌 Gemini circuit open - skipping Gemini contact search for: {domain}")
+            info['pendingGeminiEnrichment'] = True
+        elif self.gemini_model:
             logger.info(f"🔍 Trying Gemini first to find BEST contact for: {domain}")
             try:
                 contact_result = self.gemini_find_contact_email(domain, company_name, newsletter_name)
+                # None means the call failed or the answer was unusable; not_found is a real answer
+                gemini_answered = contact_result is not None
                 if contact_result and contact_result.get('email'):
                     contact_email = contact_result['email']
                     contact_type = contact_result.get('contact_type', 'generic_email')
-                    confidence = contact_result.get('confidence', 0.5)
                     
                     # Store contact information with metadata
-                    info['sponsorEmail'] = contact_email
-                    info['contactMethod'] = 'email'
-                    info['contactType'] = contact_type
-                    info['confidence'] = confidence
-                    
-                    # Store named person details if available
-                    if contact_type == 'named_person':
-                        info['contactPersonName'] = contact_result.get('name')
-                        info['contactPersonTitle'] = contact_result.get('title')
-                        info['analysisStatus'] = 'complete'
-                        info['confidence'] = max(confidence, 0.85)
-                    elif contact_type == 'business_email':
-                        info['analysisStatus'] = 'complete'
-                        info['confidence'] = max(confidence, 0.6)
-                    elif contact_type == 'generic_email':
-                        info['analysisStatus'] = 'needs_review'  # Mark for manual verification
-                        info['confidence'] = max(confidence, 0.4)
+                    self._apply_gemini_contact(info, contact_result)
+                    candidates.append(self._contact_candidate(
+                        contact_email, 'gemini', contact_type, info['confidence'],
+                        contact_result.get('name'), contact_result.get('title')
+                    ))
                     
                     logger.info(f"✅ Gemini found {contact_type} contact: {contact_email}")
             except Exception as e:
@@ -888,29 +1212,19 @@ class SponsorAnalyzer:
             try:
                 # Only scrape if we have a reasonable URL
                 if url.startswith(('http://', 'https://')):
-                    # CHANGED: Reduced timeout from 10 to 5 seconds
-                    response = requests.get(url, timeout=5, headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    })
-                    response.raise_for_status()
-                    
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Extract title
-                    title = soup.find('title')
-                    title_text = title.get_text().strip() if title else ""
+                    # One overall website budget for this sponsor (homepage + concurrent contact pages)
+                    deadline = SiteCrawler.new_deadline()
+                    page = self.page_cache.get(url, timeout=5)
+                    page.raise_for_status()
                     
-                    # Extract meta description
-                    meta_desc = soup.find('meta', attrs={'name': 'description'})
-                    description = meta_desc.get('content', '').strip() if meta_desc else ""
+                    extract = page.extract
                     
                     # Try to find contact email via web scraping
-                    contact_email = self._find_contact_email(soup, domain)
+                    contact_email = self._find_contact_email(extract, domain, deadline, candidates)
+                    homepage_scanned = True
                     
-                    if title_text and self._is_valid_company_name(title_text):
-                        info['extractedTitle'] = title_text
-                    if description:
-                        info['extractedDescription'] = description
+                    # Title and meta description
+                    info.update(self._page_details(extract))
                     
                     # Set contact information (email only - no application links)
                     if contact_email:
@@ -939,17 +1253,37 @@ class SponsorAnalyzer:
                     info['analysisStatus'] = 'pending'
                     info['confidence'] = 0.5  # Medium confidence - needs manual review
         
+        # A not-found is only remembered when both Gemini and the homepage scan actually ran; after a
+        # Gemini error, an open circuit or a failed fetch it would hide the domain until the next refresh
+        if contact_email or (gemini_answered and homepage_scanned):
+            self._save_contacts(domain, candidates, info, company_name)
+        
         return info if info else None
     
-    def _find_contact_email(self, soup: BeautifulSoup, domain: str) -> Optional[str]:
-        """Find contact email on the website - check multiple sources with priority"""
+    def _page_details(self, extract: PageExtract) -> Dict:
+        """extractedTitle / extractedDescription from a homepage, for tagging and the Gemini prompts"""
+        details = {}
+        if extract.title and self._is_valid_company_name(extract.title):
+            details['extractedTitle'] = extract.title
+        if extract.description:
+            details['extractedDescription'] = extract.description
+        return details
+    
+    def _find_contact_email(self, page: PageExtract, domain: str, deadline: Optional[float] = None,
+                            candidates: Optional[List[Dict]] = None) -> Optional[str]:
+        """
+        Find contact email on the website - check multiple sources with priority.
+        Every email seen is appended to candidates (if given) for the domaincontacts store.
+        """
         logger.info(f"🔍 Starting contact email search for domain: {domain}")
         
         # First check the main page
-        text = soup.get_text()
+        text = self._email_search_text(page)
         logger.debug(f"Main page text length: {len(text)} characters")
         emails = self._extract_emails_from_text(text, domain)
         logger.info(f"Found {len(emails)} email(s) on main page: {emails}")
+        if candidates is not None:
+            candidates.extend(self._contact_candidate(email, 'homepage', 'scraped_email', 0.8) for email in emails)
         
         if emails:
             best_email = self._select_best_email(emails, domain)
@@ -958,19 +1292,27 @@ class SponsorAnalyzer:
                 return best_email
         
         # Look for contact/about links and check those pages
-        contact_links = self._find_contact_links(soup)
+        contact_links = self._find_contact_links(page)
         logger.info(f"Found {len(contact_links)} contact page link(s): {contact_links[:5]}")
         
         all_emails = list(emails)  # Start with emails from main page
-        for link in contact_links[:3]:  # Limit to first 3 contact links
+        # Fetch the first 3 contact pages concurrently; pages missing the deadline are skipped
+        candidate_urls = [self._resolve_page_url(link, domain) for link in contact_links[:3]]
+        pages = self.crawler.fetch_all(candidate_urls, deadline, stop_at=CONTACT_PAGE_STOP_AT)
+        for link in candidate_urls:
+            if pages.get(link) is None:
+                logger.debug(f"Skipping contact page (failed or past deadline): {link}")
+                continue
             try:
                 logger.debug(f"Scraping contact page: {link}")
                 contact_emails = self._scrape_contact_page(link, domain)
                 if contact_emails:
-                    if isinstance(contact_emails, list):
-                        all_emails.extend(contact_emails)
-                    else:
-                        all_emails.append(contact_emails)
+                    if not isinstance(contact_emails, list):
+                        contact_emails = [contact_emails]
+                    all_emails.extend(contact_emails)
+                    if candidates is not None:
+                        candidates.extend(self._contact_candidate(email, 'contact_page', 'scraped_email', 0.8)
+                                          for email in contact_emails)
                     logger.info(f"Found {len(contact_emails) if isinstance(contact_emails, list) else 1} email(s) on contact page {link}")
             except Exception as e:
                 logger.warning(f"Failed to scrape contact page {link}: {e}")
@@ -1160,7 +1502,11 @@ class SponsorAnalyzer:
         logger.info(f"🏆 Selected best email: '{best_email}' with priority score: {best_priority}")
         return best_email
     
-    def _find_contact_links(self, soup: BeautifulSoup) -> List[str]:
+    def _email_search_text(self, page: PageExtract) -> str:
+        """Visible text plus mailto targets (addresses that only appear in an href)"""
+        return ' '.join([page.text] + page.mailtos)
+    
+    def _find_contact_links(self, page: PageExtract) -> List[str]:
         """Find contact/about page links"""
         contact_links = []
         
@@ -1170,36 +1516,37 @@ class SponsorAnalyzer:
             r'/reach', r'/get-in-touch', r'/connect'
         ]
         
-        for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
+        for href, _ in page.links:
             for pattern in contact_patterns:
-                if re.search(pattern, href):
-                    contact_links.append(link['href'])
+                if re.search(pattern, href.lower()):
+                    contact_links.append(href)
                     break
         
         return contact_links
     
+    def _resolve_page_url(self, url: str, domain: str) -> str:
+        """Absolute URL for a link found on the sponsor's site"""
+        if url.startswith('/'):
+            return f"https://{domain}{url}"
+        if not url.startswith('http'):
+            return f"https://{url}"
+        return url
+    
     def _scrape_contact_page(self, url: str, domain: str) -> List[str]:
         """Scrape a contact page for emails (returns list)"""
         try:
             logger.debug(f"Scraping contact page: {url} for domain: {domain}")
             
             # Make sure URL is absolute
-            if url.startswith('/'):
-                url = f"https://{domain}{url}"
-            elif not url.startswith('http'):
-                url = f"https://{url}"
+            url = self._resolve_page_url(url, domain)
             
             logger.debug(f"Resolved contact page URL: {url}")
             
             # CHANGED: Reduced timeout from 10 to 5 seconds
-            response = requests.get(url, timeout=5, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            response.raise_for_status()
+            page = self.page_cache.get(url, timeout=5, stop_at=CONTACT_PAGE_STOP_AT)
+            page.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text = soup.get_text()
+            text = self._email_search_text(page.extract)
             
             logger.debug(f"Contact page text length: {len(text)} characters")
             emails = self._extract_emails_from_text(text, domain)
@@ -1227,54 +1574,80 @@ class SponsorAnalyzer:
         
         logger.debug(f"🔍 Attempting to find real domain from affiliate redirect: {current_domain}")
         
-        # Strategy 1: Extract from subdomain (e.g., moneypickle.go2cloud.org -> moneypickle)
         parsed = urlparse(link if link.startswith('http') else f"https://{link}")
+        redirect_host = parsed.netloc.lower()
+        company_slug = re.sub(r'[^a-z0-9]', '', company_name.lower()).strip()
+        
+        # Mappings (including dead ends) are cached per (redirect host, company slug)
+        cache_key = (redirect_host, company_slug)
+        found, real_domain = self._recall_affiliate_redirect(cache_key)
+        if found:
+            return real_domain
+        if self.db:
+            cached = self.db.get_affiliate_redirect(redirect_host, company_slug)
+            if cached:
+                logger.debug(f"Affiliate redirect cache hit: {redirect_host} -> {cached.get('resolvedDomain')}")
+                self._remember_affiliate_redirect(cache_key, cached.get('resolvedDomain'))
+                return cached.get('resolvedDomain')
+        
+        # Candidates in priority order:
+        # Strategy 1: Extract from subdomain (e.g., moneypickle.go2cloud.org -> moneypickle)
+        # Strategy 2: Generate from company name (simple slug)
+        candidates = []
         if '.' in parsed.netloc:
             subdomain = parsed.netloc.split('.')[0]
             if len(subdomain) > 3:  # Reasonable subdomain length
-                # Try common TLDs
-                for tld in ['com', 'io', 'ai', 'co', 'app']:
-                    potential = f"{subdomain}.{tld}"
-                    logger.debug(f"🎯 Trying subdomain-based domain: {potential}")
-                    try:
-                        test_url = f"https://{potential}"
-                        response = requests.head(test_url, timeout=2, allow_redirects=True)
-                        if response.status_code < 400:
-                            logger.info(f"✅ Found real domain via subdomain: {potential}")
-                            return potential
-                    except:
-                        continue
-        
-        # Strategy 2: Generate from company name (simple slug)
-        company_slug = re.sub(r'[^a-z0-9]', '', company_name.lower()).strip()
+                candidates.extend(f"{subdomain}.{tld}" for tld in ['com', 'io', 'ai', 'co', 'app'])
         if len(company_slug) >= 3 and len(company_slug) <= 30:
-            for tld in ['com', 'io', 'ai', 'co']:
-                potential = f"{company_slug}.{tld}"
-                logger.debug(f"🎯 Trying company-name-based domain: {potential}")
-                try:
-                    test_url = f"https://{potential}"
-                    response = requests.head(test_url, timeout=2, allow_redirects=True)
-                    if response.status_code < 400:
-                        logger.info(f"✅ Found real domain via company name: {potential}")
-                        return potential
-                except:
-                    continue
+            candidates.extend(f"{company_slug}.{tld}" for tld in ['com', 'io', 'ai', 'co'])
+        candidates = list(dict.fromkeys(candidates))
         
-        logger.debug(f"⚠️ Could not determine real domain from affiliate redirect")
-        return None
+        # All HEAD probes run at once; the highest-priority live domain wins
+        logger.debug(f"🎯 Probing {len(candidates)} candidate domains: {candidates}")
+        winner, conclusive = self.crawler.probe_candidates([f"https://{potential}" for potential in candidates], timeout=2)
+        real_domain = urlparse(winner).netloc if winner else None
+        
+        if real_domain:
+            logger.info(f"✅ Found real domain from affiliate redirect: {real_domain}")
+        else:
+            logger.debug(f"⚠️ Could not determine real domain from affiliate redirect")
+        
+        # A miss is only remembered when every candidate gave a definite answer; timeouts and
+        # connection errors are retried on the next sighting
+        if conclusive:
+            self._remember_affiliate_redirect(cache_key, real_domain)
+            if self.db and candidates:
+                self.db.save_affiliate_redirect(redirect_host, company_slug, real_domain)
+        return real_domain
+    
+    def _recall_affiliate_redirect(self, cache_key: Tuple[str, str]) -> Tuple[bool, Optional[str]]:
+        with self._affiliate_redirect_lock:
+            entry = self._affiliate_redirect_cache.get(cache_key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.time():
+                del self._affiliate_redirect_cache[cache_key]
+                return False, None
+            self._affiliate_redirect_cache.move_to_end(cache_key)
+            return True, entry[1]
+    
+    def _remember_affiliate_redirect(self, cache_key: Tuple[str, str], real_domain: Optional[str]):
+        with self._affiliate_redirect_lock:
+            self._affiliate_redirect_cache[cache_key] = (time.time() + AFFILIATE_REDIRECT_MEMORY_TTL_SECONDS, real_domain)
+            self._affiliate_redirect_cache.move_to_end(cache_key)
+            while len(self._affiliate_redirect_cache) > AFFILIATE_REDIRECT_MEMORY_MAX_ENTRIES:
+                self._affiliate_redirect_cache.popitem(last=False)
     
     def _find_affiliate_signup_link(self, url: str, domain: str) -> Optional[str]:
         """Find affiliate signup link from website footer - look for 'Affiliates' links"""
         try:
             logger.info(f"🔍 Searching for affiliate signup link on: {url}")
             
-            # Try the main page first
-            response = requests.get(url, timeout=5, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            response.raise_for_status()
+            # Try the main page first (footer/nav is all we need unless the full page is already cached)
+            page = self.page_cache.get(url, timeout=5, stop_at=(STOP_AT_FOOTER,))
+            page.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            extract = page.extract
             
             # Look for affiliate links in footer and main navigation
             # Common patterns: "Affiliates", "Affiliate Program", "Become an Affiliate", "Partner Program"
@@ -1284,28 +1657,25 @@ class SponsorAnalyzer:
             ]
             
             # Search in footer first (most common location)
-            footer = soup.find('footer')
-            if footer:
+            if extract.footer_links:
                 logger.debug("Searching footer for affiliate links...")
-                affiliate_link = self._search_for_affiliate_link_in_element(footer, domain, url, affiliate_patterns)
+                affiliate_link = self._search_for_affiliate_link_in_element(extract.footer_links, domain, url, affiliate_patterns)
                 if affiliate_link:
                     logger.info(f"✅ Found affiliate link in footer: {affiliate_link}")
                     return affiliate_link
             
             # Also check navigation/menu
-            nav = soup.find('nav')
-            if nav:
+            if extract.nav_links:
                 logger.debug("Searching navigation for affiliate links...")
-                affiliate_link = self._search_for_affiliate_link_in_element(nav, domain, url, affiliate_patterns)
+                affiliate_link = self._search_for_affiliate_link_in_element(extract.nav_links, domain, url, affiliate_patterns)
                 if affiliate_link:
                     logger.info(f"✅ Found affiliate link in navigation: {affiliate_link}")
                     return affiliate_link
             
             # Check all links on page as fallback
             logger.debug("Searching all page links for affiliate links...")
-            for link in soup.find_all('a', href=True):
-                link_text = link.get_text().lower().strip()
-                href = link.get('href', '')
+            for href, link_text in extract.links:
+                link_text = link_text.lower()
                 
                 # Check if link text matches affiliate patterns
                 for pattern in affiliate_patterns:
@@ -1326,11 +1696,10 @@ class SponsorAnalyzer:
             logger.warning(f"Failed to find affiliate link for {url}: {e}")
             return None
     
-    def _search_for_affiliate_link_in_element(self, element, domain: str, base_url: str, patterns: List[str]) -> Optional[str]:
-        """Search for affiliate links within a specific HTML element"""
-        for link in element.find_all('a', href=True):
-            link_text = link.get_text().lower().strip()
-            href = link.get('href', '')
+    def _search_for_affiliate_link_in_element(self, links: List[Tuple[str, str]], domain: str, base_url: str, patterns: List[str]) -> Optional[str]:
+        """Search for affiliate links among the (href, text) links of a page region (footer/nav)"""
+        for href, link_text in links:
+            link_text = link_text.lower()
             
             # Check if link text matches affiliate patterns
             for pattern in patterns:
@@ -1361,6 +1730,11 @@ class SponsorAnalyzer:
             logger.warning("⚠️ Gemini model not available - skipping AI analysis")
             return sponsor_data
         
+        if not self._gemini_available():
+            logger.info(f"🔌 Gemini circuit open - deferring AI analysis for: {sponsor_data.get('sponsorName', 'Unknown')}")
+            sponsor_data['pendingGeminiEnrichment'] = True
+            return sponsor_data
+        
         try:
             company_name = sponsor_data.get('sponsorName', 'Unknown')
             domain = sponsor_data.get('rootDomain', 'N/A')
@@ -1368,30 +1742,17 @@ class SponsorAnalyzer:
             logger.info(f"🤖 Starting Gemini analysis for: {company_name}")
             
             # STEP 1: Find contact email (Gemini's strength - prioritizes named contacts)
-            if not sponsor_data.get('sponsorEmail'):
+            if not sponsor_data.get('sponsorEmail') and not self.apply_stored_contact(sponsor_data, sponsor_data.get('rootDomain')):
                 newsletter_name = sponsor_data.get('newsletterSponsored') or sponsor_data.get('sourceNewsletter')
+                self._count(self.contact_store_stats, 'discoveries')
                 contact_result = self.gemini_find_contact_email(domain, company_name, newsletter_name)
                 if contact_result and contact_result.get('email'):
-                    contact_type = contact_result.get('contact_type', 'generic_email')
-                    confidence = contact_result.get('confidence', 0.5)
-                    
-                    sponsor_data['sponsorEmail'] = contact_result['email']
-                    sponsor_data['contactMethod'] = 'email'
-                    sponsor_data['contactType'] = contact_type
-                    sponsor_data['confidence'] = confidence
-                    
-                    # Store named person details if available
-                    if contact_type == 'named_person':
-                        sponsor_data['contactPersonName'] = contact_result.get('name')
-                        sponsor_data['contactPersonTitle'] = contact_result.get('title')
-                        sponsor_data['analysisStatus'] = 'complete'
-                        sponsor_data['confidence'] = max(confidence, 0.85)
-                    elif contact_type == 'business_email':
-                        sponsor_data['analysisStatus'] = 'complete'
-                        sponsor_data['confidence'] = max(confidence, 0.6)
-                    elif contact_type == 'generic_email':
-                        sponsor_data['analysisStatus'] = 'needs_review'  # Mark for manual verification
-                        sponsor_data['confidence'] = max(confidence, 0.4)
+                    self._apply_gemini_contact(sponsor_data, contact_result)
+                    candidate = self._contact_candidate(
+                        contact_result['email'], 'gemini', sponsor_data['contactType'], sponsor_data['confidence'],
+                        contact_result.get('name'), contact_result.get('title')
+                    )
+                    self._save_contacts(sponsor_data.get('rootDomain'), [candidate], sponsor_data, company_name)
             
             # STEP 2: Comprehensive sponsor analysis
             prompt = f"""
@@ -1436,6 +1797,7 @@ Respond in JSON format:
                 }
                 response = self.gemini_model.generate_content(
                     prompt,
+                    call_type='analyze',
                     generation_config=generation_config
                 )
                 result_text = response.text.strip()
@@ -1488,6 +1850,7 @@ Respond in JSON format:
                 )
             
             sponsor_data['geminiAnalyzed'] = True
+            sponsor_data['pendingGeminiEnrichment'] = False
             logger.info(f"✅ Gemini analysis completed for {company_name}")
             
             return sponsor_data
@@ -1552,6 +1915,10 @@ Respond in JSON format:
             logger.warning("⚠️ Gemini model not available for email finding")
             return None
         
+        if not self._gemini_available():
+            logger.debug(f"Gemini circuit open - skipping contact search for {domain}")
+            return None
+        
         try:
             logger.info(f"🔍 Using Gemini to find BEST contact for: {domain}")
             
@@ -1615,6 +1982,7 @@ RULES:
                 }
                 response = self.gemini_model.generate_content(
                     prompt,
+                    call_type='contact',
                     generation_config=generation_config
                 )
                 result_text = response.text.strip()
@@ -1723,6 +2091,10 @@ RULES:
             logger.warning("Gemini model not available for newsletter audience estimation")
             return None
         
+        if not self._gemini_available():
+            logger.debug("Gemini circuit open - skipping audience estimation")
+            return None
+        
         try:
             logger.info(f"🔍 Using Gemini to estimate audience for newsletter: {newsletter_name}")
             
@@ -1763,6 +2135,7 @@ RULES:
                 }
                 response = self.gemini_model.generate_content(
                     prompt,
+                    call_type='audience',
                     generation_config=generation_config
                 )
                 result_text = response.text.strip()
@@ -1849,15 +2222,13 @@ RULES:
             if not url.startswith(('http://', 'https://')):
                 return None
             
-            response = requests.get(url, timeout=5, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            response.raise_for_status()
+            page = self.page_cache.get(url, timeout=5)
+            page.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            extract = page.extract
             
             # Extract text content
-            text_content = soup.get_text()
+            text_content = extract.text
             
             # Look for affiliate-related pages
             affiliate_pages = ['/affiliate', '/referral', '/partner', '/affiliates', '/referrals', '/partners']
@@ -1866,8 +2237,8 @@ RULES:
                     return text_content
             
             # Check for affiliate links in the page
-            for link in soup.find_all('a', href=True):
-                href = link['href'].lower()
+            for href, _ in extract.links:
+                href = href.lower()
                 if any(page in href for page in affiliate_pages):
                     return text_content
             
@@ -1883,6 +2254,11 @@ RULES:
             logger.warning("Gemini not available for tag assignment")
             return self._assign_tags_fallback(sponsor_data)
         
+        if not self._gemini_available():
+            logger.debug("Gemini circuit open - using fallback tag assignment")
+            sponsor_data['pendingGeminiEnrichment'] = True
+            return self._assign_tags_fallback(sponsor_data)
+        
         try:
             prompt = f"""
 Assign 1-3 tags from this list: {', '.join(TAGS)}
@@ -1900,7 +2276,7 @@ Rules:
 Respond with ONLY the tag names separated by commas (e.g., "Technology, Software, AI")
 """
             
-            response = self.gemini_model.generate_content(prompt)
+            response = self.gemini_model.generate_content(prompt, call_type='tags')
             tags_text = response.text.strip()
             
             assigned_tags = []
@@ -1918,53 +2294,60 @@ Respond with ONLY the tag names separated by commas (e.g., "Technology, Software
             logger.error(f"Gemini tag assignment failed: {e}")
             return self._assign_tags_fallback(sponsor_data)
     
+    def _tag_keyword_scores(self, sponsor_data: Dict) -> Tuple[bool, Dict[str, int]]:
+        """Keyword hits per tag over description/title/name, plus whether affiliate wording was found"""
+        # Get text to analyze
+        text_to_analyze = ""
+        if sponsor_data.get('extractedDescription'):
+            text_to_analyze += sponsor_data['extractedDescription'] + " "
+        if sponsor_data.get('extractedTitle'):
+            text_to_analyze += sponsor_data['extractedTitle'] + " "
+        if sponsor_data.get('sponsorName'):
+            text_to_analyze += sponsor_data['sponsorName'] + " "
+        
+        text_lower = text_to_analyze.lower()
+        
+        # Check for affiliate indicators first
+        has_affiliate = any(indicator.lower() in text_lower for indicator in AFFILIATE_INDICATORS)
+        
+        # Define keyword mappings for tags
+        tag_keywords = {
+            'Technology': ['tech', 'software', 'app', 'platform', 'api', 'cloud', 'saas', 'digital', 'data', 'ai', 'artificial intelligence'],
+            'Finance': ['finance', 'financial', 'banking', 'payment', 'fintech', 'crypto', 'cryptocurrency', 'investment', 'trading', 'money'],
+            'Health': ['health', 'healthcare', 'medical', 'fitness', 'wellness', 'mental health', 'therapy', 'doctor', 'clinic', 'hospital'],
+            'Education': ['education', 'learning', 'course', 'training', 'school', 'university', 'academy', 'tutorial', 'study', 'teach'],
+            'Marketing': ['marketing', 'advertising', 'promotion', 'brand', 'campaign', 'social media', 'seo', 'content', 'growth'],
+            'Ecommerce': ['ecommerce', 'e-commerce', 'shop', 'store', 'retail', 'selling', 'marketplace', 'commerce', 'buy', 'sell'],
+            'Business': ['business', 'enterprise', 'corporate', 'company', 'organization', 'management', 'productivity', 'workflow'],
+            'Entertainment': ['entertainment', 'gaming', 'music', 'video', 'streaming', 'media', 'fun', 'game', 'play', 'watch'],
+            'Travel': ['travel', 'trip', 'vacation', 'hotel', 'flight', 'booking', 'tourism', 'destination', 'journey'],
+            'Lifestyle': ['lifestyle', 'life', 'personal', 'home', 'family', 'daily', 'routine', 'living', 'wellness'],
+            'Fashion': ['fashion', 'clothing', 'style', 'apparel', 'wear', 'dress', 'outfit', 'trend', 'beauty'],
+            'Food': ['food', 'restaurant', 'cooking', 'recipe', 'dining', 'meal', 'kitchen', 'chef', 'culinary'],
+            'Sports': ['sports', 'fitness', 'athletic', 'exercise', 'workout', 'gym', 'team', 'player', 'game'],
+            'AI': ['ai', 'artificial intelligence', 'machine learning', 'ml', 'neural', 'automation', 'bot', 'intelligent'],
+            'Productivity': ['productivity', 'efficiency', 'organization', 'task', 'project', 'management', 'workflow', 'tools'],
+            'Software': ['software', 'app', 'application', 'program', 'tool', 'platform', 'system', 'development']
+        }
+        
+        # Score each tag based on keyword matches
+        tag_scores = {}
+        for tag, keywords in tag_keywords.items():
+            score = sum(1 for keyword in keywords if keyword in text_lower)
+            if score > 0:
+                tag_scores[tag] = score
+        
+        return has_affiliate, tag_scores
+    
     def _assign_tags_fallback(self, sponsor_data: Dict) -> List[str]:
         """Fallback tag assignment using keyword matching"""
         try:
             assigned_tags = []
+            has_affiliate, tag_scores = self._tag_keyword_scores(sponsor_data)
             
-            # Get text to analyze
-            text_to_analyze = ""
-            if sponsor_data.get('extractedDescription'):
-                text_to_analyze += sponsor_data['extractedDescription'] + " "
-            if sponsor_data.get('extractedTitle'):
-                text_to_analyze += sponsor_data['extractedTitle'] + " "
-            if sponsor_data.get('sponsorName'):
-                text_to_analyze += sponsor_data['sponsorName'] + " "
-            
-            text_lower = text_to_analyze.lower()
-            
-            # Check for affiliate indicators first
-            if any(indicator.lower() in text_lower for indicator in AFFILIATE_INDICATORS):
+            if has_affiliate:
                 assigned_tags.append('Affiliate')
             
-            # Define keyword mappings for tags
-            tag_keywords = {
-                'Technology': ['tech', 'software', 'app', 'platform', 'api', 'cloud', 'saas', 'digital', 'data', 'ai', 'artificial intelligence'],
-                'Finance': ['finance', 'financial', 'banking', 'payment', 'fintech', 'crypto', 'cryptocurrency', 'investment', 'trading', 'money'],
-                'Health': ['health', 'healthcare', 'medical', 'fitness', 'wellness', 'mental health', 'therapy', 'doctor', 'clinic', 'hospital'],
-                'Education': ['education', 'learning', 'course', 'training', 'school', 'university', 'academy', 'tutorial', 'study', 'teach'],
-                'Marketing': ['marketing', 'advertising', 'promotion', 'brand', 'campaign', 'social media', 'seo', 'content', 'growth'],
-                'Ecommerce': ['ecommerce', 'e-commerce', 'shop', 'store', 'retail', 'selling', 'marketplace', 'commerce', 'buy', 'sell'],
-                'Business': ['business', 'enterprise', 'corporate', 'company', 'organization', 'management', 'productivity', 'workflow'],
-                'Entertainment': ['entertainment', 'gaming', 'music', 'video', 'streaming', 'media', 'fun', 'game', 'play', 'watch'],
-                'Travel': ['travel', 'trip', 'vacation', 'hotel', 'flight', 'booking', 'tourism', 'destination', 'journey'],
-                'Lifestyle': ['lifestyle', 'life', 'personal', 'home', 'family', 'daily', 'routine', 'living', 'wellness'],
-                'Fashion': ['fashion', 'clothing', 'style', 'apparel', 'wear', 'dress', 'outfit', 'trend', 'beauty'],
-                'Food': ['food', 'restaurant', 'cooking', 'recipe', 'dining', 'meal', 'kitchen', 'chef', 'culinary'],
-                'Sports': ['sports', 'fitness', 'athletic', 'exercise', 'workout', 'gym', 'team', 'player', 'game'],
-                'AI': ['ai', 'artificial intelligence', 'machine learning', 'ml', 'neural', 'automation', 'bot', 'intelligent'],
-                'Productivity': ['productivity', 'efficiency', 'organization', 'task', 'project', 'management', 'workflow', 'tools'],
-                'Software': ['software', 'app', 'application', 'program', 'tool', 'platform', 'system', 'development']
-            }
-            
-            # Score each tag based on keyword matches
-            tag_scores = {}
-            for tag, keywords in tag_keywords.items():
-                score = sum(1 for keyword in keywords if keyword in text_lower)
-                if score > 0:
-                    tag_scores[tag] = score
-            
             # Sort by score and take remaining slots (up to 3 total)
             sorted_tags = sorted(tag_scores.items(), key=lambda x: x[1], reverse=True)
             remaining_slots = 3 - len(assigned_tags)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Offline tests for reuse of stored contact discovery results (domaincontacts)
+(no network, Gemini key, IMAP or MongoDB required)
+"""
+
+import os
+import sys
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm import FakeLLMBackend
+from page_extractor import extract_page
+from sponsor_analyzer import SponsorAnalyzer
+
+
+class _FakeContactDB:
+    """Just the SponsorDatabase methods the analyzer touches, kept in a dict"""
+
+    def __init__(self):
+        self.contacts = {}
+        self.saves = 0
+
+    def get_unhealthy_hosts(self):
+        return []
+
+    def save_host_health(self, host, fields):
+        pass
+
+    def get_affiliate_redirect(self, redirect_host, company_slug):
+        return None
+
+    def save_affiliate_redirect(self, *args, **kwargs):
+        pass
+
+    def get_domain_contacts(self, root_domain):
+        return self.contacts.get(root_domain)
+
+    def save_domain_contacts(self, root_domain, candidates, best, company_name=None):
+        self.saves += 1
+        self.contacts[root_domain] = {'rootDomain': root_domain, 'candidates': candidates, 'best': best,
+                                      'status': 'found' if best else 'not_found', 'companyName': company_name}
+
+
+def _analyzer(db):
+    return SponsorAnalyzer(llm_backend=FakeLLMBackend(seed=1), db=db)
+
+
+def _domain_with_contact(analyzer):
+    for i in range(20):
+        domain = f"example{i}.com"
+        if analyzer.gemini_find_contact_email(domain, f"Example {i}", None).get('email'):
+            return domain
+    raise AssertionError("fake backend never returned a contact")
+
+
+def test_second_sighting_reuses_stored_contact():
+    db = _FakeContactDB()
+    analyzer = _analyzer(db)
+    domain = _domain_with_contact(analyzer)
+    analyzer.reset_llm_stats()
+
+    # No scheme, so a miss goes to Gemini only and never touches the network
+    first = analyzer._scrape_website_info(domain, domain, None, 'Example')
+    calls_after_first = analyzer.llm_stats_snapshot()['total']['calls']
+    second = analyzer._scrape_website_info(domain, domain, None, 'Example')
+
+    assert first['sponsorEmail'] == second['sponsorEmail']
+    assert db.contacts[domain]['candidates'][0]['source'] == 'gemini'
+    assert analyzer.llm_stats_snapshot()['total']['calls'] == calls_after_first
+    assert analyzer.contact_store_snapshot() == {'hits': 1, 'discoveries': 1}
+
+
+def test_refresh_bypasses_store_and_sponsor_analysis_uses_it():
+    db = _FakeContactDB()
+    analyzer = _analyzer(db)
+    domain = _domain_with_contact(analyzer)
+    analyzer._scrape_website_info(domain, domain, None, 'Example')
+
+    analyzer._scrape_website_info(domain, domain, None, 'Example', use_store=False)
+    assert db.saves == 2
+
+    sponsor = analyzer.gemini_analyze_sponsor({'sponsorName': 'Example', 'rootDomain': domain})
+    assert sponsor['sponsorEmail'] == db.contacts[domain]['best']['sponsorEmail']
+    assert db.saves == 2
+
+
+class _FakePage:
+    def __init__(self, title='Acme Widgets', description='Widgets for teams'):
+        self.extract = extract_page(f'<html><head><title>{title}</title>'
+                                    f'<meta name="description" content="{description}"></head>'
+                                    '<body>No contact here</body></html>'.encode())
+
+    def raise_for_status(self):
+        pass
+
+
+def test_not_found_is_only_stored_when_discovery_completed():
+    db = _FakeContactDB()
+    analyzer = _analyzer(db)
+    not_found = {'contact_type': 'not_found', 'email': None, 'confidence': 0.0}
+
+    def timeout(url, **kwargs):
+        raise requests.Timeout('slow site')
+
+    # Gemini error and a homepage timeout: nothing learned, nothing stored
+    analyzer.gemini_find_contact_email = lambda *args: None
+    analyzer.page_cache.get = timeout
+    assert analyzer._scrape_website_info('https://acme.com', 'acme.com')['contactMethod'] == 'none'
+    # Gemini answered but the homepage couldn't be scanned
+    analyzer.gemini_find_contact_email = lambda *args: not_found
+    analyzer._scrape_website_info('https://acme.com', 'acme.com')
+    assert db.saves == 0
+
+    analyzer.page_cache.get = lambda url, **kwargs: _FakePage()
+    analyzer._scrape_website_info('https://acme.com', 'acme.com')
+    assert db.contacts['acme.com']['status'] == 'not_found'
+
+
+def test_stored_result_still_reads_homepage_details():
+    db = _FakeContactDB()
+    analyzer = _analyzer(db)
+    db.contacts['acme.com'] = {'rootDomain': 'acme.com', 'candidates': [], 'status': 'found',
+                               'best': {'sponsorEmail': 'partners@acme.com', 'contactMethod': 'email'}}
+    analyzer.page_cache.get = lambda url, **kwargs: _FakePage()
+
+    info = analyzer._scrape_website_info('https://acme.com', 'acme.com')
+
+    assert info['sponsorEmail'] == 'partners@acme.com'
+    assert info['extractedTitle'] == 'Acme Widgets'
+    assert info['extractedDescription'] == 'Widgets for teams'
+    assert analyzer.contact_store_snapshot() == {'hits': 1, 'discoveries': 0}
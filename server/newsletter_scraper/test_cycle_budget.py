@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Offline tests for deadline admission control of scraping cycles
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cycle_budget import CycleBudget
+from pipeline import Pipeline
+
+
+def test_without_deadline_everything_is_admitted():
+    budget = CycleBudget(None, history=[500])
+    assert all(budget.admit(str(i)) for i in range(100))
+    assert not budget.expired()
+    assert budget.snapshot()['partial'] is False
+
+
+def test_estimate_starts_from_history_and_learns():
+    budget = CycleBudget(time.time() + 60, history=[4, 6, 5, 100], reserve=0)
+    assert budget.estimate() == 5.5  # median of recent cycles
+    budget.admit('a')
+    budget._admitted_at['a'] -= 13.5  # pretend it took 13.5s
+    budget.finished('a')
+    assert budget.estimate() == (5.5 * 3 + budget.observed_cost()) / 4
+    assert budget.observed_cost() >= 13.5
+
+
+def test_stops_admitting_when_budget_is_too_small():
+    budget = CycleBudget(time.time() + 10, history=[4], reserve=2)
+    assert budget.admit('1')  # 8s left >= 4s estimate
+    budget._admitted_at['1'] -= 5
+    budget.finished('1')
+    budget.deadline = time.time() + 7  # 5s left >= (4 * 3 + 5) / 4 = 4.25s estimate
+    assert budget.admit('2')
+    budget.deadline = time.time() + 5  # 3s left < 4.25s
+    assert not budget.admit('3')
+    assert not budget.admit('4')  # closed for the rest of the cycle
+    stats = budget.snapshot()
+    assert stats['admitted'] == 2 and stats['not_admitted'] == 2 and stats['partial']
+
+
+def test_dropped_in_flight_only_counts_admitted_emails():
+    budget = CycleBudget(time.time() - 1, reserve=0)
+    assert budget.expired()
+    budget.dropped('never-admitted')
+    assert budget.snapshot()['dropped_at_deadline'] == 0
+
+
+def test_pipeline_returns_at_deadline_even_if_a_stage_is_busy():
+    pipeline = Pipeline('test')
+    pipeline.add_stage('stuck', lambda item: time.sleep(5))
+    started = time.time()
+    pipeline.run([1], deadline=time.time() + 0.2)
+    assert time.time() - started < 2
+    assert pipeline.abandoned
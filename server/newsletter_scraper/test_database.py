@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Offline tests for SponsorDatabase upserts racing another worker (in-memory stand-in
+for a collection with a unique rootDomain index)
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo.errors import DuplicateKeyError
+
+from database import SponsorDatabase
+
+
+class _RacingCollection:
+    """The first lookup misses; by the time of the insert another worker has created the record"""
+
+    name = 'sponsornews'
+
+    def __init__(self):
+        self.docs = []
+        self.lookups = 0
+
+    def find_one(self, query):
+        self.lookups += 1
+        if self.lookups == 1:
+            # The other worker inserts right after this lookup
+            self.docs.append({'_id': 'theirs', 'rootDomain': query['rootDomain'],
+                              'newslettersSponsored': [{'newsletterName': 'Tech Weekly'}]})
+            return None
+        return next((doc for doc in self.docs if doc['rootDomain'] == query['rootDomain']), None)
+
+    def update_one(self, query, update, upsert=False):
+        if upsert:
+            if any(doc['rootDomain'] == query['rootDomain'] for doc in self.docs):
+                raise DuplicateKeyError('E11000 duplicate key error: rootDomain')
+            raise AssertionError('the record exists, so the upsert cannot insert')
+        doc = next(doc for doc in self.docs if doc['_id'] == query['_id'])
+        listed = [entry['newsletterName'] for entry in doc['newslettersSponsored']]
+        if query['newslettersSponsored.newsletterName']['$ne'] in listed:
+            return SimpleNamespace(modified_count=0)
+        doc['newslettersSponsored'].append(update['$push']['newslettersSponsored'])
+        return SimpleNamespace(modified_count=1)
+
+
+def test_concurrent_insert_falls_back_to_appending_the_newsletter():
+    db = SponsorDatabase.__new__(SponsorDatabase)
+    db.collection = _RacingCollection()
+
+    record_id, added = db.upsert_sponsor({'rootDomain': 'acme.com', 'sponsorName': 'Acme',
+                                          'newsletterSponsored': 'Data Digest', 'tags': []})
+
+    assert (record_id, added) == ('theirs', True)
+    assert len(db.collection.docs) == 1
+    assert [entry['newsletterName'] for entry in db.collection.docs[0]['newslettersSponsored']] == \
+        ['Tech Weekly', 'Data Digest']
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Offline tests for sharing one inbox between scraper workers through leased email jobs
+(in-memory job store standing in for the emailjobs collection)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+config.LOG_FILE = os.devnull  # newsletter_scraper adds a file log handler on import
+
+import newsletter_scraper
+from email_jobs import EmailJobLeases
+from test_scraping_cycle import _FakeDB, _FakeInbox, _scraper
+
+
+class _JobDB(_FakeDB):
+    """_FakeDB plus an emailjobs store with the same atomic claim/lease semantics as SponsorDatabase"""
+
+    def __init__(self, max_attempts=3):
+        super().__init__()
+        self.jobs = {}
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+
+    def enqueue_email_jobs(self, uids):
+        with self.lock:
+            added = [uid for uid in uids if uid not in self.jobs]
+            for uid in added:
+                self.jobs[uid] = {'uid': uid, 'status': 'queued', 'attempts': 0, 'createdAt': time.time()}
+            return len(added)
+
+    def claim_email_job(self, worker_id, lease_seconds):
+        with self.lock:
+            now = time.time()
+            claimable = [job for job in self.jobs.values()
+                         if job['attempts'] < self.max_attempts and (
+                             job['status'] == 'queued' or
+                             (job['status'] == 'leased' and job['leaseExpiresAt'] < now))]
+            if not claimable:
+                return None
+            job = min(claimable, key=lambda j: j['createdAt'])
+            job.update(status='leased', leaseOwner=worker_id, leaseExpiresAt=now + lease_seconds)
+            job['attempts'] += 1
+            return dict(job)
+
+    def heartbeat_email_jobs(self, worker_id, uids, lease_seconds):
+        with self.lock:
+            held = [self.jobs[uid] for uid in uids
+                    if self.jobs[uid]['status'] == 'leased' and self.jobs[uid]['leaseOwner'] == worker_id]
+            for job in held:
+                job['leaseExpiresAt'] = time.time() + lease_seconds
+            return len(held)
+
+    def finish_email_job(self, uid, worker_id):
+        with self.lock:
+            job = self.jobs[uid]
+            if job['status'] != 'leased' or job['leaseOwner'] != worker_id:
+                return False
+            job['status'] = 'done'
+            return True
+
+    def release_email_job(self, uid, worker_id, error=None):
+        with self.lock:
+            job = self.jobs[uid]
+            if job['status'] != 'leased' or job['leaseOwner'] != worker_id:
+                return False
+            job['status'] = 'failed' if job['attempts'] >= self.max_attempts else 'queued'
+            job.pop('leaseOwner')
+            return True
+
+
+def test_two_workers_share_an_inbox_without_double_processing(monkeypatch):
+    monkeypatch.setattr(newsletter_scraper, 'EMAIL_JOB_LEASES', True)
+    db = _JobDB()
+    inbox = _FakeInbox(8)
+    workers = [_scraper(db, inbox), _scraper(db, inbox)]
+    summaries = [None, None]
+
+    def run(index):
+        summaries[index] = workers[index].run_scraping_cycle(max_emails=10)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert sorted(inbox.marked_read) == sorted(email_id.decode() for email_id in inbox.raw)
+    assert sorted(sponsor['rootDomain'] for sponsor in db.created) == sorted(f"acme{i}.com" for i in range(8))
+    assert {job['status'] for job in db.jobs.values()} == {'done'}
+    job_stats = [summary['email_job_stats'] for summary in summaries]
+    assert sum(stats['finished'] for stats in job_stats) == 8
+    assert sum(summary['emails_processed'] for summary in summaries) == 8
+
+
+def test_expired_leases_are_reclaimed_and_failed_jobs_released():
+    db = _JobDB(max_attempts=2)
+    db.enqueue_email_jobs(['1', '2'])
+
+    crashed = EmailJobLeases(db, worker_id='crashed', lease_seconds=0.05)
+    assert crashed.claim() == '1'
+    survivor = EmailJobLeases(db, worker_id='survivor', lease_seconds=60)
+    assert survivor.claim() == '2'
+    assert survivor.claim() is None  # '1' is still leased
+
+    time.sleep(0.1)
+    assert survivor.claim() == '1'
+    assert crashed.finish('1') is False  # the lease moved on; the late worker can't complete it
+    assert survivor.finish('1') is True
+
+    assert survivor.release_unfinished(error='boom') == 1
+    assert db.jobs['2']['status'] == 'queued'
+    assert survivor.claim() == '2'
+    assert survivor.release('2', error='boom') is True
+    assert db.jobs['2']['status'] == 'failed'  # out of attempts: parked, not retried
+    assert survivor.claim() is None
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Offline tests for parsing raw RFC822 emails, in-process and in parser worker processes
+(no IMAP connection required)
+"""
+
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from email_processor import EmailProcessor, _init_parser_worker, parse_raw_email
+
+
+def _raw_email(i: int) -> bytes:
+    message = MIMEMultipart('alternative')
+    message['Subject'] = f"Tech Weekly #{i}"
+    message['From'] = 'Tech Weekly <news@techweekly.io>'
+    message['Date'] = 'Mon, 06 Jan 2025 09:00:00 +0000'
+    text = (
+        "Today's top stories\n\n---\n\n"
+        f"SPONSORED BY Acme{i}\nAcme{i} is brought to you by our partner. "
+        f"Try it free at https://acme{i}.com/start?utm_source=techweekly\n\n---\n\n"
+        "The rest of the news"
+    )
+    html = (
+        f'<html><body><div class="sponsor-block">Sponsored by Acme{i}, our partner. '
+        f'Visit https://acme{i}.com/start</div><p>News</p></body></html>'
+    )
+    message.attach(MIMEText(text, 'plain'))
+    message.attach(MIMEText(html, 'html'))
+    return message.as_bytes()
+
+
+def test_parse_raw_email_returns_compact_record_with_sections():
+    record = parse_raw_email('7', _raw_email(7), parser=EmailProcessor(connect=False))
+
+    assert record['id'] == '7'
+    assert record['subject'] == 'Tech Weekly #7'
+    assert 'raw_message' not in record
+    assert record['sponsor_sections']
+    section = record['sponsor_sections'][0]
+    assert any('acme7.com' in link for link in section['links'])
+    assert 'confidence_score' in section and 'processing_status' in section
+    pickle.dumps(record)
+
+
+def test_worker_processes_match_in_process_parsing():
+    raw = {str(i): _raw_email(i) for i in range(6)}
+    local = {email_id: parse_raw_email(email_id, data, parser=EmailProcessor(connect=False))
+             for email_id, data in raw.items()}
+
+    with ProcessPoolExecutor(max_workers=2, initializer=_init_parser_worker) as pool:
+        futures = {email_id: pool.submit(parse_raw_email, email_id, data) for email_id, data in raw.items()}
+        remote = {email_id: future.result() for email_id, future in futures.items()}
+
+    assert remote == local
+
+
+def test_precomputed_sections_are_not_extracted_again():
+    processor = EmailProcessor(connect=False)
+    record = parse_raw_email('1', _raw_email(1), parser=processor)
+    assert processor.process_sponsor_sections_with_confidence(record) is record['sponsor_sections']
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the LLM client, circuit breaker and fake backend
+(no network, Gemini key, IMAP or MongoDB required)
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import TAGS
+from fake_llm import FakeLLMBackend, FakeLLMError
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient
+from sponsor_analyzer import SponsorAnalyzer
+
+
+def _analyzer(**backend_kwargs):
+    return SponsorAnalyzer(llm_backend=FakeLLMBackend(seed=1, **backend_kwargs))
+
+
+def test_fake_backend_contact_is_schema_valid():
+    analyzer = _analyzer()
+    for i in range(8):
+        domain = f"example{i}.com"
+        result = analyzer.gemini_find_contact_email(domain, f"Example {i}", "Tech Weekly")
+        assert result is not None
+        assert result['contact_type'] in ('named_person', 'business_email', 'generic_email', 'not_found')
+        if result['email']:
+            assert result['email'].endswith(f"@{domain}")
+
+
+def test_fake_backend_audience_tags_and_analysis():
+    analyzer = _analyzer()
+    audience = analyzer.gemini_estimate_newsletter_audience('Tech Weekly', 'SPONSORED BY Acme')
+    assert audience['count'] > 0
+
+    sponsor = {'sponsorName': 'Acme', 'rootDomain': 'acme.com', 'sponsorEmail': 'hello@acme.com'}
+    tags = analyzer._assign_tags_ai(sponsor)
+    assert tags and all(tag in TAGS for tag in tags)
+
+    analyzed = analyzer.gemini_analyze_sponsor(sponsor)
+    assert analyzed['geminiAnalyzed'] is True
+    assert all(tag in TAGS for tag in analyzed['tags'])
+
+
+def test_fake_backend_is_deterministic_for_same_prompt():
+    backend = FakeLLMBackend(seed=3)
+    prompt = "Analyze this potential newsletter sponsor\nCompany: Acme\nDescription: tools\n"
+    assert json.loads(backend.generate_content(prompt).text) == json.loads(backend.generate_content(prompt).text)
+
+
+def test_error_injection_raises():
+    backend = FakeLLMBackend(error_rate=1.0, seed=2)
+    raised = 0
+    for _ in range(20):
+        try:
+            backend.generate_content("test")
+        except FakeLLMError:
+            raised += 1
+    assert raised > 0
+
+
+def test_circuit_opens_and_routes_to_fallback():
+    client = LLMClient(FakeLLMBackend(error_rate=1.0, seed=4), CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    for _ in range(5):
+        try:
+            client.generate_content("test")
+        except (FakeLLMError, CircuitOpenError):
+            pass
+    assert not client.is_available()
+    assert client.breaker.snapshot()['state'] == 'open'
+
+
+def test_circuit_half_open_recovers():
+    backend = FakeLLMBackend(error_rate=1.0, seed=5)
+    client = LLMClient(backend, CircuitBreaker(failure_threshold=1, reset_seconds=0.05))
+    for _ in range(10):
+        try:
+            client.generate_content("test")
+        except Exception:
+            break
+    assert not client.is_available()
+    time.sleep(0.06)
+    backend.error_rate = 0.0
+    assert client.generate_content("test").text == 'ok'
+    assert client.breaker.snapshot()['state'] == 'closed'
+
+
+def test_usage_stats_per_call_type():
+    analyzer = _analyzer()
+    analyzer.gemini_find_contact_email('acme.com', 'Acme', 'Tech Weekly')
+    analyzer._assign_tags_ai({'sponsorName': 'Acme', 'rootDomain': 'acme.com'})
+    stats = analyzer.llm_stats_snapshot()
+    assert stats['by_call_type']['contact']['calls'] == 1
+    assert stats['by_call_type']['tags']['calls'] == 1
+    assert stats['total']['prompt_tokens'] > 0
+    assert sum(stats['by_call_type']['contact']['latency_histogram'].values()) == 1
+
+    analyzer.reset_llm_stats()
+    assert analyzer.llm_stats_snapshot()['total']['calls'] == 0
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the paged, concurrent re-analysis of pending sponsors
+(in-memory sponsor collection; fake analyzer instead of Gemini)
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+config.LOG_FILE = os.devnull  # newsletter_scraper adds a file log handler on import
+
+from newsletter_scraper import NewsletterScraper
+
+
+class _PendingDB:
+    def __init__(self, count):
+        base = datetime.utcnow() - timedelta(days=10)
+        self.sponsors = {
+            i: {'_id': i, 'sponsorName': f"Sponsor{i}", 'rootDomain': f"sponsor{i}.com", 'analysisStatus': 'pending',
+                'lastAnalyzed': None if i == 0 else base + timedelta(hours=i), 'tags': ['Tech']}
+            for i in range(count)
+        }
+        self.writes = []
+        self.pages_read = 0
+
+    def get_pending_sponsors_page(self, analyzed_before, limit=50):
+        self.pages_read += 1
+        pending = [dict(s) for s in self.sponsors.values()
+                   if s['analysisStatus'] == 'pending' and (s['lastAnalyzed'] is None or s['lastAnalyzed'] < analyzed_before)]
+        pending.sort(key=lambda s: (s['lastAnalyzed'] is not None, s['lastAnalyzed'] or datetime.min, s['_id']))
+        return pending[:limit]
+
+    def bulk_update_sponsors(self, updates):
+        self.writes.append(updates)
+        for sponsor_id, fields in updates:
+            self.sponsors[sponsor_id].update(fields)
+        return len(updates)
+
+
+class _Analyzer:
+    def __init__(self, delay=0.0):
+        self.gemini_model = object()
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def _gemini_available(self):
+        return True
+
+    def gemini_analyze_sponsor(self, sponsor):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if sponsor['_id'] == 3:
+            raise RuntimeError('boom')
+        if sponsor['_id'] % 2 == 0:
+            sponsor['sponsorEmail'] = f"partners@{sponsor['rootDomain']}"
+            sponsor['analysisStatus'] = 'complete'
+        return sponsor
+
+
+def _scraper(db, analyzer):
+    scraper = NewsletterScraper.__new__(NewsletterScraper)
+    scraper.db = db
+    scraper.sponsor_analyzer = analyzer
+    return scraper
+
+
+def test_pages_are_analyzed_concurrently_and_only_changes_written():
+    db = _PendingDB(7)
+    analyzer = _Analyzer(delay=0.05)
+
+    stats = _scraper(db, analyzer).run_manual_analysis(page_size=3)
+
+    assert stats == {'pages': 3, 'analyzed': 7, 'updated': 4, 'unchanged': 2, 'failed': 1, 'stopped': None}
+    assert analyzer.max_active > 1
+    assert [[sponsor_id for sponsor_id, _ in page] for page in db.writes] == [[0, 1, 2], [3, 4, 5], [6]]
+    written = {sponsor_id: fields for page in db.writes for sponsor_id, fields in page}
+    assert set(written[2]) == {'sponsorEmail', 'analysisStatus', 'lastAnalyzed'}
+    assert set(written[1]) == {'lastAnalyzed'}  # unchanged: only the checkpoint moves
+    assert set(written[3]) == {'lastAnalysisError', 'lastAnalyzed'}
+    assert all('_id' not in fields and 'tags' not in fields for fields in written.values())
+
+
+def test_time_boxed_run_resumes_with_the_oldest_unprocessed_sponsors():
+    db = _PendingDB(6)
+    scraper = _scraper(db, _Analyzer())
+
+    first = scraper.run_manual_analysis(deadline=time.time() - 1, page_size=2)
+    assert first['stopped'] == 'deadline' and first['analyzed'] == 0
+
+    second = scraper.run_manual_analysis(page_size=2)
+    assert second['analyzed'] == 6
+    order = [sponsor_id for page in db.writes for sponsor_id, _ in page]
+    assert order == [0, 1, 2, 3, 4, 5]  # never-analyzed first, then oldest lastAnalyzed
+
+    db.sponsors[5]['lastAnalyzed'] = datetime.utcnow() - timedelta(days=30)
+    db.writes.clear()
+    scraper.run_manual_analysis(page_size=2)
+    assert db.writes[0][0][0] == 5
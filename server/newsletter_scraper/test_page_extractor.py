@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the single-pass sponsor page extractor
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from page_extractor import declared_charset, extract_page
+
+PAGE = b"""<!doctype html>
+<html><head>
+<title> Acme &amp; Co - Workflow automation </title>
+<meta name="description" content="Automate everything.">
+<script>var fake = "noreply@tracker.com";</script>
+<style>.a { color: red }</style>
+</head><body>
+<nav><a href="/pricing">Pricing</a><a href="/about">About <b>us</b></a></nav>
+<p>Talk to sales at sales@acme.com</p>
+<a href="mailto:partners@acme.com?subject=Hi">Partner with us</a>
+<footer><a href="/affiliates">Become an Affiliate</a><a href="https://twitter.com/acme">Twitter</a></footer>
+</body></html>"""
+
+
+def test_extracts_head_links_regions_and_mailtos():
+    page = extract_page(PAGE)
+    assert page.title == 'Acme & Co - Workflow automation'
+    assert page.description == 'Automate everything.'
+    assert ('/about', 'About us') in page.links
+    assert page.nav_links == [('/pricing', 'Pricing'), ('/about', 'About us')]
+    assert page.footer_links[0] == ('/affiliates', 'Become an Affiliate')
+    assert page.mailtos == ['partners@acme.com']
+
+
+def test_visible_text_skips_scripts_and_styles():
+    page = extract_page(PAGE)
+    assert 'sales@acme.com' in page.text
+    assert 'noreply@tracker.com' not in page.text
+    assert 'color: red' not in page.text
+
+
+def test_truncated_html_still_yields_partial_extract():
+    page = extract_page(PAGE[:PAGE.index(b'<a href="https://twitter')])
+    assert page.title
+    assert page.footer_links == [('/affiliates', 'Become an Affiliate')]
+
+
+def test_utf8_page_without_header_charset_is_not_decoded_as_latin1():
+    page = ('<html><head><meta charset="utf-8"><title>Café —</title></head>'
+            '<body>Ñandú</body></html>').encode('utf-8')
+    # text/html without a charset: requests would guess ISO-8859-1 here
+    assert declared_charset({'Content-Type': 'text/html'}) is None
+    assert extract_page(page, declared_charset({'Content-Type': 'text/html'})).title == 'Café —'
+    assert extract_page(page.replace(b'<meta charset="utf-8">', b'')).text == 'Ñandú'
+
+    latin1 = '<html><head><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">' \
+             '<title>Café</title></head></html>'
+    assert extract_page(latin1.encode('latin-1')).title == 'Café'
+    # An explicit header charset wins over the meta tag
+    assert declared_charset({'Content-Type': 'text/html; charset="UTF-8"'}) == 'UTF-8'
+    assert extract_page(page, 'utf-8').title == 'Café —'
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the staged scraping pipeline (bounded queues, fan-out, failures)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import HELD, Pipeline, StageCancelled, raise_if_cancelled
+
+
+def test_items_flow_through_stages_with_fan_out():
+    finished = []
+    lock = threading.Lock()
+
+    def finish(item):
+        with lock:
+            finished.append(item)
+
+    pipeline = Pipeline('test', on_finished=finish)
+    pipeline.add_stage('split', lambda n: [n * 10 + i for i in range(3)], workers=2)
+    pipeline.add_stage('drop_odd', lambda n: [n] if n % 2 == 0 else [], workers=3)
+    pipeline.add_stage('last', lambda n: [], workers=1)
+    pipeline.run(range(5))
+
+    expected = sorted(n * 10 + i for n in range(5) for i in range(3))
+    assert sorted(finished) == expected
+    stats = pipeline.snapshot()
+    assert stats['split']['processed'] == 5
+    assert stats['split']['forwarded'] == 15
+    assert stats['last']['processed'] == len([n for n in expected if n % 2 == 0])
+
+
+def test_slow_stage_applies_back_pressure():
+    produced = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    def slow(item):
+        time.sleep(0.01)
+        return []
+
+    pipeline = Pipeline('test')
+    pipeline.add_stage('fast', lambda item: [item], workers=1, queue_size=2)
+    pipeline.add_stage('slow', slow, workers=1, queue_size=2)
+    pipeline.run(source())
+
+    stats = pipeline.snapshot()
+    assert len(produced) == 20
+    assert stats['slow']['processed'] == 20
+    assert stats['fast']['max_queue'] <= 2
+    assert stats['slow']['max_queue'] <= 2
+
+
+def test_handler_errors_are_reported_and_item_leaves_pipeline():
+    errors, finished = [], []
+
+    def explode(item):
+        if item == 3:
+            raise ValueError('boom')
+        return [item]
+
+    pipeline = Pipeline('test', on_finished=finished.append, on_error=lambda item, e: errors.append((item, str(e))))
+    pipeline.add_stage('explode', explode)
+    pipeline.add_stage('last', lambda item: [])
+    pipeline.run(range(5))
+
+    assert errors == [(3, 'boom')]
+    assert sorted(finished) == [0, 1, 2, 3, 4]
+    assert pipeline.snapshot()['explode']['errors'] == 1
+
+
+def test_priority_stage_takes_best_items_first():
+    order = []
+
+    def ranked(item):
+        if not order:
+            time.sleep(0.2)  # let every other item queue up behind the first
+        order.append(item)
+        return []
+
+    pipeline = Pipeline('test')
+    pipeline.add_stage('feed', lambda item: [item])
+    pipeline.add_stage('ranked', ranked, workers=1, queue_size=20, priority=lambda item: item % 7)
+    pipeline.run(range(10))
+
+    assert len(order) == 10
+    rest = order[1:]
+    assert [item % 7 for item in rest] == sorted((item % 7 for item in rest), reverse=True)
+    for early, late in ((0, 7), (1, 8), (2, 9)):
+        if early in rest:
+            assert rest.index(early) < rest.index(late)  # equal priority keeps arrival order
+
+
+def test_abandoned_run_is_cancelled_and_reports_when_workers_stop():
+    started, release = threading.Event(), threading.Event()
+    handled, finished, blocked = [], [], []
+    stopped = threading.Event()
+
+    def slow(item):
+        handled.append(item)
+        started.set()
+        release.wait(5)
+        try:
+            raise_if_cancelled('write')
+        except StageCancelled:
+            blocked.append(item)
+            raise
+        return [item]
+
+    pipeline = Pipeline('test', on_finished=finished.append, on_error=lambda item, e: finished.append(('error', item)))
+    pipeline.add_stage('slow', slow, queue_size=5)
+    pipeline.add_stage('write', lambda item: finished.append(('written', item)))
+    pipeline.run(range(3), deadline=time.time() + 0.2)
+
+    assert pipeline.abandoned and pipeline.cancelled.is_set()
+    pipeline.when_stopped(stopped.set)
+    assert not stopped.is_set()  # the busy worker still holds its item
+    release.set()
+    assert stopped.wait(2)
+    assert pipeline.wait_stopped(0)
+    # The in-flight call saw the cancel; queued items were discarded unseen and nothing left the pipeline
+    assert handled == [0] and blocked == [0]
+    assert finished == []
+
+
+def test_held_items_leave_with_the_item_that_releases_them():
+    parked, finished = [], []
+
+    def gather(item):
+        if item < 3:
+            parked.append(item)
+            return HELD
+        return [item] + parked
+
+    pipeline = Pipeline('test', on_finished=finished.append)
+    pipeline.add_stage('gather', gather)
+    pipeline.add_stage('last', lambda item: [])
+    pipeline.run(range(4))
+
+    assert sorted(finished) == [0, 1, 2, 3]
+    assert pipeline.snapshot()['gather']['forwarded'] == 4
+
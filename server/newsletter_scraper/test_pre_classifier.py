@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the local sponsor pre-classifier
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm import FakeLLMBackend
+from pre_classifier import PreClassifier, benchmark, build_training_examples
+from sponsor_analyzer import SponsorAnalyzer
+
+
+SPONSOR_CONTEXT = ("SPONSORED BY Acme - brought to you by Acme, presented by our partner. "
+                   "Try Acme free at https://acmesoftware.io/start - the developer platform for teams.")
+
+
+def _screened(analyzer, name, domain, link, context=''):
+    """A stored record as enrich_candidate saves it: with the features screen_link computed"""
+    return {'sponsorName': name, 'rootDomain': domain,
+            'preClassifierFeatures': analyzer.build_pre_classifier_features(name, domain, link, context=context)}
+
+
+def _examples():
+    analyzer = SponsorAnalyzer(llm_backend=FakeLLMBackend())
+    accepted = [_screened(analyzer, f'Acme Software {i}', f'acmesoftware{i}.io', f'https://acmesoftware{i}.io',
+                          SPONSOR_CONTEXT) for i in range(30)]
+    rejected = [_screened(analyzer, f'Daily News Journal {i}', f'dailynewsjournal{i}.news',
+                          f'https://dailynewsjournal{i}.news/story') for i in range(30)]
+    return build_training_examples({'accepted': accepted, 'rejected': rejected}), analyzer
+
+
+def test_untrained_classifier_never_rejects():
+    classifier = PreClassifier()
+    assert classifier.score(['legit:business_indicator']) is None
+    assert not classifier.is_clear_negative(['legit:content_site'])
+
+
+def test_trained_classifier_separates_obvious_cases():
+    examples, analyzer = _examples()
+    classifier = PreClassifier.train(examples)
+    sponsor = analyzer.build_pre_classifier_features('Acme Software', 'acmesoftware.io', 'https://acmesoftware.io',
+                                                     context=SPONSOR_CONTEXT)
+    news = analyzer.build_pre_classifier_features('Daily News Journal', 'dailynewsjournal.news', 'https://dailynewsjournal.news/story')
+    assert classifier.score(sponsor) > 0.9
+    assert classifier.is_clear_negative(news)
+
+
+def test_benchmark_reports_calls_avoided():
+    examples, _ = _examples()
+    report = benchmark(examples, holdout=0.5)
+    assert report['gemini_calls_avoided'] == report['candidates_skipped'] * 4
+    assert report['precision_after'] >= report['precision_before']
+
+
+def test_training_uses_the_features_scoring_sees():
+    analyzer = SponsorAnalyzer(llm_backend=FakeLLMBackend())
+    candidate = analyzer.screen_link('https://acmesoftware.io/start', SPONSOR_CONTEXT, 'Tech Weekly', 1000)
+    assert any(feature.startswith('ctx:') for feature in candidate['features'])
+    stored = {'sponsorName': candidate['company_name'], 'rootDomain': candidate['root_domain'],
+              'preClassifierFeatures': candidate['features']}
+    legacy = {'sponsorName': 'Acme', 'rootDomain': 'acmesoftware.io', 'extractedDescription': 'SaaS platform for teams'}
+
+    examples = build_training_examples({'accepted': [stored, legacy], 'rejected': [{'rootDomain': 'denied.com'}]})
+
+    # Legacy and domain-only records can't be rebuilt with their email context, so they are left out
+    assert examples == [(candidate['features'], 1)]
+
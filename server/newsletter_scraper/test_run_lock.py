@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the cross-process scraping-cycle lock: overlapping triggers coalesce
+into the active run plus exactly one follow-up (in-memory stand-in for scraperlocks)
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+config.LOG_FILE = os.devnull  # newsletter_scraper adds a file log handler on import
+
+import newsletter_scraper
+from newsletter_scraper import NewsletterScraper
+from run_lock import RunLock
+
+
+class _LockDB:
+    """scraperlocks semantics of SponsorDatabase: atomic acquire/refresh/release/follow-up"""
+
+    def __init__(self):
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def acquire_run_lock(self, name, owner, ttl_seconds):
+        with self.lock:
+            doc = self.locks.setdefault(name, {'_id': name, 'owner': None, 'generation': 0})
+            if doc['owner'] and doc['expiresAt'] > time.time():
+                return None
+            doc.update(owner=owner, expiresAt=time.time() + ttl_seconds, followUpRequested=False)
+            doc['generation'] += 1
+            return dict(doc)
+
+    def refresh_run_lock(self, name, owner, ttl_seconds):
+        with self.lock:
+            doc = self.locks.get(name)
+            if not doc or doc['owner'] != owner:
+                return False
+            doc['expiresAt'] = time.time() + ttl_seconds
+            return True
+
+    def release_run_lock(self, name, owner, generation, result):
+        with self.lock:
+            doc = self.locks.get(name)
+            if not doc or doc['owner'] != owner:
+                return False
+            before = dict(doc)
+            doc.update(owner=None, expiresAt=None, lastGeneration=generation, lastResult=result,
+                       lastFinishedAt=datetime.utcnow())
+            return before
+
+    def request_follow_up_run(self, name):
+        with self.lock:
+            doc = self.locks.get(name)
+            if not doc or not doc['owner']:
+                return None
+            doc['followUpRequested'] = True
+            return dict(doc)
+
+    def get_run_lock(self, name):
+        with self.lock:
+            return dict(self.locks[name]) if name in self.locks else None
+
+
+def _scraper(db, runs, release):
+    scraper = NewsletterScraper.__new__(NewsletterScraper)
+    scraper.db = db
+    scraper.progress = None
+
+    def cycle(max_emails=10, deadline=None, on_stopped=None):
+        runs.append(max_emails)
+        number = len(runs)
+        if number == 1:
+            release.wait(5)
+        summary = {'new_sponsors_added': number, 'emails_processed': number, 'llm_stats': {'total': {}}}
+        on_stopped(summary)
+        return summary
+
+    scraper._run_scraping_cycle = cycle
+    return scraper
+
+
+def test_overlapping_triggers_coalesce_into_one_follow_up(monkeypatch):
+    monkeypatch.setattr(newsletter_scraper, 'RUN_LOCK_POLL_SECONDS', 0.02)
+    db = _LockDB()
+    runs = []
+    release = threading.Event()
+    results = {}
+
+    def trigger(name):
+        results[name] = _scraper(db, runs, release).run_scraping_cycle(max_emails=5)
+
+    first = threading.Thread(target=trigger, args=('first',))
+    first.start()
+    while not runs:
+        time.sleep(0.01)
+    waiters = [threading.Thread(target=trigger, args=(f'waiter{i}',)) for i in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.1)
+    assert len(runs) == 1  # no parallel cycle while the first one holds the lock
+    assert db.locks['scraping_cycle']['followUpRequested'] is True
+
+    release.set()
+    for thread in [first] + waiters:
+        thread.join(5)
+
+    assert len(runs) == 2  # the active run plus exactly one follow-up
+    assert results['first']['coalesced'] is False and results['first']['new_sponsors_added'] == 1
+    # The holder runs the follow-up as it releases; the waiters get its result
+    assert results['first']['follow_up']['new_sponsors_added'] == 2
+    waiter_results = [results[f'waiter{i}'] for i in range(3)]
+    assert all(result['coalesced'] for result in waiter_results)
+    assert all(result['new_sponsors_added'] == 2 for result in waiter_results)
+    assert 'llm_stats' not in db.locks['scraping_cycle']['lastResult']
+    assert db.locks['scraping_cycle']['owner'] is None
+
+
+def test_trigger_returns_active_result_at_its_deadline(monkeypatch):
+    monkeypatch.setattr(newsletter_scraper, 'RUN_LOCK_POLL_SECONDS', 0.02)
+    monkeypatch.setattr(newsletter_scraper, 'CYCLE_DEADLINE_RESERVE_SECONDS', 0)
+    db = _LockDB()
+    holder = RunLock(db, owner='other-process')
+    assert holder.acquire()
+
+    result = _scraper(db, [], threading.Event()).run_scraping_cycle(deadline=time.time() + 0.2)
+
+    assert result['coalesced'] is True and result['still_running'] is True
+    assert result['follow_up_queued'] is True
+    assert result['new_sponsors_added'] == 0
+    holder.release({'new_sponsors_added': 4})
+
+
+def test_holder_runs_the_follow_up_when_every_waiter_gave_up(monkeypatch):
+    monkeypatch.setattr(newsletter_scraper, 'RUN_LOCK_POLL_SECONDS', 0.02)
+    monkeypatch.setattr(newsletter_scraper, 'CYCLE_DEADLINE_RESERVE_SECONDS', 0)
+    db = _LockDB()
+    runs = []
+    release = threading.Event()
+    results = {}
+
+    first = threading.Thread(target=lambda: results.update(first=_scraper(db, runs, release).run_scraping_cycle()))
+    first.start()
+    while not runs:
+        time.sleep(0.01)
+    waiter = _scraper(db, runs, release).run_scraping_cycle(deadline=time.time() + 0.1)
+    assert waiter['coalesced'] is True and waiter['follow_up_queued'] is True
+
+    release.set()
+    first.join(5)
+
+    assert len(runs) == 2  # the waiter's deadline passed, so the holder ran the follow-up
+    assert results['first']['follow_up']['new_sponsors_added'] == 2
+    lock = db.locks['scraping_cycle']
+    assert lock['owner'] is None and lock['followUpRequested'] is False
+    assert lock['lastResult']['new_sponsors_added'] == 2
+
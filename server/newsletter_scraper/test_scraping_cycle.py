@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Offline test of a full scraping cycle through the pipeline, with progress events
+(fake IMAP, MongoDB and website enrichment; fake Gemini backend)
+"""
+
+import io
+import json
+import os
+import sys
+import time
+from email.mime.text import MIMEText
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+config.LOG_FILE = os.devnull  # newsletter_scraper adds a file log handler on import
+
+from api_wrapper import ProgressStream
+from email_processor import EmailProcessor
+from fake_llm import FakeLLMBackend
+import newsletter_scraper
+from newsletter_scraper import NewsletterScraper
+from sponsor_analyzer import SponsorAnalyzer
+
+
+def _raw_email(i: int, sponsor: str = None, newsletter: str = 'Tech Weekly', repeat_link: bool = False) -> bytes:
+    sponsor = sponsor or f"acme{i}"
+    name = sponsor.title()
+    again = f" Or see https://{sponsor}.com/pricing for plans." if repeat_link else ""
+    message = MIMEText(
+        f"{newsletter} #{i}\n\n---\n\n"
+        f"SPONSORED BY {name} - brought to you by {name}, presented by our partner and "
+        f"promoted by {name} in partnership with {newsletter}. Try it free at "
+        f"https://{sponsor}.com/start?utm_source=newsletter - use code WEEKLY for a promo code discount.{again}\n\n---\n\n"
+        "The rest of the news", 'plain')
+    message['Subject'] = f"{newsletter} #{i}"
+    message['From'] = f"{newsletter} <news@{newsletter.replace(' ', '').lower()}.io>"
+    return message.as_bytes()
+
+
+class _FakeDB:
+    def __init__(self, existing_domains=()):
+        self.existing_domains = set(existing_domains)
+        self.created = []
+        self.timings = []
+
+    def get_unhealthy_hosts(self):
+        return []
+
+    def get_domain_contacts(self, root_domain):
+        return None
+
+    def save_domain_contacts(self, *args, **kwargs):
+        pass
+
+    def get_recent_email_costs(self, limit=10):
+        return []
+
+    def save_cycle_timing(self, timing):
+        self.timings.append(timing)
+
+    def acquire_run_lock(self, name, owner, ttl_seconds):
+        return {'_id': name, 'owner': owner, 'generation': 1}
+
+    def refresh_run_lock(self, name, owner, ttl_seconds):
+        return True
+
+    def release_run_lock(self, name, owner, generation, result):
+        return {'_id': name, 'owner': owner, 'followUpRequested': False}
+
+    def get_max_subscriber_count_for_newsletter(self, newsletter_name):
+        return 0
+
+    def is_domain_denied(self, domain):
+        return False
+
+    def get_sponsor_by_domain(self, domain):
+        if domain in self.existing_domains:
+            return {'_id': 'existing', 'contactMethod': 'email'}
+        return None
+
+    def create_sponsor(self, sponsor):
+        return self.upsert_sponsor(sponsor)[0]
+
+    def upsert_sponsor(self, sponsor):
+        listed = [(s['rootDomain'], s.get('newsletterSponsored')) for s in self.created]
+        if (sponsor['rootDomain'], sponsor.get('newsletterSponsored')) in listed:
+            return 'id-listed', False
+        self.created.append(sponsor)
+        return f"id-{len(self.created)}", True
+
+
+class _FakeInbox(EmailProcessor):
+    def __init__(self, count):
+        super().__init__(connect=False)
+        self.raw = {str(i).encode(): _raw_email(i) for i in range(count)}
+        self.marked_read = []
+
+    def get_recent_email_ids(self, limit=30):
+        return list(self.raw)[:limit]
+
+    def fetch_raw_email(self, email_id):
+        return self.raw[email_id]
+
+    def mark_email_as_read(self, email_id):
+        self.marked_read.append(email_id)
+        return True
+
+
+def _scraper(db, inbox):
+    scraper = NewsletterScraper.__new__(NewsletterScraper)
+    scraper.db = db
+    scraper.email_processor = inbox
+    scraper.sponsor_analyzer = SponsorAnalyzer(llm_backend=FakeLLMBackend(seed=1), db=db)
+    scraper.progress = None
+    scraper._pipeline = None
+
+    def screen(link, context, newsletter_name, cached_subscriber_count=None):
+        domain = link.split('/')[2]
+        return {'link': link, 'domain': domain, 'root_domain': domain, 'context': context,
+                'newsletter_name': newsletter_name, 'cached_subscriber_count': 1000}
+
+    def enrich(candidate):
+        return {'sponsorName': candidate['domain'].split('.')[0].title(), 'sponsorLink': candidate['link'],
+                'rootDomain': candidate['domain'], 'newsletterSponsored': candidate['newsletter_name'], 'sponsorEmail': f"partners@{candidate['domain']}",
+                'contactMethod': 'email', 'contactType': 'business_email', 'estimatedSubscribers': 1000, 'tags': []}
+
+    scraper.sponsor_analyzer.screen_link = screen
+    scraper.sponsor_analyzer.enrich_candidate = enrich
+    return scraper
+
+
+def test_cycle_streams_ndjson_events_and_summary_counts():
+    db = _FakeDB(existing_domains={'acme1.com'})
+    inbox = _FakeInbox(4)
+    scraper = _scraper(db, inbox)
+    out = io.StringIO()
+    scraper.progress = ProgressStream(out)
+
+    summary = scraper.run_scraping_cycle(max_emails=10)
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    kinds = [event['event'] for event in events]
+    assert kinds[0] == 'cycle_started'
+    assert kinds.count('email_processed') == 4
+    assert {e['root_domain'] for e in events if e['event'] == 'sponsor_saved'} == {'acme0.com', 'acme2.com', 'acme3.com'}
+    assert [e['reason'] for e in events if e['event'] == 'sponsor_rejected'] == ['already_exists']
+
+    assert summary['emails_processed'] == 4
+    assert summary['new_sponsors_added'] == 3
+    assert summary['rejection_stats']['already_exists'] == 1
+    assert summary['contact_quality_stats']['business_email_found'] == 3
+    assert sorted(inbox.marked_read) == sorted(email_id.decode() for email_id in inbox.raw)
+    assert db.timings and db.timings[0]['emailsProcessed'] == 4
+
+
+def test_candidate_priority_prefers_high_value_candidates():
+    analyzer = SponsorAnalyzer(llm_backend=FakeLLMBackend(seed=1), db=_FakeDB())
+    strong = {'features': ['legit:known_sponsor', 'ctx:strong_sponsor_keyword'], 'cached_subscriber_count': 250000,
+              'pre_score': 0.9}
+    weak = {'features': ['ctx:sponsor_keyword'], 'cached_subscriber_count': 0, 'pre_score': None}
+
+    best = analyzer.candidate_priority(strong, section_confidence=0.9)
+    assert best > analyzer.candidate_priority(strong, section_confidence=0.9, known_in_db=True)
+    assert analyzer.candidate_priority(strong, section_confidence=0.9, known_in_db=True) > \
+        analyzer.candidate_priority(weak, section_confidence=0.5)
+    assert 0 < analyzer.candidate_priority(weak) < best <= 1
+
+
+def test_domain_sponsoring_several_newsletters_is_enriched_once():
+    db = _FakeDB()
+    inbox = _FakeInbox(0)
+    inbox.raw = {
+        b'0': _raw_email(0, 'shared', 'Tech Weekly'),
+        b'1': _raw_email(1, 'shared', 'Data Digest'),
+        b'2': _raw_email(2, 'shared', 'Ops Notes'),
+        b'3': _raw_email(3, 'solo', 'Ops Notes')
+    }
+    scraper = _scraper(db, inbox)
+    enrich = scraper.sponsor_analyzer.enrich_candidate
+    enriched = []
+
+    def counting_enrich(candidate):
+        enriched.append(candidate['root_domain'])
+        return enrich(candidate)
+
+    scraper.sponsor_analyzer.enrich_candidate = counting_enrich
+
+    summary = scraper.run_scraping_cycle(max_emails=10)
+
+    assert sorted(enriched) == ['shared.com', 'solo.com']
+    assert summary['dedup_stats'] == {'domains_enriched': 2, 'enrichments_saved': 2, 'newsletter_entries_added': 2}
+    shared = [sponsor for sponsor in db.created if sponsor['rootDomain'] == 'shared.com']
+    assert sorted(sponsor['newsletterSponsored'] for sponsor in shared) == ['Data Digest', 'Ops Notes', 'Tech Weekly']
+    assert all(sponsor['sponsorEmail'] == 'partners@shared.com' for sponsor in shared)
+    assert summary['new_sponsors_added'] == 2
+    assert summary['emails_processed'] == 4
+
+
+def test_repeated_links_add_each_newsletter_once():
+    db = _FakeDB()
+    inbox = _FakeInbox(0)
+    inbox.raw = {
+        b'0': _raw_email(0, 'shared', 'Tech Weekly', repeat_link=True),
+        b'1': _raw_email(1, 'shared', 'Tech Weekly'),
+        b'2': _raw_email(2, 'shared', 'Data Digest', repeat_link=True)
+    }
+    scraper = _scraper(db, inbox)
+    out = io.StringIO()
+    scraper.progress = ProgressStream(out)
+
+    summary = scraper.run_scraping_cycle(max_emails=10)
+
+    # One link per email survives screening; the second Tech Weekly issue adds nothing
+    assert summary['pipeline_stats']['screen']['forwarded'] == 3
+    assert summary['dedup_stats'] == {'domains_enriched': 1, 'enrichments_saved': 1, 'newsletter_entries_added': 1}
+    assert sorted(sponsor['newsletterSponsored'] for sponsor in db.created) == ['Data Digest', 'Tech Weekly']
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len([e for e in events if e.get('kind') == 'newsletter_entry']) == 1
+    assert {e['email_id']: e['sponsor_links'] for e in events if e['event'] == 'email_processed'} == {'0': 2, '1': 1, '2': 2}
+    assert summary['emails_processed'] == 3
+
+
+def test_parked_links_are_saved_after_the_first_link(monkeypatch):
+    monkeypatch.setattr(newsletter_scraper, 'PIPELINE_PERSIST_WORKERS', 3)
+    db = _FakeDB()
+    create = db.upsert_sponsor
+
+    def slow_create(sponsor):
+        if not db.created:
+            time.sleep(0.2)  # a parked link forwarded too early would overtake this write
+        return create(sponsor)
+
+    db.upsert_sponsor = slow_create
+    inbox = _FakeInbox(0)
+    inbox.raw = {str(i).encode(): _raw_email(i, 'shared', name)
+                 for i, name in enumerate(['Tech Weekly', 'Data Digest', 'Ops Notes'])}
+    scraper = _scraper(db, inbox)
+    enrich = scraper.sponsor_analyzer.enrich_candidate
+    enriched = []
+
+    def slow_enrich(candidate):
+        enriched.append(candidate['newsletter_name'])
+        time.sleep(0.2)  # the other links park on the domain meanwhile
+        return enrich(candidate)
+
+    scraper.sponsor_analyzer.enrich_candidate = slow_enrich
+
+    summary = scraper.run_scraping_cycle(max_emails=10)
+
+    assert db.created[0]['newsletterSponsored'] == enriched[0]
+    assert summary['new_sponsors_added'] == 1
+    assert summary['dedup_stats'] == {'domains_enriched': 1, 'enrichments_saved': 2, 'newsletter_entries_added': 2}
+    assert summary['emails_processed'] == 3
+
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the pooled website fetcher and page cache (local HTTP server, no internet)
+"""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from page_cache import PageCache, normalize_url
+from site_crawler import SiteCrawler
+from web_fetcher import NonHTMLContentError, STOP_AT_MAILTO, WebFetcher
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    gets = 0
+    clients = set()  # client (host, port) pairs, one per TCP connection
+    robots_txt = ''
+    extra_pages = {
+        '/contact': ('text/html; charset=utf-8',
+                     b'<html><body><a href="mailto:partners@acme.com">Email us</a>' + b'<p>filler</p>' * 50000),
+        '/team': ('text/html', b'<html><body><a href="mailto:team@acme.com">Team</a>' + b'<p>filler</p>' * 3000),
+        '/big': ('text/html', b'<html><body>' + b'x' * (3 * 1024 * 1024)),
+        '/brochure.pdf': ('application/pdf', b'%PDF-1.4' + b'0' * 1024),
+    }
+
+    def do_GET(self):
+        type(self).clients.add(self.client_address)
+        if self.path == '/robots.txt':
+            body = self.robots_txt.encode()
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        type(self).gets += 1
+        if self.path in self.extra_pages:
+            content_type, body = self.extra_pages[self.path]
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html><head><title>Acme</title></head><body>hello@acme.com</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _fetcher(min_delay=0.0):
+    fetcher = WebFetcher()
+    fetcher.scheduler.min_delay = min_delay
+    return fetcher
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_requests_reuse_pooled_connection():
+    server = _serve()
+    fetcher = _fetcher()
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        for path in ('/', '/contact', '/about'):
+            assert fetcher.get(base + path).status_code == 200
+        assert fetcher.head(base + '/').status_code == 200
+
+        stats = fetcher.connection_stats()
+        assert stats['requests'] == 5  # includes the one robots.txt fetch
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 4
+
+        host = f"127.0.0.1:{server.server_address[1]}"
+        assert stats['by_host'][host]['requests'] == 4  # same key for issued requests and the pool
+        assert stats['by_host'][host]['pool_requests'] == 5
+
+        fetcher.reset_stats()
+        assert fetcher.connection_stats()['requests'] == 0
+        # Warm connection survives the reset and is reused by the next window
+        assert fetcher.get(base + '/').status_code == 200
+        stats = fetcher.connection_stats()
+        assert stats['requests'] == 1
+        assert stats['connections_opened'] == 0
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+
+def test_default_headers_sent():
+    fetcher = WebFetcher()
+    assert fetcher.session.headers['User-Agent'].startswith('Mozilla/5.0')
+    fetcher.close()
+
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://Acme.com:443/?utm_source=x#top') == 'https://acme.com/'
+    assert normalize_url('https://acme.com/pricing/') == normalize_url('https://acme.com/pricing')
+    assert normalize_url('https://acme.com/?b=2&a=1') == 'https://acme.com/?a=1&b=2'
+
+
+def test_page_cache_downloads_once_and_revalidates_from_disk(tmp_path):
+    server = _serve()
+    fetcher = _fetcher()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        _Handler.gets = 0
+        cache = PageCache(fetcher, cache_dir=str(tmp_path))
+        first = cache.get(url)
+        second = cache.get(url + '?utm_source=newsletter')
+        assert first is second
+        assert first.extract.title == 'Acme'
+        assert _Handler.gets == 1
+
+        # Next cycle: memory tier cleared, disk entry revalidated with If-None-Match -> 304
+        cache.clear()
+        third = cache.get(url)
+        assert third.content == first.content
+        assert _Handler.gets == 2
+        assert cache.snapshot()['revalidated'] == 1
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+
+def test_page_cache_lru_bound_on_bytes():
+    class _StaticFetcher:
+        def fetch_page(self, url, timeout=5, stop_at=None, headers=None):
+            response = type('R', (), {})()
+            response.status_code = 200
+            response.content = b'x' * 100
+            response.headers = {}
+            return response
+
+    cache = PageCache(_StaticFetcher(), max_bytes=250, cache_dir=None)
+    for i in range(4):
+        cache.get(f'https://site{i}.com')
+    snapshot = cache.snapshot()
+    assert snapshot['pages'] == 2
+    assert snapshot['bytes_cached'] == 200
+    assert snapshot['evictions'] == 2
+
+
+class _SlowFetcher:
+    """Stands in for WebFetcher: sleeps per request and records peak concurrency per host"""
+
+    def __init__(self, delay, honour_timeout=True):
+        self.delay = delay
+        self.honour_timeout = honour_timeout
+        self.in_flight = {}
+        self.peak = {}
+        self.lock = threading.Lock()
+
+    def fetch_page(self, url, timeout=5, stop_at=None, headers=None):
+        host = url.split('/')[2]
+        with self.lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        time.sleep(min(self.delay, timeout) if self.honour_timeout else self.delay)
+        with self.lock:
+            self.in_flight[host] -= 1
+        response = type('R', (), {})()
+        response.status_code = 200
+        response.content = b'<html></html>'
+        response.headers = {}
+        return response
+
+
+def test_crawler_fetches_concurrently_with_per_host_cap():
+    fetcher = _SlowFetcher(delay=0.2)
+    crawler = SiteCrawler(PageCache(fetcher, cache_dir=None), max_concurrency=8, per_host=2)
+    urls = [f'https://acme.com/page{i}' for i in range(4)] + ['https://other.com/contact']
+    start = time.time()
+    pages = crawler.fetch_all(urls)
+    elapsed = time.time() - start
+    crawler.close()
+
+    assert all(pages[url] is not None for url in urls)
+    assert fetcher.peak['acme.com'] == 2
+    assert elapsed < 0.2 * len(urls)  # faster than serial
+
+
+def test_crawler_drops_pages_past_deadline():
+    fetcher = _SlowFetcher(delay=1.0, honour_timeout=False)  # a request still in flight at the deadline
+    crawler = SiteCrawler(PageCache(fetcher, cache_dir=None), max_concurrency=2, per_host=1)
+    urls = [f'https://slow.com/page{i}' for i in range(3)]
+    start = time.time()
+    pages = crawler.fetch_all(urls, deadline=SiteCrawler.new_deadline(0.3))
+    crawler.close()
+
+    assert time.time() - start < 0.9
+    assert crawler.snapshot()['pages_dropped_at_deadline'] >= 1
+    assert any(page is None for page in pages.values())
+
+
+def test_probe_first_prefers_priority_order_and_runs_in_parallel():
+    class _HeadFetcher:
+        live = {'https://acme.io': 0.3, 'https://acme.ai': 0.05}
+
+        def head(self, url, timeout=2):
+            time.sleep(self.live.get(url, 0.3))
+            response = type('R', (), {})()
+            response.status_code = 200 if url in self.live else 404
+            return response
+
+    crawler = SiteCrawler(PageCache(_HeadFetcher(), cache_dir=None), max_concurrency=9)
+    start = time.time()
+    winner = crawler.probe_first(['https://acme.com', 'https://acme.io', 'https://acme.ai', 'https://acme.co'])
+    elapsed = time.time() - start
+    crawler.close()
+
+    assert winner == 'https://acme.io'  # .ai answered first but .io has priority
+    assert elapsed < 0.6
+
+
+def test_probe_miss_is_conclusive_only_for_definite_answers():
+    class _HeadFetcher:
+        answers = {}
+
+        def head(self, url, timeout=2):
+            answer = self.answers[url]
+            if isinstance(answer, Exception):
+                raise answer
+            response = type('R', (), {})()
+            response.status_code = answer
+            return response
+
+    from web_fetcher import HostUnresolvableError
+    fetcher = _HeadFetcher()
+    crawler = SiteCrawler(PageCache(fetcher, cache_dir=None), max_concurrency=4)
+    try:
+        fetcher.answers = {'https://a.com': 404, 'https://a.io': HostUnresolvableError('nope')}
+        assert crawler.probe_candidates(list(fetcher.answers)) == (None, True)
+        fetcher.answers = {'https://a.com': 404, 'https://a.io': requests.Timeout('slow')}
+        assert crawler.probe_candidates(list(fetcher.answers)) == (None, False)
+        fetcher.answers = {'https://a.com': 503, 'https://a.io': 404}
+        assert crawler.probe_candidates(list(fetcher.answers)) == (None, False)
+        fetcher.answers = {'https://a.com': requests.Timeout('slow'), 'https://a.io': 200}
+        assert crawler.probe_candidates(list(fetcher.answers)) == ('https://a.io', True)
+    finally:
+        crawler.close()
+
+
+def test_failing_host_gets_short_timeout_then_is_skipped():
+    import socket
+    import pytest
+    from host_health import HostHealth, HostUnavailableError
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        dead_url = f"http://127.0.0.1:{sock.getsockname()[1]}/"  # nothing listening once closed
+
+    health = HostHealth()
+    fetcher = WebFetcher(health)
+    fetcher.scheduler.min_delay = 0.0
+    try:
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                fetcher.get(dead_url)
+        assert health.timeout_for(dead_url.split('/')[2], 5) < 5
+
+        with pytest.raises(HostUnavailableError):
+            fetcher.get(dead_url)
+        snapshot = health.snapshot()
+        assert snapshot['skipped_requests'] == 1
+        assert snapshot['hosts_in_backoff'] == 1
+        # The unreachable robots.txt counted as the failure; the page itself wasn't tried as well
+        assert snapshot['failures_recorded'] == 2
+    finally:
+        fetcher.close()
+
+
+def test_host_recovers_after_success():
+    from host_health import HostHealth
+
+    health = HostHealth()
+    health.record_failure('acme.com', 'ReadTimeout')
+    assert not health.should_skip('acme.com')  # one failure only shortens the timeout
+    health.record_success('acme.com', 0.2)
+    assert health.timeout_for('acme.com', 5) == 5
+    assert health.snapshot()['recoveries'] == 1
+
+
+def test_host_health_persists_only_backoff_transitions():
+    from config import HOST_HEALTH_SKIP_AFTER_FAILURES
+    from host_health import HostHealth
+
+    class _DB:
+        saved = []
+
+        def get_unhealthy_hosts(self):
+            return []
+
+        def save_host_health(self, host, fields):
+            self.saved.append(fields['consecutiveFailures'])
+
+    db = _DB()
+    health = HostHealth(db)
+    for _ in range(HOST_HEALTH_SKIP_AFTER_FAILURES - 1):
+        health.record_failure('acme.com', 'ReadTimeout')
+    assert db.saved == []
+    health.record_failure('acme.com', 'ReadTimeout')
+    assert db.saved == [HOST_HEALTH_SKIP_AFTER_FAILURES]  # entered back-off
+    health.record_success('acme.com', 0.2)
+    assert db.saved == [HOST_HEALTH_SKIP_AFTER_FAILURES, 0]  # left it
+
+    health.record_failure('other.com', 'ReadTimeout')
+    health.record_success('other.com', 0.2)
+    assert len(db.saved) == 2
+
+
+def test_streaming_fetch_caps_bytes_stops_early_and_rejects_binary():
+    import pytest
+
+    server = _serve()
+    fetcher = _fetcher()
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        contact = fetcher.fetch_page(base + '/contact', stop_at=(STOP_AT_MAILTO,))
+        assert contact.stopped_early
+        assert b'partners@acme.com' in contact.content
+        assert len(contact.content) < 100 * 1024
+
+        # A small unread remainder is drained, so the connection goes back to the pool
+        _Handler.clients.clear()
+        team = fetcher.fetch_page(base + '/team', stop_at=(STOP_AT_MAILTO,))
+        assert team.stopped_early
+        assert fetcher.get(base + '/').status_code == 200
+        assert len(_Handler.clients) == 1
+
+        big = fetcher.fetch_page(base + '/big', max_bytes=64 * 1024)
+        assert big.truncated and len(big.content) == 64 * 1024
+
+        with pytest.raises(NonHTMLContentError):
+            fetcher.fetch_page(base + '/brochure.pdf')
+
+        streaming = fetcher.connection_stats()['streaming']
+        assert streaming['pages_stopped_early'] == 2
+        assert streaming['pages_truncated'] == 1
+        assert streaming['non_html_aborted'] == 1
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+
+def test_scheduler_spaces_requests_per_host_and_honours_robots():
+    import pytest
+    from crawl_scheduler import RobotsDisallowedError
+
+    server = _serve()
+    _Handler.robots_txt = "User-agent: *\nDisallow: /private\n"
+    fetcher = _fetcher(min_delay=0.2)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        start = time.time()
+        for path in ('/', '/about', '/contact'):
+            fetcher.get(base + path)
+        assert time.time() - start >= 0.4  # three requests, two enforced gaps
+
+        with pytest.raises(RobotsDisallowedError):
+            fetcher.get(base + '/private/team')
+
+        politeness = fetcher.connection_stats()['politeness']
+        assert politeness['robots_fetched'] == 1
+        assert politeness['robots_disallowed'] == 1
+        assert politeness['delayed_requests'] >= 2
+    finally:
+        _Handler.robots_txt = ''
+        fetcher.close()
+        server.shutdown()
+
+
+def test_scheduler_interleaves_hosts():
+    from crawl_scheduler import CrawlScheduler
+
+    scheduler = CrawlScheduler(session=None, min_delay=0.3, respect_robots=False)
+    start = time.time()
+    threads = [threading.Thread(target=scheduler.acquire, args=('https', host, f'https://{host}/'))
+               for host in ('a.com', 'b.com', 'c.com', 'a.com')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Different hosts don't wait on each other; only the second a.com request waits one gap
+    assert time.time() - start < 0.5
+    assert scheduler.snapshot()['delayed_requests'] == 1
+
+
+def test_dns_cache_positive_negative_and_pre_resolve():
+    import socket
+    from dns_cache import DNSCache
+
+    lookups = []
+
+    def fake_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        lookups.append(host)
+        if host.endswith('.invalid'):
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))]
+
+    cache = DNSCache(ttl=60, negative_ttl=60, workers=4)
+    cache._original_getaddrinfo = fake_getaddrinfo
+
+    results = cache.pre_resolve(['acme.com', 'ACME.com', 'acme.invalid', 'acme.io'])
+    assert results == {'acme.com': True, 'acme.invalid': False, 'acme.io': True}
+    assert not cache.is_resolvable('acme.invalid')
+    assert cache.is_resolvable('acme.com')
+    assert sorted(lookups) == ['acme.com', 'acme.invalid', 'acme.io']  # every repeat came from the cache
+    assert cache.snapshot()['negative_hits'] == 1
+
+
+def test_dns_cache_skips_transient_failures_and_untracked_hosts():
+    import socket
+    from dns_cache import DNSCache
+
+    lookups = []
+    flaky = {'acme.com': 1}
+
+    def fake_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        lookups.append(host)
+        if flaky.get(host):
+            flaky[host] -= 1
+            raise socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))]
+
+    cache = DNSCache(ttl=60, negative_ttl=60, workers=2, max_hosts=2)
+    cache._original_getaddrinfo = fake_getaddrinfo
+
+    assert cache.is_resolvable('acme.com')  # temporary failure: left to the connection attempt
+    assert cache.is_resolvable('acme.com')
+    assert lookups == ['acme.com', 'acme.com']  # not negatively cached
+
+    cache.getaddrinfo('mongo.internal', 27017)
+    cache.getaddrinfo('mongo.internal', 27017)
+    assert lookups.count('mongo.internal') == 2  # not a sponsor host: never cached
+
+    cache.is_resolvable('acme.io')
+    cache.is_resolvable('acme.ai')
+    assert list(cache._hosts) == ['acme.io', 'acme.ai'] and 'acme.com' not in cache._answers
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the long-lived scraper worker's HTTP API and run queue
+(uses a fake scraper; no IMAP, MongoDB or Gemini required)
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from worker_service import ScraperWorker, serve
+
+
+class _FakeInbox:
+    def __init__(self):
+        self.checks = 0
+
+    def ensure_connected(self):
+        self.checks += 1
+
+
+class _FakeScraper:
+    created = 0
+
+    def __init__(self, release: threading.Event):
+        _FakeScraper.created += 1
+        self.release = release
+        self.email_processor = _FakeInbox()
+        self.progress = None
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+
+    def run_scraping_cycle(self, max_emails=10, deadline=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.calls.append((max_emails, deadline))
+        if self.progress:
+            self.progress({'event': 'cycle_started', 'max_emails': max_emails})
+        self.release.wait(5)
+        self.active -= 1
+        return {'processed_emails': max_emails, 'total_sponsors': 1, 'partial': False}
+
+    def cleanup(self):
+        pass
+
+
+def _request(base, method, path, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(base + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _wait_for(base, run_id, status):
+    for _ in range(100):
+        code, run = _request(base, 'GET', f'/runs/{run_id}')
+        if run['status'] == status:
+            return run
+        time.sleep(0.05)
+    raise AssertionError(f"run {run_id} never reached {status}: {run}")
+
+
+def _start(max_queued=5):
+    release = threading.Event()
+    scrapers = []
+
+    def factory():
+        scrapers.append(_FakeScraper(release))
+        return scrapers[-1]
+
+    worker = ScraperWorker(factory, max_queued=max_queued)
+    server = serve(worker, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return worker, server, base, release, scrapers
+
+
+def test_runs_are_serialised_on_one_warm_scraper():
+    worker, server, base, release, scrapers = _start()
+    try:
+        code, first = _request(base, 'POST', '/runs', {'max_emails': 3, 'deadline_seconds': 60})
+        assert code == 202
+        _wait_for(base, first['run_id'], 'running')
+        code, second = _request(base, 'POST', '/runs', {'max_emails': 4})
+        assert code == 202
+
+        code, status = _request(base, 'GET', '/status')
+        assert status['current_run']['run_id'] == first['run_id']
+        assert status['queued_runs'] == [second['run_id']]
+
+        release.set()
+        done = _wait_for(base, second['run_id'], 'done')
+        assert done['summary']['processed_emails'] == 4
+        assert done['events'][0]['event'] == 'cycle_started'
+
+        first_run = _wait_for(base, first['run_id'], 'done')
+        assert first_run['summary']['processed_emails'] == 3
+        assert len(scrapers) == 1
+        scraper = scrapers[0]
+        assert scraper.max_active == 1
+        assert scraper.email_processor.checks == 1  # reconnect check before the reused run
+        assert scraper.calls[0][1] is not None and scraper.calls[1][1] is None
+        assert scraper.progress is None
+    finally:
+        release.set()
+        server.shutdown()
+        worker.stop()
+
+
+def test_full_queue_is_rejected_and_bad_input_is_400():
+    worker, server, base, release, scrapers = _start(max_queued=1)
+    try:
+        code, first = _request(base, 'POST', '/runs', {'max_emails': 1})
+        _wait_for(base, first['run_id'], 'running')
+        assert _request(base, 'POST', '/runs', {'max_emails': 1})[0] == 202
+        assert _request(base, 'POST', '/runs', {'max_emails': 1})[0] == 429
+        assert _request(base, 'POST', '/runs', {'max_emails': 'lots'})[0] == 400
+        assert _request(base, 'GET', '/runs/missing')[0] == 404
+        assert _request(base, 'GET', '/health') == (200, {'ok': True})
+    finally:
+        release.set()
+        server.shutdown()
+        worker.stop()
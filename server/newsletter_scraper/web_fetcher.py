@@ -0,0 +1,310 @@
+import codecs
+import threading
+import time
+from html.parser import HTMLParser
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from crawl_scheduler import CrawlScheduler
+from dns_cache import dns_cache
+from host_health import HostHealth, HostUnavailableError, UNHEALTHY_STATUS_CODES
+from page_extractor import declared_charset
+from pipeline import raise_if_cancelled
+from config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_RETRY_BACKOFF, HTTP_USER_AGENT,
+    HTTP_MAX_PAGE_BYTES, HTTP_STREAM_CHUNK_BYTES, HTTP_DRAIN_MAX_BYTES
+)
+
+# Content types worth parsing; anything else (PDFs, images, zips, JS bundles) is aborted after the headers
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+
+# Early-stop markers for callers that only need part of a page
+STOP_AT_MAILTO = 'mailto'
+STOP_AT_FOOTER = 'footer'
+
+
+class NonHTMLContentError(requests.RequestException):
+    """The URL answered with a content type we don't parse"""
+
+
+class HostUnresolvableError(requests.ConnectionError):
+    """The host didn't resolve (answered from the DNS cache; no TCP connection attempted)"""
+
+
+class _StopScanner(HTMLParser):
+    """Incremental scan of the streamed HTML for the requested early-stop markers"""
+
+    def __init__(self, stop_at: Tuple[str, ...]):
+        super().__init__(convert_charrefs=False)
+        self.stop_at = stop_at
+        self.triggered = False
+
+    def handle_starttag(self, tag, attrs):
+        if STOP_AT_MAILTO in self.stop_at and tag == 'a':
+            href = dict(attrs).get('href') or ''
+            if href.lower().startswith('mailto:'):
+                self.triggered = True
+
+    def handle_endtag(self, tag):
+        if STOP_AT_FOOTER in self.stop_at and tag == 'footer':
+            self.triggered = True
+
+
+def _host_key(scheme: Optional[str], host: Optional[str], port: Optional[int]) -> str:
+    """host:port with the scheme's default port filled in, shared by request and pool accounting"""
+    scheme = (scheme or 'https').lower()
+    return f"{(host or '').lower()}:{port or (80 if scheme == 'http' else 443)}"
+
+
+class StreamedPage:
+    """Body of a bounded streaming GET (the subset of requests.Response the page cache uses)"""
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes,
+                 truncated: bool = False, stopped_early: bool = False, encoding: Optional[str] = None):
+        self.url = url
+        self.encoding = encoding
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.truncated = truncated
+        self.stopped_early = stopped_early
+
+
+class WebFetcher:
+    """
+    Single managed HTTP session for all sponsor website requests.
+
+    One pooled keep-alive Session (shared headers and retry policy) replaces the
+    module-level requests.get/head calls, so repeated hits to the same host reuse
+    the TCP+TLS connection instead of opening a new one each time.
+    """
+
+    DEFAULT_HEADERS = {
+        'User-Agent': HTTP_USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Connection': 'keep-alive'
+    }
+
+    def __init__(self, host_health: Optional[HostHealth] = None):
+        # Hosts that keep failing get a shortened timeout, then are skipped until their back-off expires
+        self.host_health = host_health or HostHealth()
+        # Cached getaddrinfo for the sponsor hosts this fetcher requests (other lookups pass through)
+        dns_cache.install()
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+
+        retry = Retry(
+            total=HTTP_RETRIES,
+            connect=HTTP_RETRIES,
+            read=0,  # don't re-read slow pages; the caller's timeout already bounds them
+            backoff_factor=HTTP_RETRY_BACKOFF,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=['GET', 'HEAD'],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Per-host politeness slots and cached robots.txt in front of every request
+        self.scheduler = CrawlScheduler(self.session, self.host_health)
+
+        self._lock = threading.Lock()
+        self._requests_by_host: Dict[str, int] = {}
+        # Pool counters at the last reset_stats, so stats cover one window without dropping warm connections
+        self._pool_baseline: Dict[str, Tuple[int, int, int]] = {}
+        self.stream_stats = self._empty_stream_stats()
+
+    @staticmethod
+    def _empty_stream_stats() -> Dict:
+        return {'bytes_read': 0, 'pages_truncated': 0, 'pages_stopped_early': 0, 'non_html_aborted': 0}
+
+    def _count(self, url: str):
+        parsed = urlparse(url)
+        host = _host_key(parsed.scheme, parsed.hostname, parsed.port)
+        with self._lock:
+            self._requests_by_host[host] = self._requests_by_host.get(host, 0) + 1
+
+    def _request(self, method: str, url: str, timeout: float, check_robots: bool = True, record_health: bool = True,
+                 **kwargs) -> requests.Response:
+        raise_if_cancelled(f"{method} {url}")
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if not dns_cache.is_resolvable(parsed.hostname):
+            raise HostUnresolvableError(f"Skipping {host}: does not resolve")
+        if self.host_health.should_skip(host):
+            raise HostUnavailableError(f"Skipping {host}: in failure back-off window")
+        self.scheduler.acquire(parsed.scheme or 'https', host, url, check_robots=check_robots, timeout=timeout)
+
+        self._count(url)
+        start = time.time()
+        try:
+            response = self.session.request(method, url, timeout=self.host_health.timeout_for(host, timeout), **kwargs)
+        except requests.RequestException as e:
+            if record_health:
+                self.host_health.record_failure(host, f"{type(e).__name__}: {e}")
+            raise
+
+        if not record_health:
+            return response
+        if response.status_code >= 500 or response.status_code in UNHEALTHY_STATUS_CODES:
+            self.host_health.record_failure(host, f"HTTP {response.status_code}")
+        elif response.status_code < 400:
+            self.host_health.record_success(host, time.time() - start)
+        return response
+
+    def get(self, url: str, timeout: float = 5, **kwargs) -> requests.Response:
+        return self._request('GET', url, timeout, **kwargs)
+
+    def head(self, url: str, timeout: float = 2, allow_redirects: bool = True, **kwargs) -> requests.Response:
+        # Domain-existence probes only touch '/', so they skip the robots.txt fetch (politeness delay still applies).
+        # Most guessed domains don't exist, so a probe's outcome says nothing about a real sponsor host's health
+        return self._request('HEAD', url, timeout, check_robots=False, record_health=False,
+                             allow_redirects=allow_redirects, **kwargs)
+
+    def fetch_page(self, url: str, timeout: float = 5, max_bytes: int = HTTP_MAX_PAGE_BYTES,
+                   stop_at: Optional[Tuple[str, ...]] = None, headers: Optional[Dict] = None) -> StreamedPage:
+        """
+        Bounded streaming GET for HTML pages.
+
+        Reads at most max_bytes, aborts on non-HTML content types, and when stop_at is
+        given (STOP_AT_MAILTO / STOP_AT_FOOTER) stops reading as soon as the incremental
+        scan has seen one of those markers.
+        """
+        response = self._request('GET', url, timeout, stream=True, headers=headers)
+        unfinished = True
+        try:
+            if response.status_code == 304:
+                return StreamedPage(url, 304, response.headers, b'')
+
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if response.status_code < 400 and content_type and content_type not in HTML_CONTENT_TYPES:
+                with self._lock:
+                    self.stream_stats['non_html_aborted'] += 1
+                raise NonHTMLContentError(f"Not an HTML page ({content_type}): {url}")
+
+            charset = declared_charset(response.headers)
+            scanner = _StopScanner(stop_at) if stop_at else None
+            # The scanner only looks at ASCII markup, so UTF-8 is fine when no charset is declared
+            decoder = self._scan_decoder(charset) if scanner else None
+            chunks = []
+            size = 0
+            truncated = stopped_early = False
+            for chunk in response.iter_content(chunk_size=HTTP_STREAM_CHUNK_BYTES):
+                if size + len(chunk) > max_bytes:
+                    chunks.append(chunk[:max_bytes - size])
+                    size = max_bytes
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if scanner:
+                    scanner.feed(decoder.decode(chunk))
+                    if scanner.triggered:
+                        stopped_early = True
+                        break
+            else:
+                unfinished = False
+
+            with self._lock:
+                self.stream_stats['bytes_read'] += size
+                self.stream_stats['pages_truncated'] += int(truncated)
+                self.stream_stats['pages_stopped_early'] += int(stopped_early)
+            return StreamedPage(url, response.status_code, response.headers, b''.join(chunks),
+                                truncated=truncated, stopped_early=stopped_early, encoding=charset)
+        finally:
+            if unfinished:
+                self._drain(response)
+            response.close()
+
+    @staticmethod
+    def _scan_decoder(charset: Optional[str]):
+        try:
+            return codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+        except LookupError:
+            return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @staticmethod
+    def _drain(response: requests.Response):
+        """
+        Read the rest of an abandoned body when it is small, so close() hands the keep-alive
+        connection back to the pool. A large or unknown-length remainder is not worth
+        downloading: close() then drops the connection and the next request opens a new one.
+        """
+        length = response.headers.get('Content-Length', '')
+        if not length.isdigit() or int(length) - response.raw.tell() > HTTP_DRAIN_MAX_BYTES:
+            return
+        try:
+            for _ in response.iter_content(chunk_size=HTTP_STREAM_CHUNK_BYTES):
+                pass
+        except requests.RequestException:
+            pass
+
+    def _pools(self):
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    yield _host_key(pool.scheme, pool.host, pool.port), pool
+
+    def connection_stats(self) -> Dict:
+        """
+        Connection reuse per host (host:port) since the last reset_stats: requests issued vs
+        new connections opened by the pool. reused = requests - connections_opened (only
+        counts hosts still held in the pool).
+        """
+        with self._lock:
+            requests_by_host = dict(self._requests_by_host)
+            baseline = dict(self._pool_baseline)
+
+        hosts = {}
+        for host, pool in self._pools():
+            pool_id, connections, pool_requests = baseline.get(host, (None, 0, 0))
+            if pool_id != id(pool):
+                # Pool was evicted and recreated since the reset: its counters started from zero
+                connections = pool_requests = 0
+            entry = hosts.setdefault(host, {'connections_opened': 0, 'pool_requests': 0})
+            entry['connections_opened'] += max(0, pool.num_connections - connections)
+            entry['pool_requests'] += max(0, pool.num_requests - pool_requests)
+
+        for host, count in requests_by_host.items():
+            entry = hosts.setdefault(host, {'connections_opened': 0, 'pool_requests': 0})
+            entry['requests'] = count
+        for entry in hosts.values():
+            entry.setdefault('requests', 0)
+            entry['reused'] = max(0, entry['pool_requests'] - entry['connections_opened'])
+
+        total_requests = sum(e['pool_requests'] for e in hosts.values())
+        total_connections = sum(e['connections_opened'] for e in hosts.values())
+        return {
+            'host_health': self.host_health.snapshot(),
+            'streaming': dict(self.stream_stats),
+            'politeness': self.scheduler.snapshot(),
+            'dns': dns_cache.snapshot(),
+            'hosts': len(hosts),
+            'requests': total_requests,
+            'connections_opened': total_connections,
+            'connections_reused': max(0, total_requests - total_connections),
+            'reuse_ratio': round(1 - total_connections / total_requests, 3) if total_requests else 0.0,
+            'by_host': hosts
+        }
+
+    def reset_stats(self):
+        """Start a fresh accounting window; pooled connections stay open for the next cycle"""
+        baseline = {host: (id(pool), pool.num_connections, pool.num_requests) for host, pool in self._pools()}
+        with self._lock:
+            self._requests_by_host = {}
+            self._pool_baseline = baseline
+            self.stream_stats = self._empty_stream_stats()
+        self.host_health.reset_stats()
+        self.scheduler.reset_stats()
+        dns_cache.reset_stats()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Long-lived scraper worker.
+
+Keeps one NewsletterScraper (IMAP and MongoDB connections, Gemini model, DNS/robots/
+contact caches) warm between runs and accepts run requests over local HTTP,
+replacing the spawn-per-request api_wrapper.py stdout protocol:
+
+    POST /runs            {"max_emails": 75, "deadline_seconds": 270}  -> 202 {"run_id": ...}
+    GET  /runs/<run_id>   status, recent progress events and, when finished, the summary
+    GET  /status          worker state: current run, queued runs, last finished run
+    GET  /health          liveness
+
+The Node web process starts it as a child (server/startup/scraperWorker.js) and its
+scraper routes fall back to spawning api_wrapper.py when it is not reachable.
+
+Runs execute one at a time in request order. deadline_seconds counts from when the
+request was accepted, so time spent queued is part of the caller's budget.
+"""
+
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+from config import (
+    WORKER_HOST, WORKER_PORT, WORKER_MAX_QUEUED_RUNS, WORKER_RUN_HISTORY, WORKER_RUN_EVENTS,
+    MAX_EMAILS_PER_RUN
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _Run:
+    def __init__(self, max_emails: int, deadline_seconds: Optional[float]):
+        self.id = uuid.uuid4().hex[:12]
+        self.max_emails = max_emails
+        self.requested_at = time.time()
+        self.deadline = self.requested_at + deadline_seconds if deadline_seconds else None
+        self.status = 'queued'
+        self.started_at = None
+        self.finished_at = None
+        self.summary = None
+        self.error = None
+        self.events = deque(maxlen=WORKER_RUN_EVENTS)
+
+    def record(self, event: Dict):
+        self.events.append(event)
+
+    def to_dict(self, include_events: bool = True) -> Dict:
+        data = {
+            'run_id': self.id,
+            'status': self.status,
+            'max_emails': self.max_emails,
+            'requested_at': datetime.utcfromtimestamp(self.requested_at).isoformat(),
+            'started_at': datetime.utcfromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finished_at': datetime.utcfromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            'deadline_seconds_left': round(self.deadline - time.time(), 1) if self.deadline else None,
+            'summary': self.summary,
+            'error': self.error
+        }
+        if include_events:
+            data['events'] = list(self.events)
+        return data
+
+
+class RunQueueFullError(Exception):
+    """More runs are waiting than WORKER_MAX_QUEUED_RUNS"""
+
+
+class ScraperWorker:
+    """Serial run queue in front of one long-lived scraper"""
+
+    def __init__(self, scraper_factory: Callable, max_queued: int = WORKER_MAX_QUEUED_RUNS):
+        self.scraper_factory = scraper_factory
+        self.scraper = None
+        self.started_at = time.time()
+        self._pending: 'queue.Queue[_Run]' = queue.Queue(maxsize=max_queued)
+        self._runs: 'OrderedDict[str, _Run]' = OrderedDict()
+        self._current: Optional[_Run] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='scraper-runs', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join(timeout=5)
+        if self.scraper is not None:
+            self.scraper.cleanup()
+
+    def submit(self, max_emails: int, deadline_seconds: Optional[float]) -> _Run:
+        run = _Run(max_emails, deadline_seconds)
+        with self._lock:
+            try:
+                self._pending.put_nowait(run)
+            except queue.Full:
+                raise RunQueueFullError(f"{self._pending.qsize()} runs already queued")
+            self._runs[run.id] = run
+            self._forget_old_runs()
+        logger.info(f"Queued run {run.id} (max_emails={max_emails}, deadline_seconds={deadline_seconds})")
+        return run
+
+    def get(self, run_id: str) -> Optional[_Run]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def status(self) -> Dict:
+        with self._lock:
+            finished = [run for run in self._runs.values() if run.status in ('done', 'failed')]
+            return {
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'scraper_ready': self.scraper is not None,
+                'current_run': self._current.to_dict(include_events=False) if self._current else None,
+                'queued_runs': [run.id for run in self._runs.values() if run.status == 'queued'],
+                'last_run': finished[-1].to_dict(include_events=False) if finished else None
+            }
+
+    def _forget_old_runs(self):
+        finished = [run_id for run_id, run in self._runs.items() if run.status in ('done', 'failed')]
+        for run_id in finished[:max(0, len(finished) - WORKER_RUN_HISTORY)]:
+            del self._runs[run_id]
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                run = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._execute(run)
+
+    def _execute(self, run: _Run):
+        with self._lock:
+            self._current = run
+            run.status = 'running'
+            run.started_at = time.time()
+        try:
+            if self.scraper is None:
+                # Created once: imports, connections and the Gemini model stay warm for later runs
+                self.scraper = self.scraper_factory()
+            else:
+                self.scraper.email_processor.ensure_connected()
+            self.scraper.progress = run.record
+            summary = self.scraper.run_scraping_cycle(max_emails=run.max_emails, deadline=run.deadline)
+            run.summary = summary
+            run.status = 'failed' if summary.get('error') else 'done'
+            run.error = summary.get('error')
+        except Exception as e:
+            logger.error(f"Run {run.id} failed: {e}", exc_info=True)
+            run.status = 'failed'
+            run.error = str(e)
+        finally:
+            if self.scraper is not None:
+                self.scraper.progress = None
+            with self._lock:
+                run.finished_at = time.time()
+                self._current = None
+                self._forget_old_runs()
+            logger.info(f"Run {run.id} {run.status} in {run.finished_at - run.started_at:.1f}s")
+
+
+def _make_handler(worker: ScraperWorker):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Dict):
+            payload = json.dumps(body, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'ok': True})
+            elif self.path == '/status':
+                self._send(200, worker.status())
+            elif self.path.startswith('/runs/'):
+                run = worker.get(self.path[len('/runs/'):])
+                if run is None:
+                    self._send(404, {'error': 'unknown run'})
+                else:
+                    self._send(200, run.to_dict())
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/runs':
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                params = json.loads(self.rfile.read(length) or b'{}')
+                max_emails = int(params.get('max_emails', MAX_EMAILS_PER_RUN))
+                deadline_seconds = params.get('deadline_seconds')
+                deadline_seconds = float(deadline_seconds) if deadline_seconds else None
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': f'invalid run parameters: {e}'})
+                return
+            try:
+                run = worker.submit(max_emails, deadline_seconds)
+            except RunQueueFullError as e:
+                self._send(429, {'error': str(e)})
+                return
+            self._send(202, {'run_id': run.id, 'status': run.status})
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(worker: ScraperWorker, host: str = WORKER_HOST, port: int = WORKER_PORT) -> ThreadingHTTPServer:
+    """Start the worker's run loop and return its HTTP server (call serve_forever on it)"""
+    worker.start()
+    server = ThreadingHTTPServer((host, port), _make_handler(worker))
+    logger.info(f"Scraper worker listening on http://{host}:{server.server_address[1]}")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-lived newsletter scraper worker (local HTTP API)')
+    parser.add_argument('--host', default=WORKER_HOST)
+    parser.add_argument('--port', type=int, default=WORKER_PORT)
+    parser.add_argument('--preflight', action='store_true',
+                        help='Run a real Gemini test generation when the scraper is first created')
+    args = parser.parse_args()
+
+    from newsletter_scraper import NewsletterScraper
+    worker = ScraperWorker(lambda: NewsletterScraper(preflight=args.preflight))
+    server = serve(worker, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped by user")
+    finally:
+        server.server_close()
+        worker.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@ const admin = require('../middleware/admin');
 const { spawn } = require('child_process');
 const path = require('path');
 const sendEmail = require('../utils/sendEmail');
+const { runOnWorker, WorkerUnavailableError } = require('../utils/scraperWorker');
 // Helper function to get collapsed sponsors (one per company) with most recent newsletter date
 const getCollapsedSponsorsForFrontend = (sponsors, userId = null) => {
     const collapsed = [];
@@ -1356,6 +1357,19 @@ router.post('/scraper/run', [auth, admin], async (req, res) => {
     try {
         console.log("Starting Python Newsletter Scraper from admin dashboard...");
         
+        // Prefer the long-lived worker; fall back to spawning the API wrapper if it is not running
+        try {
+            const result = await runOnWorker({ maxEmails: 75, deadlineSeconds: 570 });
+            return sendResponse(result.success ? 200 : 400, {
+                success: result.success,
+                message: result.success ? 'Scraper completed successfully' : 'Scraper failed',
+                result: result
+            });
+        } catch (error) {
+            if (!(error instanceof WorkerUnavailableError)) throw error;
+            console.log(`${error.message}, spawning the scraper instead`);
+        }
+        
         // Check if we're in a Heroku environment
         const isHeroku = process.env.NODE_ENV === 'production' && process.env.DYNO;
         
@@ -1370,7 +1384,8 @@ router.post('/scraper/run', [auth, admin], async (req, res) => {
                     // Path to the Python API wrapper
                     const pythonScriptPath = path.join(__dirname, '../newsletter_scraper/api_wrapper.py');
                     
-                    pythonProcess = spawn(cmd, [pythonScriptPath], {
+                    // Leave a margin under the 10 minute kill timer below so the scraper returns a summary first
+                    pythonProcess = spawn(cmd, [pythonScriptPath, '--deadline-seconds', '570'], {
                         cwd: path.join(__dirname, '../newsletter_scraper'),
                         env: {
                             ...process.env,
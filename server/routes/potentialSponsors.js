@@ -5,6 +5,7 @@ const { Sponsor } = require('../models/sponsor');
 const { SponsorNew } = require('../models/sponsorNew');
 const auth = require('../middleware/auth');
 const admin = require('../middleware/admin');
+const { runOnWorker, WorkerUnavailableError } = require('../utils/scraperWorker');
 
 // Check if a sponsor already exists in either collection
 router.get('/checkDuplicate', async (req, res) => {
@@ -84,11 +85,25 @@ router.get('/pythonScraper', async (req, res) => {
     try {
         console.log("Starting Python Newsletter Scraper...");
         
+        // Prefer the long-lived worker; fall back to spawning the API wrapper if it is not running
+        try {
+            const result = await runOnWorker({ maxEmails: 75, deadlineSeconds: 270 });
+            return res.status(result.success ? 200 : 400).json({
+                success: result.success,
+                message: result.success ? 'Python Newsletter Scraper completed successfully' : 'Python Newsletter Scraper failed',
+                pythonResult: result
+            });
+        } catch (error) {
+            if (!(error instanceof WorkerUnavailableError)) throw error;
+            console.log(`${error.message}, spawning the scraper instead`);
+        }
+        
         // Path to the Python API wrapper
         const pythonScriptPath = path.join(__dirname, '../newsletter_scraper/api_wrapper.py');
         
         // Spawn Python process
-        const pythonProcess = spawn('python3', [pythonScriptPath], {
+        // Leave a margin under the 5 minute kill timer below so the scraper returns a summary first
+        const pythonProcess = spawn('python3', [pythonScriptPath, '--deadline-seconds', '270'], {
             cwd: path.join(__dirname, '../newsletter_scraper'),
             env: {
                 ...process.env,
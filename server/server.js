@@ -22,6 +22,9 @@ const port = process.env.PORT || 3001;
 app.listen(port, () => {
     logger.info(`Listening on port ${port}...`);
     
+    // Long-lived Python scraper worker used by the scraper routes
+    require('./startup/scraperWorker')();
+    
     // Schedule token cleanup to run every 24 hours
     setInterval(async () => {
         try {
@@ -0,0 +1,59 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const logger = require('./logging');
+
+// The worker only listens on localhost, so it runs as a child of the web process rather than its own dyno
+const SCRAPER_DIR = path.join(__dirname, '../newsletter_scraper');
+const MAX_RESTART_DELAY_MS = 5 * 60 * 1000;
+
+const isEnabled = () => {
+    if (process.env.SCRAPER_WORKER === 'off') return false;
+    if (process.env.SCRAPER_WORKER === 'on') return true;
+    // Same condition the admin route uses to decide Python is available
+    return process.env.NODE_ENV === 'production' && !!process.env.DYNO;
+};
+
+module.exports = function () {
+    if (!isEnabled()) {
+        logger.info('Scraper worker disabled; scraper routes will spawn api_wrapper.py per run');
+        return;
+    }
+
+    let restartDelay = 5000;
+    let stopping = false;
+    let worker;
+
+    const start = () => {
+        const startedAt = Date.now();
+        worker = spawn(process.env.SCRAPER_PYTHON || 'python3', [path.join(SCRAPER_DIR, 'worker_service.py')], {
+            cwd: SCRAPER_DIR,
+            env: {
+                ...process.env,
+                PYTHONPATH: SCRAPER_DIR,
+                MAX_EMAILS_PER_RUN: process.env.MAX_EMAILS_PER_RUN || '75'
+            },
+            stdio: ['ignore', 'inherit', 'inherit']
+        });
+        logger.info(`Scraper worker started (pid ${worker.pid})`);
+
+        worker.on('error', (error) => {
+            logger.error(`Failed to start scraper worker: ${error.message}`);
+        });
+
+        worker.on('exit', (code, signal) => {
+            if (stopping) return;
+            // Back off while it keeps crashing on startup; reset once it has stayed up for a while
+            restartDelay = Date.now() - startedAt > MAX_RESTART_DELAY_MS ? 5000 : Math.min(restartDelay * 2, MAX_RESTART_DELAY_MS);
+            logger.error(`Scraper worker exited (code ${code}, signal ${signal}); restarting in ${restartDelay / 1000}s`);
+            setTimeout(start, restartDelay);
+        });
+    };
+
+    // Heroku signals every process in the dyno on shutdown; this covers the web process exiting on its own
+    process.on('exit', () => {
+        stopping = true;
+        if (worker && worker.exitCode === null) worker.kill('SIGTERM');
+    });
+
+    start();
+};
@@ -0,0 +1,70 @@
+const axios = require('axios');
+
+// Local HTTP API of newsletter_scraper/worker_service.py (started by startup/scraperWorker.js)
+const WORKER_URL = `http://${process.env.SCRAPER_WORKER_HOST || '127.0.0.1'}:${process.env.SCRAPER_WORKER_PORT || '8765'}`;
+const POLL_INTERVAL_MS = 2000;
+const REQUEST_TIMEOUT_MS = 5000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Thrown when the worker could not take the run, so the caller can spawn api_wrapper.py instead
+class WorkerUnavailableError extends Error {
+    constructor(message) {
+        super(message);
+        this.name = 'WorkerUnavailableError';
+    }
+}
+
+/**
+ * Queue a scraping run on the long-lived worker and wait for it to finish.
+ * Resolves with the same shape api_wrapper.py prints ({ success, message, summary, ... }).
+ * Rejects with WorkerUnavailableError if the worker is not running or its queue is full;
+ * once the run is accepted it is never handed to a second scraper.
+ */
+const runOnWorker = async ({ maxEmails, deadlineSeconds }) => {
+    let runId;
+    try {
+        const response = await axios.post(`${WORKER_URL}/runs`, {
+            max_emails: maxEmails,
+            deadline_seconds: deadlineSeconds
+        }, { timeout: REQUEST_TIMEOUT_MS });
+        runId = response.data.run_id;
+    } catch (error) {
+        const reason = error.response ? `HTTP ${error.response.status}` : (error.code || error.message);
+        throw new WorkerUnavailableError(`Scraper worker unavailable (${reason})`);
+    }
+    console.log(`Queued scraper run ${runId} on the worker`);
+
+    // The worker counts the deadline from acceptance (queueing included), so it should report well before this
+    const giveUpAt = Date.now() + (deadlineSeconds + 60) * 1000;
+    while (Date.now() < giveUpAt) {
+        await sleep(POLL_INTERVAL_MS);
+        let run;
+        try {
+            run = (await axios.get(`${WORKER_URL}/runs/${runId}`, { timeout: REQUEST_TIMEOUT_MS })).data;
+        } catch (error) {
+            if (error.response && error.response.status === 404) {
+                throw new Error(`Scraper worker lost run ${runId} (restarted?)`);
+            }
+            console.log(`Polling scraper run ${runId} failed, retrying...`, error.message);
+            continue;
+        }
+        if (run.status === 'done' || run.status === 'failed') {
+            const summary = run.summary || {};
+            return {
+                success: run.status === 'done',
+                message: run.status === 'done' ? 'Newsletter scraper completed successfully' : `Newsletter scraper failed: ${run.error}`,
+                run_id: runId,
+                summary: summary,
+                partial: summary.partial || false,
+                coalesced: summary.coalesced || false,
+                llm_stats: summary.llm_stats || {},
+                error: run.error || undefined,
+                timestamp: run.finished_at
+            };
+        }
+    }
+    throw new Error(`Scraper run ${runId} did not finish in time`);
+};
+
+module.exports = { runOnWorker, WorkerUnavailableError };